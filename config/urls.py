@@ -15,13 +15,16 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import hmac
 import os
 from django.urls import path, include
 from django.conf import settings
 from django.views.generic.base import RedirectView
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.http import HttpResponse
 from core.admin import core_admin_site
+from utils import metrics
 
 favicon_view = RedirectView.as_view(url="/static/favicon.ico", permanent=True)
 
@@ -29,11 +32,30 @@ favicon_view = RedirectView.as_view(url="/static/favicon.ico", permanent=True)
 @login_required
 def log(request):
     log_file = os.path.join(settings.DATA_FOLDER, "app.log")
-    with open(log_file, "r") as file:
-        log_content = file.read()
+    # only the end of the file, it grows up to the rotation size
+    with open(log_file, "rb") as file:
+        size = file.seek(0, os.SEEK_END)
+        file.seek(max(size - settings.LOG_TAIL_SIZE, 0))
+        if file.tell():
+            file.readline()  # skip the partial first line
+        log_content = file.read().decode("utf-8", errors="replace")
     return HttpResponse(log_content, content_type="text/plain; charset=utf-8")
 
 
+def metrics_view(request):
+    if not metrics.enabled():
+        return HttpResponse(
+            "Metrics are disabled, install prometheus-client", status=404
+        )
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            return HttpResponse(status=401)
+    elif not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return HttpResponse(metrics.exposition(), content_type=metrics.CONTENT_TYPE_LATEST)
+
+
 if settings.DEMO:
     # from django.contrib import admin
     class AccessUser:
@@ -44,6 +66,7 @@ if settings.DEMO:
 urlpatterns = [
     path("favicon.ico", favicon_view),
     path("log/", log, name="log"),
+    path("metrics/", metrics_view, name="metrics"),
     path("rss/", include("core.urls")),
     path("", core_admin_site.urls),
 ]
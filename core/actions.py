@@ -9,12 +9,20 @@ from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.http import HttpResponse
 from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least
 from django.utils.translation import gettext_lazy as _
 
+from utils import text_handler
 from utils.modelAdmin_utils import get_translator_and_summary_choices
 from .custom_admin_site import core_admin_site
 from .models import O_Feed
-from .tasks import update_original_feed, update_translated_feed
+from .tasks import (
+    admin_priority,
+    schedule_task,
+    update_original_feed,
+    update_translated_feed,
+)
 
 
 @admin.display(description=_("Export selected feeds as OPML"))
@@ -103,30 +111,28 @@ def t_feed_export_as_opml(modeladmin, request, queryset):
 @admin.display(description=_("Force update"))
 def o_feed_force_update(modeladmin, request, queryset):
     logging.info("Call o_feed_force_update: %s", queryset)
+    priority = admin_priority(queryset)
     with transaction.atomic():
         for instance in queryset:
             instance.etag = ""
             instance.valid = None
             instance.save()
-            #logging.info("Call revoke_tasks_by_arg in o_feed_force_update")
-            #revoke_tasks_by_arg(instance.sid)
-            update_original_feed.schedule(
-                args=(instance.sid,True), delay=1,
+            schedule_task(
+                update_original_feed, instance.sid, True, priority=priority
             )  # 会执行一次save()
 
 
 @admin.display(description=_("Force update"))
 def t_feed_force_update(modeladmin, request, queryset):
     logging.info("Call t_feed_force_update: %s", queryset)
+    priority = admin_priority(queryset)
     with transaction.atomic():
         for instance in queryset:
             instance.modified = None
             instance.status = None
             instance.save()
-            #logging.info("Call revoke_tasks_by_arg in o_feed_force_update")
-            #revoke_tasks_by_arg(instance.sid) #will check in update_translated_feed task
-            update_translated_feed.schedule(
-                args=(instance.sid,True), delay=1
+            schedule_task(
+                update_translated_feed, instance.sid, True, priority=priority
             )  # 会执行一次save()
 
 
@@ -142,8 +148,10 @@ def o_feed_batch_modify(modeladmin, request, queryset):
             "translation_display": "translation_display_value",
             "summary_engine": "summary_engine_value",
             "summary_detail": "summary_detail_value",
+            "summary_mode": "summary_mode_value",
             "additional_prompt": "additional_prompt_value",
             "fetch_article": "fetch_article",
+            "pivot": "pivot",
             "quality": "quality",
             "category": "category_value",
         }
@@ -152,8 +160,10 @@ def o_feed_batch_modify(modeladmin, request, queryset):
             "max_posts": int,
             "translation_display": int,
             "summary_detail": float,
+            "summary_mode": int,
             "additional_prompt": str,
             "fetch_article": literal_eval,
+            "pivot": literal_eval,
             "quality": literal_eval,
         }
         update_fields = {}
@@ -175,11 +185,23 @@ def o_feed_batch_modify(modeladmin, request, queryset):
                             content_type_summary_id
                         )
                         update_fields["object_id_summary"] = object_id_summary
+                    case "pivot" if text_handler.opencc is None:
+                        pass  # hidden, the converter is not installed
                     case "category":
                         tag_model = O_Feed.category.tag_model
                         category_o, _ = tag_model.objects.get_or_create(name=value)
                         update_fields["category"] = category_o
 
+                    case "update_frequency":
+                        update_fields[field] = int(value)
+                        update_fields["poll_interval"] = None  # learn again
+                        # widen the bounds instead of clamping the new value
+                        update_fields["min_update_frequency"] = Least(
+                            F("min_update_frequency"), Value(int(value))
+                        )
+                        update_fields["max_update_frequency"] = Greatest(
+                            F("max_update_frequency"), Value(int(value))
+                        )
                     case _:
                         update_fields[field] = field_types.get(field, str)(value)
 
@@ -212,6 +234,7 @@ def o_feed_batch_modify(modeladmin, request, queryset):
             "items": queryset,
             "translator_choices": translator_choices,
             "summary_engine_choices": summary_engine_choices,
+            "pivot_available": text_handler.opencc is not None,
         },
     )
 
@@ -18,7 +18,13 @@ from .actions import (
     o_feed_batch_modify,
     t_feed_batch_modify,
 )
-from .tasks import update_original_feed, update_translated_feed
+from .tasks import (
+    PRIORITY_ADMIN,
+    next_poll_time,
+    schedule_task,
+    update_original_feed,
+    update_translated_feed,
+)
 from utils.modelAdmin_utils import valid_icon
 from .views import import_opml
 
@@ -34,7 +40,9 @@ class O_FeedAdmin(admin.ModelAdmin):
         "translator",
         "size_in_kb",
         "update_frequency",
+        "poll_interval",
         "last_pull",
+        "next_poll_at",
         "category",
     ]
     search_fields = ["name", "feed_url", "category__name"]
@@ -63,8 +71,12 @@ class O_FeedAdmin(admin.ModelAdmin):
             if instance.o_feed.pk:  # 不保存o_feed为空的T_Feed实例
                 instance.status = None
                 instance.save()
-                #revoke_tasks_by_arg(instance.sid)
-                update_translated_feed.schedule(args=(instance.sid,True), delay=1)
+                schedule_task(
+                    update_translated_feed,
+                    instance.sid,
+                    True,
+                    priority=PRIORITY_ADMIN,
+                )
 
         for instance in formset.deleted_objects:
             #revoke_tasks_by_arg(instance.sid)
@@ -75,22 +87,23 @@ class O_FeedAdmin(admin.ModelAdmin):
         logging.info("Call O_Feed save_model: %s", obj)
         feed_url_changed = "feed_url" in form.changed_data
         # feed_name_changed = 'name' in form.changed_data
-        frequency_changed = "update_frequency" in form.changed_data
+        frequency_changed = bool(
+            {"update_frequency", "min_update_frequency", "max_update_frequency"}
+            & set(form.changed_data)
+        )
         translation_display_changed = "translation_display" in form.changed_data
         # translator_changed = 'content_type' in form.changed_data or 'object_id' in form.changed_data
         if feed_url_changed or translation_display_changed:
             obj.valid = None
             obj.name = obj.name or "Loading"
             obj.save()
-            update_original_feed.schedule(
-                args=(obj.sid,True), delay=1
+            schedule_task(
+                update_original_feed, obj.sid, True, priority=PRIORITY_ADMIN
             )  # 会执行一次save() # 不放在model的save里是为了排除translator的更新，省流量
         elif frequency_changed:
+            obj.poll_interval = None  # start learning again from the new settings
+            obj.next_poll_at = next_poll_time(obj)
             obj.save()
-            #revoke_tasks_by_arg(obj.sid)
-            update_original_feed.schedule(
-                args=(obj.sid,), delay=obj.update_frequency * 60
-            )
         else:
             obj.name = obj.name or "Empty"
             obj.save()
@@ -147,7 +160,9 @@ class T_FeedAdmin(admin.ModelAdmin):
         "translate_content",
         "summary",
         "total_tokens",
+        "total_cached_tokens",
         "total_characters",
+        "total_skipped_characters",
         "size_in_kb",
         "modified",
     ]
@@ -159,7 +174,9 @@ class T_FeedAdmin(admin.ModelAdmin):
         "sid",
         "o_feed",
         "total_tokens",
+        "total_cached_tokens",
         "total_characters",
+        "total_skipped_characters",
         "size",
         "modified",
     ]
@@ -2,6 +2,7 @@ from django import forms
 from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
+from utils import text_handler
 from utils.modelAdmin_utils import get_translator_and_summary_choices
 
 from .models import O_Feed, T_Feed
@@ -15,6 +16,14 @@ class O_FeedForm(forms.ModelForm):
         help_text=_("Select a valid translator"),
         label=_("Translator"),
     )
+    fallback_engines = forms.MultipleChoiceField(
+        choices=(),
+        required=False,
+        help_text=_(
+            "Used in order when the translator is unavailable, e.g. during a provider outage"
+        ),
+        label=_("Fallback Translators"),
+    )
     summary_engine = forms.ChoiceField(
         choices=(),
         required=False,
@@ -27,6 +36,7 @@ class O_FeedForm(forms.ModelForm):
         self.fields["translator"].choices, self.fields["summary_engine"].choices = (
             get_translator_and_summary_choices()
         )
+        self.fields["fallback_engines"].choices = self.fields["translator"].choices
 
         # 如果已经有关联的对象，设置默认值
         instance = getattr(self, "instance", None)
@@ -50,19 +60,32 @@ class O_FeedForm(forms.ModelForm):
         fields = [
             "feed_url",
             "update_frequency",
+            "min_update_frequency",
+            "max_update_frequency",
             "max_posts",
             "translator",
+            "fallback_engines",
             "translation_display",
             "summary_engine",
             "summary_detail",
+            "summary_mode",
             "additional_prompt",
             "fetch_article",
+            "pivot",
             # NOTE: 暂时不使用质量选项
             # "quality",
             "name",
             "category",
         ]
 
+    def clean_pivot(self):
+        pivot = self.cleaned_data["pivot"]
+        if pivot and text_handler.opencc is None:
+            raise forms.ValidationError(
+                _("Pivot translation requires the opencc extra to be installed")
+            )
+        return pivot
+
     def _process_translator(self, instance):
         if self.cleaned_data["translator"]:
             content_type_id, object_id = map(
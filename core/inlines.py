@@ -20,7 +20,9 @@ class T_FeedInline(admin.TabularInline):
         "translate_content",
         "summary",
         "total_tokens",
+        "total_cached_tokens",
         "total_characters",
+        "total_skipped_characters",
         "size_in_kb",
         "sid",
     ]
@@ -29,7 +31,9 @@ class T_FeedInline(admin.TabularInline):
         "obj_status",
         "size_in_kb",
         "total_tokens",
+        "total_cached_tokens",
         "total_characters",
+        "total_skipped_characters",
     )
     extra = 1
 
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 
+from utils import metrics
+
 
 class Command(BaseCommand):
     help = "Initialize the server by running collectstatic, makemigrations, migrate and create_default_superuser commands."
@@ -11,3 +13,4 @@ class Command(BaseCommand):
         call_command("migrate")
         call_command("create_default_superuser")
         call_command("compilemessages", verbosity=0)
+        metrics.reset()
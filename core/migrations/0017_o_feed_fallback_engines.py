@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_alter_t_feed_translate_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='o_feed',
+            name='fallback_engines',
+            field=models.JSONField(blank=True, default=list, help_text='Used in order when the translator is unavailable, e.g. during a provider outage', verbose_name='Fallback Translators'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_o_feed_fallback_engines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='t_feed',
+            name='total_cached_tokens',
+            field=models.IntegerField(default=0, help_text="Prompt tokens served from the provider's prompt cache", verbose_name='Cached Tokens'),
+        ),
+    ]
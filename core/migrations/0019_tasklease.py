@@ -0,0 +1,21 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_t_feed_total_cached_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskLease',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
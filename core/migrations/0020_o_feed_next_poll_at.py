@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_tasklease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='o_feed',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, editable=False, help_text='When the scheduler pulls the feed next time', null=True, verbose_name='Next Poll(UTC)'),
+        ),
+    ]
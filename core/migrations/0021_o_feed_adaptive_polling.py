@@ -0,0 +1,38 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_o_feed_next_poll_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='o_feed',
+            name='digest',
+            field=models.CharField(default='', editable=False, max_length=39),
+        ),
+        migrations.AddField(
+            model_name='o_feed',
+            name='max_update_frequency',
+            field=models.IntegerField(default=1440, help_text='Minutes, the feed is polled at least this often', verbose_name='Max Update Frequency'),
+        ),
+        migrations.AddField(
+            model_name='o_feed',
+            name='min_update_frequency',
+            field=models.IntegerField(default=5, help_text='Minutes, the feed is never polled more often than this', verbose_name='Min Update Frequency'),
+        ),
+        migrations.AddField(
+            model_name='o_feed',
+            name='poll_interval',
+            field=models.IntegerField(blank=True, editable=False, help_text="Minutes, learned from the feed's publish cadence", null=True, verbose_name='Poll Interval'),
+        ),
+        migrations.AlterField(
+            model_name='o_feed',
+            name='update_frequency',
+            field=models.IntegerField(default=30, help_text='Minutes, used until the publish cadence of the feed is learned', verbose_name='Update Frequency'),
+        ),
+    ]
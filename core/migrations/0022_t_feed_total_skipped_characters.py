@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_o_feed_adaptive_polling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='t_feed',
+            name='total_skipped_characters',
+            field=models.IntegerField(default=0, help_text='Characters already in the target language, not translated', verbose_name='Skipped Characters'),
+        ),
+    ]
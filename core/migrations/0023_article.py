@@ -0,0 +1,24 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_t_feed_total_skipped_characters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Article',
+            fields=[
+                ('hash', models.CharField(editable=False, max_length=20, primary_key=True, serialize=False)),
+                ('url', models.URLField(max_length=2048)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=255)),
+                ('text', models.TextField(blank=True, default='')),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_article'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='o_feed',
+            name='summary_mode',
+            field=models.IntegerField(choices=[(0, 'Sequential'), (1, 'Parallel (map-reduce)')], default=0, help_text='Sequential: each part is summarized with the summaries of the previous parts. Parallel: the parts are summarized at the same time, then their summaries are combined, faster and cheaper for long articles', verbose_name='Summary Mode'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_o_feed_summary_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='o_feed',
+            name='pivot',
+            field=models.BooleanField(default=False, help_text='Derive Chinese Traditional from the Chinese Simplified translation with a local converter instead of translating again. Requires opencc.', verbose_name='Pivot Translation'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-19 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_o_feed_pivot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='t_feed',
+            name='total_cached_tokens',
+            field=models.IntegerField(default=0, help_text="Prompt tokens served from the provider's prompt cache. Providers only cache prompts of at least 1024 tokens (2048 for Claude Haiku), this stays at 0 unless the system prompt is that long, e.g. with a glossary.", verbose_name='Cached Tokens'),
+        ),
+    ]
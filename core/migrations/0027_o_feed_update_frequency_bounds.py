@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def bounds_from_update_frequency(apps, schema_editor):
+    # 0021 added the bounds with fixed defaults, which clamped feeds polled
+    # less often than daily (or more often than every 5 minutes)
+    O_Feed = apps.get_model("core", "O_Feed")
+    O_Feed.objects.filter(update_frequency__gt=F("max_update_frequency")).update(
+        max_update_frequency=F("update_frequency"), poll_interval=None
+    )
+    O_Feed.objects.filter(
+        update_frequency__lt=F("min_update_frequency"), update_frequency__gt=0
+    ).update(min_update_frequency=F("update_frequency"), poll_interval=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_t_feed_cached_tokens_help"),
+    ]
+
+    operations = [
+        migrations.RunPython(bounds_from_update_frequency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_o_feed_update_frequency_bounds"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="article",
+            name="etag",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AlterField(
+            model_name="article",
+            name="last_modified",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -1,11 +1,16 @@
 import os
 import uuid
 import re
+from datetime import timedelta
+from typing import Optional
 
+import cityhash
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from tagulous.models import SingleTagField
@@ -38,6 +43,15 @@ class O_Feed(models.Model):
         editable=False,
         help_text=_("Last time the feed was pulled"),
     )
+    next_poll_at = models.DateTimeField(
+        _("Next Poll(UTC)"),
+        default=None,
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text=_("When the scheduler pulls the feed next time"),
+    )
     TRANSLATION_DISPLAY_CHOICES = [
         (0, _("Only Translation")),
         (1, _("Translation | Original")),
@@ -65,7 +79,29 @@ class O_Feed(models.Model):
     update_frequency = models.IntegerField(
         _("Update Frequency"),
         default=os.getenv("default_update_frequency", 30),
-        help_text=_("Minutes"),
+        help_text=_("Minutes, used until the publish cadence of the feed is learned"),
+    )
+    min_update_frequency = models.IntegerField(
+        _("Min Update Frequency"),
+        default=os.getenv("default_min_update_frequency", 5),
+        help_text=_("Minutes, the feed is never polled more often than this"),
+    )
+    max_update_frequency = models.IntegerField(
+        _("Max Update Frequency"),
+        default=os.getenv("default_max_update_frequency", 1440),
+        help_text=_("Minutes, the feed is polled at least this often"),
+    )
+    poll_interval = models.IntegerField(
+        _("Poll Interval"),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("Minutes, learned from the feed's publish cadence"),
+    )
+    digest = models.CharField(
+        max_length=39,
+        default="",
+        editable=False,
     )
     max_posts = models.IntegerField(
         _("Max Posts"),
@@ -84,6 +120,13 @@ class O_Feed(models.Model):
         default=False,
         help_text=_("Fetch original article from the website."),
     )
+    pivot = models.BooleanField(
+        _("Pivot Translation"),
+        default=False,
+        help_text=_(
+            "Derive Chinese Traditional from the Chinese Simplified translation with a local converter instead of translating again. Requires opencc."
+        ),
+    )
 
     content_type = models.ForeignKey(
         ContentType, on_delete=models.SET_NULL, null=True, related_name="translator"
@@ -91,6 +134,15 @@ class O_Feed(models.Model):
     object_id = models.PositiveIntegerField(null=True)
     translator = GenericForeignKey("content_type", "object_id")
 
+    fallback_engines = models.JSONField(
+        _("Fallback Translators"),
+        default=list,
+        blank=True,
+        help_text=_(
+            "Used in order when the translator is unavailable, e.g. during a provider outage"
+        ),
+    )  # ["content_type_id:object_id", ...]
+
     content_type_summary = models.ForeignKey(
         ContentType, on_delete=models.SET_NULL, null=True, related_name="summary_engine"
     )
@@ -108,6 +160,22 @@ class O_Feed(models.Model):
         ),
     )
 
+    SUMMARY_SEQUENTIAL = 0
+    SUMMARY_MAP_REDUCE = 1
+    SUMMARY_MODE_CHOICES = [
+        (SUMMARY_SEQUENTIAL, _("Sequential")),
+        (SUMMARY_MAP_REDUCE, _("Parallel (map-reduce)")),
+    ]
+    summary_mode = models.IntegerField(
+        _("Summary Mode"),
+        default=SUMMARY_SEQUENTIAL,
+        choices=SUMMARY_MODE_CHOICES,
+        help_text=_(
+            "Sequential: each part is summarized with the summaries of the previous parts. "
+            "Parallel: the parts are summarized at the same time, then their summaries are combined, faster and cheaper for long articles"
+        ),
+    )
+
     additional_prompt = models.TextField(
         _("Addtional Prompt"),
         default=None,
@@ -133,6 +201,60 @@ class O_Feed(models.Model):
             ).hex
         super(O_Feed, self).save(*args, **kwargs)
 
+    def clean(self):
+        super().clean()
+        bounds = (
+            self.min_update_frequency,
+            self.update_frequency,
+            self.max_update_frequency,
+        )
+        if None in bounds:  # already reported by the field validation
+            return
+        errors = {}
+        if self.min_update_frequency < 1:
+            errors["min_update_frequency"] = _("Must be at least 1 minute")
+        elif self.min_update_frequency > self.max_update_frequency:
+            errors["max_update_frequency"] = _(
+                "Must not be lower than the Min Update Frequency"
+            )
+        elif not (
+            self.min_update_frequency
+            <= self.update_frequency
+            <= self.max_update_frequency
+        ):
+            errors["update_frequency"] = _(
+                "Must be between the Min and the Max Update Frequency"
+            )
+        if errors:
+            raise ValidationError(errors)
+
+    @property
+    def current_update_frequency(self) -> int:
+        """
+        Minutes between two polls, learned from the feed or set in the admin.
+        A learned interval is kept within the bounds, they may have changed since.
+        """
+        if not self.poll_interval:
+            return self.update_frequency
+        return min(
+            max(self.poll_interval, self.min_update_frequency),
+            self.max_update_frequency,
+        )
+
+    def get_fallback_engines(self) -> list:
+        engines = []
+        for key in self.fallback_engines or []:
+            try:
+                content_type_id, object_id = map(int, key.split(":"))
+                engine = ContentType.objects.get_for_id(
+                    content_type_id
+                ).get_object_for_this_type(pk=object_id)
+            except (ValueError, ObjectDoesNotExist):
+                continue  # the engine has been deleted
+            if engine != self.translator:
+                engines.append(engine)
+        return engines
+
     def get_translation_display(self):
         return dict(self.TRANSLATION_DISPLAY_CHOICES)[self.translation_display]
 
@@ -163,7 +285,21 @@ class T_Feed(models.Model):
     summary = models.BooleanField(_("Summary"), default=False)
 
     total_tokens = models.IntegerField(_("Tokens Cost"), default=0)
+    total_cached_tokens = models.IntegerField(
+        _("Cached Tokens"),
+        default=0,
+        help_text=_(
+            "Prompt tokens served from the provider's prompt cache. Providers only "
+            "cache prompts of at least 1024 tokens (2048 for Claude Haiku), this "
+            "stays at 0 unless the system prompt is that long, e.g. with a glossary."
+        ),
+    )
     total_characters = models.IntegerField(_("Characters Cost"), default=0)
+    total_skipped_characters = models.IntegerField(
+        _("Skipped Characters"),
+        default=0,
+        help_text=_("Characters already in the target language, not translated"),
+    )
 
     modified = models.DateTimeField(
         _("Last Modified"),
@@ -200,3 +336,67 @@ class T_Feed(models.Model):
         # else:
         #     self.sid = self.sid
         super(T_Feed, self).save(*args, **kwargs)
+
+
+class TaskLease(models.Model):
+    """
+    Lock shared by every worker process, so a feed is never updated twice in parallel.
+    A lease expires after its TTL unless the holder renews it, so a crashed
+    task does not keep the feed locked.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    owner = models.CharField(max_length=32)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def acquire(cls, key: str, ttl: int) -> Optional["TaskLease"]:
+        """Return the lease, or None when another worker holds it."""
+        now = timezone.now()
+        cls.objects.filter(key=key, expires_at__lt=now).delete()
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    key=key,
+                    owner=uuid.uuid4().hex,
+                    expires_at=now + timedelta(seconds=ttl),
+                )
+        except IntegrityError:
+            return None
+
+    def renew(self, ttl: int) -> bool:
+        """Extend the lease, False when it expired and was taken over."""
+        return (
+            TaskLease.objects.filter(key=self.key, owner=self.owner).update(
+                expires_at=timezone.now() + timedelta(seconds=ttl)
+            )
+            == 1
+        )
+
+    def release(self):
+        TaskLease.objects.filter(key=self.key, owner=self.owner).delete()
+
+
+class Article(models.Model):
+    """
+    Full text of an entry's original article, for feeds with fetch_article.
+    Kept with the response validators so a stale copy is revalidated with a
+    conditional request instead of being downloaded and extracted again.
+    """
+
+    hash = models.CharField(max_length=20, primary_key=True, editable=False)
+    url = models.URLField(max_length=2048)
+    etag = models.TextField(blank=True, default="")
+    last_modified = models.TextField(blank=True, default="")
+    text = models.TextField(blank=True, default="")
+    fetched_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.url
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return str(cityhash.CityHash64(url))
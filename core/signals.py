@@ -2,27 +2,43 @@ import logging
 import os
 
 from django.conf import settings
+from django.db.backends.signals import connection_created
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
+from utils.sqlite import apply_pragmas
+
 from .models import O_Feed, T_Feed
 # from taggit.models import TaggedItem
 
 
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor)
+
+
 @receiver(post_delete, sender=O_Feed)
 def delete_o_feed_xml(sender, instance, **kwargs):
     logging.info("Call delete_xml: %s", instance.sid)
-    feed_file_path = f"{settings.DATA_FOLDER}/feeds/{instance.sid}.xml"
+    feed_file_path = f"{settings.FEEDS_FOLDER}/{instance.sid}.xml"
     if os.path.exists(feed_file_path):
         os.remove(feed_file_path)
+    prepared_file_path = f"{settings.FEEDS_FOLDER}/{instance.sid}.prepared.json"
+    if os.path.exists(prepared_file_path):
+        os.remove(prepared_file_path)
 
 
 @receiver(post_delete, sender=T_Feed)
 def delete_t_feed_xml(sender, instance, **kwargs):
     logging.info("Call delete_xml: %s", instance.sid)
-    feed_file_path = f"{settings.DATA_FOLDER}/feeds/{instance.sid}.xml"
+    feed_file_path = f"{settings.FEEDS_FOLDER}/{instance.sid}.xml"
     if os.path.exists(feed_file_path):
         os.remove(feed_file_path)
+    translations_file_path = f"{settings.FEEDS_FOLDER}/{instance.sid}.translations.json"
+    if os.path.exists(translations_file_path):
+        os.remove(translations_file_path)
 
 
 # For django-taggit
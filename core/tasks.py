@@ -1,97 +1,299 @@
 import json
 import logging
 import os
-import re
-from datetime import datetime, timezone
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from time import mktime
+from time import mktime, monotonic
 from typing import Optional
+from urllib.parse import urlparse
 
-import cityhash
 import feedparser
 import mistune
-import newspaper
 from django.conf import settings
-from django.db import IntegrityError
+from django.db import connection
 from feed2json import feed2json
+from huey import crontab
 from huey.contrib.djhuey import HUEY as huey
-from huey.contrib.djhuey import db_task, on_shutdown, on_startup
+from huey.contrib.djhuey import db_periodic_task, db_task
 
+from translator.exceptions import ConfigurationError
 from translator.models import Translated_Content, TranslatorEngine
+from translator.retry import call_with_failover, call_with_retry
 from utils import text_handler
-from utils.feed_action import fetch_feed, generate_atom_feed
-
-from .models import O_Feed, T_Feed
+from utils import metrics, sqlite
+from utils.executors import map_io, run_cpu
+from utils.feed_action import (
+    download_article,
+    extract_article,
+    feed_digest,
+    fetch_feed,
+    generate_atom_feed,
+    next_poll_interval,
+    parse_feed,
+    publish_cadence,
+    publisher_interval,
+    write_file_atomic,
+)
+
+from .models import Article, O_Feed, T_Feed, TaskLease
 
 # from huey_monitor.models import TaskModel
-unique_tasks = set()
+LEASE_TTL = 300  # seconds, the lease of a crashed task expires after this
+HEARTBEAT_INTERVAL = LEASE_TTL / 3
+DISPATCH_BATCH_SIZE = 100  # max feeds enqueued per dispatcher run
+DISPATCH_SPREAD = 60  # seconds, due feeds are spread over one dispatcher period
+POLL_JITTER = 0.1  # +-10% of the poll interval, keeps feeds from re-aligning
+# the fields O_Feed.current_update_frequency reads
+POLL_FIELDS = (
+    "update_frequency",
+    "poll_interval",
+    "min_update_frequency",
+    "max_update_frequency",
+)
+# Higher priorities are dequeued first: interactive admin work, then the cheap
+# feed fetches, then the expensive translations.
+PRIORITY_ADMIN = 100
+PRIORITY_FETCH = 50
+PRIORITY_TRANSLATE = 10
+ADMIN_BATCH_SIZE = 10  # bigger admin batches are queued as routine work
+TRANSLATE_RETRY_DELAY = 30  # seconds, when every translation slot is busy
+MAX_REDUCE_PASSES = 3  # map-reduce summaries, combining partial summaries
+ARTICLE_REVALIDATE = timedelta(days=1)  # younger cached articles are used as is
+ARTICLE_RETENTION = timedelta(days=30)
+# a queued task that hasn't started this long after its ETA was lost (dead
+# worker, revoked, queue flushed), its registry entry no longer blocks a new one
+SCHEDULE_GRACE = 3600  # seconds
+
+# translations may not take every worker, fetches and admin work need some
+translate_slots = threading.BoundedSemaphore(settings.HUEY_TRANSLATE_WORKERS)
+# one slow or rate limiting site must not take every article download
+_domain_slots: dict[str, threading.BoundedSemaphore] = {}
+_domain_slots_lock = threading.Lock()
+
+
+@contextmanager
+def task_lease(task_name: str, sid: str):
+    """
+    Hold the lease of (task_name, sid) while the block runs, shared by all workers.
+    Yields False when another worker holds it. A heartbeat renews the lease
+    until the block exits.
+    """
+    lease = TaskLease.acquire(f"{task_name}:{sid}", LEASE_TTL)
+    if lease is None:
+        yield False
+        return
+
+    stop = threading.Event()
+
+    def heartbeat():
+        try:
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                if not lease.renew(LEASE_TTL):
+                    logging.warning("Task lease lost: %s", lease.key)
+                    break
+        finally:
+            connection.close()
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        yield True
+    finally:
+        stop.set()
+        lease.release()
+
+
+def _schedule_key(task_name: str, sid: str) -> str:
+    return f"scheduled:{task_name}:{sid}"
+
+
+def _scheduled_id(task_name: str, sid: str, pop: bool = False) -> Optional[str]:
+    """Id of the queued task for (task_name, sid), None when absent or stale."""
+    entry = huey.get(_schedule_key(task_name, sid), peek=not pop)
+    if not isinstance(entry, tuple):  # absent, or written without an expiry
+        return None
+    task_id, expires_at = entry
+    if expires_at < datetime.now(timezone.utc).timestamp():
+        logging.warning("Queued task lost: %s %s", task_name, sid)
+        return None
+    return task_id
+
+
+def is_scheduled(task, sid: str) -> bool:
+    return _scheduled_id(task.func.__name__, sid) is not None
+
+
+def revoke_scheduled(task, sid: str):
+    """Revoke the queued copy of `task` for `sid`, if any."""
+    task_id = _scheduled_id(task.func.__name__, sid, pop=True)
+    if task_id:
+        logging.info("Revoke task: %s %s", task.func.__name__, sid)
+        huey.revoke_by_id(task_id)
+
+
+def schedule_task(
+    task, sid: str, *args, delay: float = 1, priority: Optional[int] = None
+):
+    """
+    Queue `task` for `sid`, replacing the copy that is already queued.
+
+    The id of the queued task is kept in the huey key-value storage under
+    (task name, sid), so neither the dedup nor the revocation scans the queue.
+    The entry expires SCHEDULE_GRACE after the ETA, in case the task is lost.
+    """
+    revoke_scheduled(task, sid)
+    task_id = uuid.uuid4().hex
+    expires_at = datetime.now(timezone.utc).timestamp() + delay + SCHEDULE_GRACE
+    huey.put(_schedule_key(task.func.__name__, sid), (task_id, expires_at))
+    task.schedule(args=(sid, *args), delay=delay, id=task_id, priority=priority)
+
+
+def _unregister(task_name: str, sid: str, task):
+    """Drop the registry entry of the task that is starting to run."""
+    if task and _scheduled_id(task_name, sid) == task.id:
+        huey.get(_schedule_key(task_name, sid))
+
+
+def next_poll_time(o_feed: O_Feed, now: datetime = None) -> datetime:
+    interval = o_feed.current_update_frequency * 60
+    now = now or datetime.now(timezone.utc)
+    return now + timedelta(
+        seconds=interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+    )
 
 
-def revoke_tasks_by_arg(arg_to_match):
-    for task in huey.scheduled() + huey.pending():
-        # Assuming the first argument is the one we're interested in (e.g., obj.pk)
-        if task.args and task.args[0] == arg_to_match:
-            logging.info("Revoke task: %s", task)
-            huey.revoke_by_id(task)
+def admin_priority(queryset) -> Optional[int]:
+    """Admin actions on a few feeds jump the queue, bulk actions don't."""
+    return PRIORITY_ADMIN if queryset.count() <= ADMIN_BATCH_SIZE else None
 
 
-# @periodic_task(crontab( minute='*/1'))
-@on_startup()
-def schedule_update():
-    feeds = O_Feed.objects.all()
-    tasks = huey.scheduled() + huey.pending()
-    task_feeds = {task.args[0] for task in tasks if task.args}
+@db_periodic_task(crontab(minute="*/1"), priority=PRIORITY_ADMIN)
+def dispatch_due_feeds():
+    """
+    Enqueue the feeds whose next_poll_at is due, at most DISPATCH_BATCH_SIZE per run.
+
+    Feeds never polled by the scheduler (new, or after an upgrade) get a random
+    first poll time within their interval instead of all being due at once.
+    The state lives in O_Feed.next_poll_at, so it survives restarts.
+    """
+    now = datetime.now(timezone.utc)
+    for o_feed in O_Feed.objects.filter(next_poll_at__isnull=True).only(
+        "pk", *POLL_FIELDS
+    ):
+        first_poll = now + timedelta(
+            seconds=random.uniform(0, o_feed.current_update_frequency * 60)
+        )
+        O_Feed.objects.filter(pk=o_feed.pk, next_poll_at__isnull=True).update(
+            next_poll_at=first_poll
+        )
 
-    for feed in feeds:
-        if feed.sid not in task_feeds:
-            update_original_feed.schedule(
-                args=(feed.sid,), delay=feed.update_frequency * 60
+    due_feeds = (
+        O_Feed.objects.filter(next_poll_at__lte=now)
+        .order_by("next_poll_at")
+        .only("pk", "sid", "next_poll_at", *POLL_FIELDS)[:DISPATCH_BATCH_SIZE]
+    )
+    for o_feed in due_feeds:
+        # claim the feed, another consumer running the dispatcher skips it
+        claimed = O_Feed.objects.filter(
+            pk=o_feed.pk, next_poll_at=o_feed.next_poll_at
+        ).update(next_poll_at=next_poll_time(o_feed, now))
+        if claimed and not is_scheduled(update_original_feed, o_feed.sid):
+            schedule_task(
+                update_original_feed,
+                o_feed.sid,
+                delay=random.uniform(0, DISPATCH_SPREAD),
             )
 
 
-@on_shutdown()
-def cleanup_tasks():
-    huey.storage.flush_all()
+@db_periodic_task(crontab(minute="30", hour="*/6"))
+def sqlite_maintenance():
+    """Keep the WAL files of both SQLite databases small and statistics fresh."""
+    if connection.vendor == "sqlite":
+        sqlite.maintain(connection)
+    if isinstance(huey.storage, sqlite.SqliteStorage):
+        sqlite.maintain(huey.storage.conn)
 
 
-@db_task(retries=3)
-def update_original_feed(sid: str, force: bool = False):
-    if sid in unique_tasks:  # 如果判断force的话，是没法停止正在执行的task
-        logging.warning("(skip)This task update_original_feed is executing: %s", sid)
-        return
-    else:
-        unique_tasks.add(sid)
+@db_periodic_task(crontab(minute="0", hour="4"))
+def purge_articles():
+    """Forget original articles not fetched or revalidated for ARTICLE_RETENTION."""
+    Article.objects.filter(
+        fetched_at__lt=datetime.now(timezone.utc) - ARTICLE_RETENTION
+    ).delete()
+
+
+@db_task(retries=3, context=True, priority=PRIORITY_FETCH)
+def update_original_feed(sid: str, force: bool = False, task=None):
+    _unregister("update_original_feed", sid, task)
+    with task_lease("update_original_feed", sid) as acquired:
+        if not acquired:  # 如果判断force的话，是没法停止正在执行的task
+            logging.warning(
+                "(skip)This task update_original_feed is executing: %s", sid
+            )
+            return
+        # translations requested from the admin stay interactive
+        priority = PRIORITY_ADMIN if task and task.priority == PRIORITY_ADMIN else None
+        with metrics.observe_task("update_original_feed") as observation:
+            valid = _update_original_feed(sid, force, priority)
+            observation.failed = not valid
+            return valid
+
 
+def _update_original_feed(sid: str, force: bool = False, priority: int = None):
     try:
         # obj = O_Feed.objects.get(sid=sid)
         obj = O_Feed.objects.prefetch_related("t_feed_set").get(sid=sid)
     except O_Feed.DoesNotExist:
         return False
 
-    revoke_tasks_by_arg(sid)
     logging.info("Call task update_original_feed: %s", obj.feed_url)
+    metrics.set_labels(feed=obj.feed_url)
 
-    feed_dir_path = Path(settings.DATA_FOLDER) / "feeds"
+    feed_dir_path = Path(settings.FEEDS_FOLDER)
 
     if not os.path.exists(feed_dir_path):
         os.makedirs(feed_dir_path)
 
     original_feed_file_path = feed_dir_path / f"{obj.sid}.xml"
+    modified = False
     try:
         obj.valid = False
+        started = monotonic()
         fetch_feed_results = fetch_feed(url=obj.feed_url, etag=obj.etag)
         error = fetch_feed_results["error"]
         update = fetch_feed_results.get("update")
+        metrics.observe_fetch(monotonic() - started, error, update)
         xml = fetch_feed_results.get("xml")
         feed = fetch_feed_results.get("feed")
+        max_age = fetch_feed_results.get("max_age")
 
         if error:
             raise Exception(f"Fetch Original Feed Failed: {error}")
         elif not update:
             logging.info("Original Feed is up to date, Skip:%s", obj.feed_url)
+            obj.poll_interval = next_poll_interval(
+                obj.current_update_frequency,
+                changed=False,
+                hint=publisher_interval(max_age=max_age),
+                lower=obj.min_update_frequency,
+                upper=obj.max_update_frequency,
+            )
         else:
-            with open(original_feed_file_path, "w", encoding="utf-8") as f:
-                f.write(xml)
+            digest = feed_digest(feed)
+            obj.poll_interval = next_poll_interval(
+                obj.current_update_frequency,
+                changed=digest != obj.digest,
+                cadence=publish_cadence(feed),
+                hint=publisher_interval(feed, max_age),
+                lower=obj.min_update_frequency,
+                upper=obj.max_update_frequency,
+            )
+            obj.digest = digest
+            write_file_atomic(original_feed_file_path, xml)
+            modified = True
             if obj.name in ["Loading", "Empty", None]:
                 obj.name = feed.feed.get("title") or feed.feed.get("subtitle")
             obj.size = os.path.getsize(original_feed_file_path)
@@ -105,14 +307,12 @@ def update_original_feed(sid: str, force: bool = False):
             obj.etag = feed.get("etag", "")
 
         obj.valid = True
-        # update_original_feed.schedule(args=(obj.sid,), delay=obj.update_frequency * 60)
     except Exception as e:
         logging.exception("task update_original_feed %s: %s", obj.feed_url, str(e))
     finally:
         obj.last_pull = datetime.now(timezone.utc)
-        update_original_feed.schedule(args=(obj.sid,), delay=obj.update_frequency * 60)
+        obj.next_poll_at = next_poll_time(obj, obj.last_pull)
         obj.save()
-        unique_tasks.remove(sid)
 
     # Update T_Feeds
     t_feeds = obj.t_feed_set.all()
@@ -120,17 +320,73 @@ def update_original_feed(sid: str, force: bool = False):
         for t_feed in t_feeds:
             t_feed.status = None
             t_feed.save()
-            update_translated_feed.schedule(args=(t_feed.sid,), delay=1)
+        if modified:
+            # prepared once for all the translations, outside the fetch priority
+            schedule_task(prepare_original_feed, obj.sid, priority=priority)
+        else:
+            schedule_translations(obj, priority)
+    return obj.valid
+
+
+def schedule_translations(o_feed: O_Feed, priority: int = None):
+    for t_feed in o_feed.t_feed_set.all():
+        if pivot_source(t_feed):
+            continue  # scheduled once the feed it is derived from is done
+        schedule_task(update_translated_feed, t_feed.sid, priority=priority)
 
 
-@db_task(retries=3)
-def update_translated_feed(sid: str, force: bool = False):
-    if sid in unique_tasks:  # 如果判断force的话，是没法停止正在执行的task
-        logging.warning("(skip)The task update_translated_feed is executing: %s", sid)
+@db_task(context=True, priority=PRIORITY_TRANSLATE)
+def prepare_original_feed(sid: str, task=None):
+    """Prepare the refreshed feed for its translations, then schedule them."""
+    _unregister("prepare_original_feed", sid, task)
+    priority = PRIORITY_ADMIN if task and task.priority == PRIORITY_ADMIN else None
+    try:
+        obj = O_Feed.objects.prefetch_related("t_feed_set").get(sid=sid)
+    except O_Feed.DoesNotExist:
+        return
+    with task_lease("prepare_original_feed", sid) as acquired:
+        if not acquired:
+            logging.warning(
+                "(skip)This task prepare_original_feed is executing: %s", sid
+            )
+            return
+        with metrics.observe_task("prepare_original_feed") as observation:
+            metrics.set_labels(feed=obj.feed_url)
+            try:
+                store_prepared_feed(obj)
+            except Exception as e:
+                # every translation prepares the feed itself
+                logging.warning("Prepare feed %s: %s", obj.feed_url, e)
+                observation.failed = True
+        schedule_translations(obj, priority)
+
+
+@db_task(context=True, priority=PRIORITY_TRANSLATE)
+def update_translated_feed(sid: str, force: bool = False, task=None):
+    _unregister("update_translated_feed", sid, task)
+    interactive = task is not None and task.priority == PRIORITY_ADMIN
+    if not interactive and not translate_slots.acquire(blocking=False):
+        logging.info("All translation slots are busy, postpone: %s", sid)
+        schedule_task(update_translated_feed, sid, force, delay=TRANSLATE_RETRY_DELAY)
         return
-    else:
-        unique_tasks.add(sid)
 
+    try:
+        with task_lease("update_translated_feed", sid) as acquired:
+            if not acquired:  # 如果判断force的话，是没法停止正在执行的task
+                logging.warning(
+                    "(skip)The task update_translated_feed is executing: %s", sid
+                )
+                return
+            with metrics.observe_task("update_translated_feed") as observation:
+                status = _update_translated_feed(sid, force)
+                observation.failed = not status
+                return status
+    finally:
+        if not interactive:
+            translate_slots.release()
+
+
+def _update_translated_feed(sid: str, force: bool = False):
     try:
         # obj = T_Feed.objects.get(sid=sid)
         obj = T_Feed.objects.select_related("o_feed").get(sid=sid)
@@ -138,9 +394,10 @@ def update_translated_feed(sid: str, force: bool = False):
         logging.error(f"T_Feed Not Found: {sid}")
         return False
 
+    modified = obj.modified
     try:
-        revoke_tasks_by_arg(sid)
         logging.info("Call task update_translated_feed: %s", obj.o_feed.feed_url)
+        metrics.set_labels(feed=obj.o_feed.feed_url, language=obj.language)
 
         if obj.o_feed.pk is None:
             raise Exception("Unable translate feed, because Original Feed is None")
@@ -154,7 +411,7 @@ def update_translated_feed(sid: str, force: bool = False):
             obj.save()
             return True
 
-        feed_dir_path = f"{settings.DATA_FOLDER}/feeds"
+        feed_dir_path = f"{settings.FEEDS_FOLDER}"
         if not os.path.exists(feed_dir_path):
             os.makedirs(feed_dir_path)
 
@@ -165,7 +422,21 @@ def update_translated_feed(sid: str, force: bool = False):
 
         translated_feed_file_path = f"{feed_dir_path}/{obj.sid}"
 
-        original_feed = feedparser.parse(original_feed_file_path)
+        source = pivot_source(obj)
+        if (
+            source
+            and source.status
+            and source.modified == obj.o_feed.last_pull
+            and derive_translated_feed(source, obj, translated_feed_file_path)
+        ):
+            logging.info("Derived [%s] from [%s]", obj.language, source.language)
+            obj.modified = obj.o_feed.last_pull
+            obj.size = os.path.getsize(f"{translated_feed_file_path}.xml")
+            obj.status = True
+            return True
+
+        prepared = load_prepared_feed(obj.o_feed, obj.translate_content)
+        original_feed = run_cpu(parse_feed, original_feed_file_path)
 
         if original_feed.entries:
             o_feed = obj.o_feed
@@ -174,47 +445,56 @@ def update_translated_feed(sid: str, force: bool = False):
                 feed=original_feed,
                 target_language=obj.language,
                 translate_engine=o_feed.translator,
+                fallback_engines=o_feed.get_fallback_engines(),
                 translate_title=obj.translate_title,
                 translate_content=obj.translate_content,
                 summary=obj.summary,
                 summary_engine=o_feed.summary_engine,
                 summary_detail=o_feed.summary_detail,
+                summary_mode=o_feed.summary_mode,
                 max_posts=o_feed.max_posts,
                 translation_display=o_feed.translation_display,
                 quality=o_feed.quality,
                 fetch_article=o_feed.fetch_article,
+                prepared=prepared["entries"] if prepared else None,
             )
 
             if not results:
                 raise Exception("Translate Feed Failed")
             else:
                 feed = results.get("feed")
+                if derived_feeds(obj):
+                    # the translated parts, converted by derive_translated_feed
+                    write_file_atomic(
+                        translations_path(obj.sid),
+                        json.dumps(results["translations"], ensure_ascii=False),
+                    )
                 total_tokens = results.get("tokens")
+                cached_tokens = results.get("cached_tokens", 0)
                 translated_characters = results.get("characters")
-            xml_str = generate_atom_feed(
-                o_feed.feed_url, feed
+                skipped_characters = results.get("skipped_characters", 0)
+            xml_str = run_cpu(
+                generate_atom_feed, o_feed.feed_url, feed
             )  # feed is a feedparser object
 
             if xml_str is None:
                 raise Exception("generate_atom_feed returned None")
-            with open(f"{translated_feed_file_path}.xml", "w", encoding="utf-8") as f:
-                f.write(xml_str)
+            write_file_atomic(f"{translated_feed_file_path}.xml", xml_str)
 
             json_dict = feed2json(f"{translated_feed_file_path}.xml")
             json_str = json.dumps(json_dict, indent=4, ensure_ascii=False)
             if json_str is None:
                 logging.error("atom2json returned None")
             else:
-                with open(
-                    f"{translated_feed_file_path}.json", "w", encoding="utf-8"
-                ) as f:
-                    f.write(json_str)
+                write_file_atomic(f"{translated_feed_file_path}.json", json_str)
 
             # There can only be one billing method at a time, either token or character count.
             if total_tokens > 0:
                 obj.total_tokens += total_tokens
+                obj.total_cached_tokens += cached_tokens
             else:
                 obj.total_characters += translated_characters
+            obj.total_skipped_characters += skipped_characters
 
             obj.modified = obj.o_feed.last_pull
             obj.size = os.path.getsize(f"{translated_feed_file_path}.xml")
@@ -229,7 +509,130 @@ def update_translated_feed(sid: str, force: bool = False):
         obj.status = False
     finally:
         obj.save()
-        unique_tasks.remove(sid)
+        # derived feeds follow a new version, or translate on their own when
+        # this one failed; nothing to do when it was already up to date
+        if obj.modified != modified or not obj.status:
+            for t_feed in derived_feeds(obj):
+                schedule_task(update_translated_feed, t_feed.sid, force)
+    return obj.status
+
+
+def pivot_source(t_feed: T_Feed) -> Optional[T_Feed]:
+    """The T_Feed that `t_feed` is derived from in pivot mode, if any."""
+    language = text_handler.pivot_language(t_feed.language)
+    if not language or not t_feed.o_feed.pivot:
+        return None
+    return T_Feed.objects.filter(
+        o_feed=t_feed.o_feed,
+        language=language,
+        translate_title=t_feed.translate_title,
+        translate_content=t_feed.translate_content,
+        summary=t_feed.summary,
+    ).first()
+
+
+def derived_feeds(t_feed: T_Feed) -> list:
+    """The T_Feeds derived from `t_feed` in pivot mode."""
+    siblings = T_Feed.objects.filter(o_feed=t_feed.o_feed).exclude(pk=t_feed.pk)
+    return [
+        sibling
+        for sibling in siblings.select_related("o_feed")
+        if pivot_source(sibling) == t_feed
+    ]
+
+
+def translations_path(sid: str) -> str:
+    return f"{settings.FEEDS_FOLDER}/{sid}.translations.json"
+
+
+def derive_translated_feed(
+    source: T_Feed, t_feed: T_Feed, translated_feed_file_path: str
+) -> bool:
+    """
+    Derive `t_feed` from the translations of `source` with a local converter,
+    e.g. Chinese Traditional from Chinese Simplified. Only the translated parts
+    are converted, the original text of bilingual entries is kept as is.
+    Returns False when the translations of `source` are missing.
+    """
+    try:
+        with open(translations_path(source.sid), encoding="utf-8") as f:
+            translations = json.load(f)
+    except FileNotFoundError:
+        return False
+    o_feed = t_feed.o_feed
+    feed = run_cpu(parse_feed, f"{settings.FEEDS_FOLDER}/{o_feed.sid}.xml")
+    pivot_code = text_handler.LANGUAGE_CODES.get(source.language)
+
+    def convert(text: Optional[str]) -> Optional[str]:
+        return text_handler.convert_language(text, t_feed.language) if text else None
+
+    for entry, translation in zip(feed.entries, translations):
+        title, content = translation["title"], translation["content"]
+        entry["title"] = title
+        if content:
+            entry["content"] = [{"value": content}]
+        if translation["skipped"] and translation["language"] == pivot_code:
+            # kept as is in the pivot language, converting it is the translation
+            if title and t_feed.translate_title:
+                translation["translated_title"] = title
+            if content and t_feed.translate_content:
+                translation["translated_content"] = content
+        if "translated_title" in translation:
+            compose_title(
+                entry,
+                convert(translation["translated_title"]),
+                o_feed.translation_display,
+            )
+        if "translated_content" in translation:
+            compose_content(
+                entry,
+                convert(translation["translated_content"]),
+                o_feed.translation_display,
+            )
+        if "summary" in translation:
+            compose_summary(entry, convert(translation["summary"]))
+
+    xml_str = run_cpu(generate_atom_feed, o_feed.feed_url, feed)
+    write_file_atomic(f"{translated_feed_file_path}.xml", xml_str)
+    json_dict = feed2json(f"{translated_feed_file_path}.xml")
+    write_file_atomic(
+        f"{translated_feed_file_path}.json",
+        json.dumps(json_dict, indent=4, ensure_ascii=False),
+    )
+    return True
+
+
+def compose_title(entry, translated_title: Optional[str], translation_display: int):
+    """Show the translated title, the original one when it is missing."""
+    title = entry.get("title")
+    entry["title"] = text_handler.set_translation_display(
+        original=title,
+        translation=translated_title or title,
+        translation_display=translation_display,
+        seprator=" || ",
+    )
+
+
+def compose_content(entry, translated_content: Optional[str], translation_display: int):
+    """Show the translated content, the original one when it is missing."""
+    content = text_handler.entry_content(entry)
+    text = text_handler.set_translation_display(
+        original=content,
+        translation=translated_content or content,
+        translation_display=translation_display,
+        seprator="<br />---------------<br />",
+    )
+    entry["summary"] = text
+    entry["content"] = [{"value": text}]
+
+
+def compose_summary(entry, summary_text: Optional[str]):
+    """Put the summary before the content, the content itself when it is missing."""
+    content = text_handler.entry_content(entry)
+    summary_text = summary_text or content
+    html_summary = f"<br />🤖:{mistune.html(summary_text)}<br />---------------<br />"
+    entry["summary"] = summary_text
+    entry["content"] = [{"value": html_summary + content}]
 
 
 def translate_feed(
@@ -241,46 +644,80 @@ def translate_feed(
     summary: bool,
     summary_detail: float,
     summary_engine: TranslatorEngine,
+    summary_mode: int = O_Feed.SUMMARY_SEQUENTIAL,
     max_posts: int = 20,
     translation_display: int = 0,
     quality: bool = False,
     fetch_article: bool = False,
+    fallback_engines: Optional[list] = None,
+    prepared: Optional[list] = None,
 ) -> dict:
+    """
+    Translate the entries of `feed`. `prepared` is the output of prepare_feed
+    for this feed, shared by the T_Feeds of an O_Feed, it is computed when missing.
+    The translated parts of each entry are returned in "translations", for
+    derive_translated_feed; a part the engines failed on is None.
+    """
     logging.info(
         "Call task translate_feed: %s(%s items)", target_language, len(feed.entries)
     )
+    translate_engines = [translate_engine, *(fallback_engines or [])]
     translated_feed = feed
     total_tokens = 0
+    cached_tokens = 0
     translated_characters = 0
+    skipped_characters = 0
     need_cache_objs = {}
-    source_language = "auto"
+    translations = []
 
     try:
-        for entry in translated_feed.entries[:max_posts]:
+        if prepared is None:
+            prepared = prepare_feed(
+                translated_feed, max_posts, fetch_article, translate_content
+            )
+        for entry, prepared_entry in zip(translated_feed.entries[:max_posts], prepared):
+            if prepared_entry["article"]:
+                entry["content"] = [{"value": prepared_entry["article"]}]
             title = entry.get("title")
-            source_language = text_handler.detect_language(entry)
+            translated_title = ""
+            source_language = prepared_entry["language"]
+            # already in the target language, keep the entry as is
+            skip_translation = text_handler.is_target_language(
+                source_language, target_language
+            )
+            translation = {
+                "language": source_language,
+                "skipped": skip_translation,
+                "title": title,
+                "content": text_handler.entry_content(entry),
+            }
+            translations.append(translation)
+            if skip_translation and translate_engine:
+                logging.info("Already in %s, skip: %s", target_language, title)
+                if title and translate_title:
+                    skipped_characters += len(title)
+                if translate_content:
+                    skipped_characters += len(text_handler.entry_content(entry) or "")
 
             # Translate title
-            if title and translate_engine and translate_title:
+            if title and translate_engine and translate_title and not skip_translation:
                 cached = Translated_Content.is_translated(
                     title, target_language
                 )  # check cache db
-                translated_title = ""
                 if not cached:
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        results = translate_engine.translate(
+                    results = (
+                        call_with_failover(
+                            translate_engines,
+                            "translate",
                             title,
                             target_language=target_language,
                             translate_title=title,
                             text_type="title",
+                            source_language=source_language,
                         )
-                        translated_title = results.get("text", "")
-                        if translated_title:
-                            break
-                        logging.warning(
-                            f"Empty translation for title, retrying (attempt {attempt + 1}/{max_retries})"
-                        )
+                        or {}
+                    )
+                    translated_title = results.get("text", "")
 
                     if not translated_title:
                         translated_title = (
@@ -288,42 +725,29 @@ def translate_feed(
                         )
 
                     total_tokens += results.get("tokens", 0)
+                    cached_tokens += results.get("cached_tokens", 0)
                     translated_characters += len(title)
                     if title and translated_title:
                         logging.info("[Title] Will cache:%s", translated_title)
-                        hash128 = cityhash.CityHash128(f"{title}{target_language}")
-                        need_cache_objs[hash128] = Translated_Content(
-                            hash=str(hash128),
-                            original_content=title,
-                            translated_language=target_language,
-                            translated_content=translated_title,
+                        obj = Translated_Content.for_cache(
+                            title,
+                            target_language,
+                            translated_title,
                             tokens=results.get("tokens", 0),
                             characters=results.get("characters", 0),
                         )
+                        need_cache_objs[obj.hash] = obj
                 else:
                     logging.info("[Title] Use db cache:%s", cached["text"])
                     translated_title = cached["text"]
 
-                entry["title"] = text_handler.set_translation_display(
-                    original=title,
-                    translation=translated_title,
-                    translation_display=translation_display,
-                    seprator=" || ",
+                translation["translated_title"] = (
+                    translated_title if translated_title != title else None
                 )
-                bulk_save_cache(need_cache_objs)
-                need_cache_objs = {}
-
-            if fetch_article:
-                try:
-                    article = newspaper.article(
-                        entry.get("link")
-                    )  # 勿使用build，因为不支持跳转
-                    entry["content"] = [{"value": mistune.html(article.text)}]
-                except Exception as e:
-                    logging.warning("Fetch original article error:%s", e)
+                compose_title(entry, translated_title, translation_display)
 
             # Translate content
-            if translate_engine and translate_content:
+            if translate_engine and translate_content and not skip_translation:
                 original_content = entry.get("content")
                 content = (
                     original_content[0].get("value")
@@ -332,23 +756,19 @@ def translate_feed(
                 )
 
                 if content:
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        translated_summary, tokens, characters, need_cache = (
-                            content_translate(
-                                content,
-                                target_language,
-                                translate_engine,
-                                translated_title,
-                                quality,
-                                source_language,
-                            )
-                        )
-                        if translated_summary:
-                            break
-                        logging.warning(
-                            f"Empty translation for content, retrying (attempt {attempt + 1}/{max_retries})"
+                    # retries happen per chunk inside chunk_translate
+                    translated_summary, tokens, characters, need_cache, cached = (
+                        content_translate(
+                            content,
+                            target_language,
+                            translate_engine,
+                            translated_title,
+                            quality,
+                            source_language,
+                            fallback_engines,
+                            prepared_entry["segments"],
                         )
+                    )
 
                     if not translated_summary:
                         translated_summary = (
@@ -356,22 +776,15 @@ def translate_feed(
                         )
 
                     total_tokens += tokens
+                    cached_tokens += cached
                     translated_characters += characters
 
                     need_cache_objs.update(need_cache)
 
-                    text = text_handler.set_translation_display(
-                        original=content,
-                        # NOTE: 将翻译得到的 Markdown 转换为 HTML
-                        translation=mistune.html(translated_summary),
-                        translation_display=translation_display,
-                        seprator="<br />---------------<br />",
+                    translation["translated_content"] = (
+                        translated_summary if translated_summary != content else None
                     )
-                    entry["summary"] = text
-                    entry["content"] = [{"value": text}]
-
-                    bulk_save_cache(need_cache_objs)
-                    need_cache_objs = {}
+                    compose_content(entry, translated_summary, translation_display)
 
             if summary_engine and summary:
                 if not summary_engine:
@@ -385,20 +798,14 @@ def translate_feed(
                 )
 
                 if content:
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        summary_text, tokens, need_cache = content_summarize(
-                            content,
-                            target_language=target_language,
-                            detail=summary_detail,
-                            engine=summary_engine,
-                            minimum_chunk_size=summary_engine.max_size(),
-                        )
-                        if summary_text:
-                            break
-                        logging.warning(
-                            f"Empty summary, retrying (attempt {attempt + 1}/{max_retries})"
-                        )
+                    summary_text, tokens, need_cache = content_summarize(
+                        content,
+                        target_language=target_language,
+                        detail=summary_detail,
+                        engine=summary_engine,
+                        minimum_chunk_size=summary_engine.max_size(),
+                        map_reduce=summary_mode == O_Feed.SUMMARY_MAP_REDUCE,
+                    )
 
                     if not summary_text:
                         summary_text = (
@@ -407,14 +814,20 @@ def translate_feed(
 
                     total_tokens += tokens
                     need_cache_objs.update(need_cache)
-                    html_summary = f"<br />🤖:{mistune.html(summary_text)}<br />---------------<br />"
-
-                    entry["summary"] = summary_text
-                    entry["content"] = [{"value": html_summary + content}]
+                    translation["summary"] = (
+                        summary_text if summary_text != content else None
+                    )
+                    compose_summary(entry, summary_text)
 
-                    bulk_save_cache(need_cache_objs)
-                    need_cache_objs = {}
+            # coalesce the cache writes of the whole feed, unless they pile up
+            if len(need_cache_objs) >= settings.CACHE_BATCH_SIZE:
+                bulk_save_cache(need_cache_objs)
+                need_cache_objs = {}
 
+    except ConfigurationError as e:
+        # e.g. invalid API key or unsupported language, every entry would fail
+        logging.error("translate_feed: %s", str(e))
+        raise
     except Exception as e:
         logging.error("translate_feed: %s", str(e))
     finally:
@@ -424,19 +837,182 @@ def translate_feed(
     return {
         "feed": translated_feed,
         "tokens": total_tokens,
+        "cached_tokens": cached_tokens,
         "characters": translated_characters,
+        "skipped_characters": skipped_characters,
+        "translations": translations,
+    }
+
+
+def prepare_feed(
+    feed: feedparser.FeedParserDict,
+    max_posts: int,
+    fetch_article: bool = False,
+    segment: bool = True,
+) -> list:
+    """
+    Language independent preprocessing of the entries, done once for every
+    T_Feed of an O_Feed: the source language, the original article (HTML, in
+    place of the entry's content) and the segments of the content. Returns one
+    JSON serializable dict per entry.
+    """
+    entries = feed.entries[:max_posts]
+    articles = (
+        fetch_articles([entry.get("link") for entry in entries])
+        if fetch_article
+        else {}
+    )
+    feed_language = text_handler.FeedLanguage()
+    prepared = []
+    for entry in entries:
+        language = feed_language.detect(entry)
+        article = articles.get(entry.get("link"))
+        article = mistune.html(article) if article else None
+        content = article or text_handler.entry_content(entry)
+        prepared.append(
+            {
+                "language": language,
+                "article": article,
+                "segments": (
+                    run_cpu(text_handler.content_split, content)
+                    if segment and content
+                    else None
+                ),
+            }
+        )
+    return prepared
+
+
+def prepared_feed_path(sid: str) -> str:
+    return f"{settings.FEEDS_FOLDER}/{sid}.prepared.json"
+
+
+def store_prepared_feed(o_feed: O_Feed):
+    """Prepare the fetched feed and save it next to its XML."""
+    segment = any(t_feed.translate_content for t_feed in o_feed.t_feed_set.all())
+    feed = run_cpu(parse_feed, f"{settings.FEEDS_FOLDER}/{o_feed.sid}.xml")
+    entries = prepare_feed(feed, o_feed.max_posts, o_feed.fetch_article, segment)
+    data = {
+        "digest": o_feed.digest,
+        "max_posts": o_feed.max_posts,
+        "fetch_article": o_feed.fetch_article,
+        "segment": segment,
+        "entries": entries,
+    }
+    write_file_atomic(
+        prepared_feed_path(o_feed.sid), json.dumps(data, ensure_ascii=False)
+    )
+
+
+def load_prepared_feed(o_feed: O_Feed, segment: bool) -> Optional[dict]:
+    """The prepared feed, None when it is missing or outdated."""
+    try:
+        with open(prepared_feed_path(o_feed.sid), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning("Load prepared feed %s: %s", o_feed.sid, e)
+        return None
+    if (data["digest"], data["max_posts"], data["fetch_article"]) != (
+        o_feed.digest,
+        o_feed.max_posts,
+        o_feed.fetch_article,
+    ) or (segment and not data["segment"]):
+        return None
+    return data
+
+
+def domain_slot(url: str) -> threading.BoundedSemaphore:
+    domain = urlparse(url).netloc
+    with _domain_slots_lock:
+        if domain not in _domain_slots:
+            _domain_slots[domain] = threading.BoundedSemaphore(
+                settings.ARTICLE_DOMAIN_WORKERS
+            )
+        return _domain_slots[domain]
+
+
+def fetch_articles(links: list) -> dict:
+    """
+    Full text of the original articles, keyed by link, missing when unavailable.
+
+    Articles cached less than ARTICLE_REVALIDATE ago are used as is, older ones
+    are revalidated with their ETag/Last-Modified. Downloads run concurrently,
+    at most ARTICLE_DOMAIN_WORKERS per site, and the extraction runs in the
+    process pool.
+    """
+    links = list(dict.fromkeys(link for link in links if link))
+    cached = {
+        article.url: article
+        for article in Article.objects.filter(
+            hash__in=[Article.url_hash(link) for link in links]
+        )
+    }
+    now = datetime.now(timezone.utc)
+    articles = {
+        url: article.text
+        for url, article in cached.items()
+        if article.fetched_at > now - ARTICLE_REVALIDATE
     }
 
+    def fetch(link: str) -> Optional[Article]:
+        article = cached.get(link) or Article(hash=Article.url_hash(link), url=link)
+        with domain_slot(link):
+            results = download_article(
+                link,
+                etag=article.etag,
+                last_modified=article.last_modified,
+                timeout=settings.ARTICLE_TIMEOUT,
+            )
+        if results["error"]:
+            logging.warning("Fetch original article error:%s", results["error"])
+            return None
+        if results["update"]:
+            try:
+                article.text = run_cpu(extract_article, link, results["html"])
+            except Exception as e:
+                logging.warning("Extract original article error:%s: %s", link, e)
+                return None
+            article.etag = results["etag"]
+            article.last_modified = results["last_modified"]
+        article.fetched_at = datetime.now(timezone.utc)
+        return article
+
+    stale_links = [link for link in links if link not in articles]
+    fetched = [article for article in map_io(fetch, stale_links) if article]
+    if fetched:
+        Article.objects.bulk_create(
+            fetched,
+            update_conflicts=True,
+            unique_fields=["hash"],
+            update_fields=["etag", "last_modified", "text", "fetched_at"],
+        )
+    articles.update((article.url, article.text) for article in fetched)
+    return {url: text for url, text in articles.items() if text}
+
 
 def bulk_save_cache(need_cache_objs):
     try:
         if need_cache_objs:
             logging.info("Save caches to db")
-            Translated_Content.objects.bulk_create(need_cache_objs.values())
-    except IntegrityError:
-        logging.warning("Save cache: A record with this hash value already exists.")
+            # INSERT ... ON CONFLICT DO NOTHING, a row cached meanwhile by another
+            # task doesn't drop the rest of the batch
+            Translated_Content.objects.bulk_create(
+                need_cache_objs.values(),
+                batch_size=settings.CACHE_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
     except Exception as e:
-        logging.error("Save cache: %s", str(e))
+        logging.error("Save cache: %s, retry row by row", str(e))
+        saved = 0
+        for obj in need_cache_objs.values():
+            try:
+                Translated_Content.objects.bulk_create([obj], ignore_conflicts=True)
+                saved += 1
+            except Exception as error:
+                logging.error("Save cache %s: %s", obj.hash, str(error))
+        logging.info("Save cache: %d/%d rows saved", saved, len(need_cache_objs))
     return True
 
 
@@ -447,11 +1023,13 @@ def content_translate(
     translate_title: str,
     quality: bool = False,
     source_language: str = "auto",
-) -> tuple[str, int, int, dict]:
+    fallback_engines: Optional[list] = None,
+    segments: Optional[dict] = None,
+) -> tuple[str, int, int, dict, int]:
     """Translate content using either chunk or tag based translation.
 
     Returns:
-        tuple: (translated_content, total_tokens, total_characters, cache_objects)
+        tuple: (translated_content, total_tokens, total_characters, cache_objects, cached_tokens)
     """
     try:
         logging.info(
@@ -465,11 +1043,16 @@ def content_translate(
             target_language=target_language,
             engine=engine,
             translate_title=translate_title,
+            source_language=source_language,
+            fallback_engines=fallback_engines,
+            split_chunks=segments,
         )
 
+    except ConfigurationError:
+        raise
     except Exception as e:
         logging.error(f"Content translation failed: {str(e)}")
-        return "", 0, 0, {}
+        return "", 0, 0, {}, 0
 
 
 def chunk_translate(
@@ -477,55 +1060,112 @@ def chunk_translate(
     target_language: str,
     engine: TranslatorEngine,
     translate_title: str,
+    source_language: str = "auto",
+    fallback_engines: Optional[list] = None,
+    split_chunks: Optional[dict] = None,
 ):
     logging.info(
         "Call chunk_translate: %s(%s items)", target_language, len(original_content)
     )
-    split_chunks: dict = text_handler.content_split(original_content)
+    if split_chunks is None:
+        split_chunks = run_cpu(text_handler.content_split, original_content)
+    # segments are single lines, a group is translated paragraph by paragraph
     grouped_chunks: list = text_handler.group_chunks(
         split_chunks=split_chunks,
         max_size=engine.max_size(),
         group_by="tokens",
     )
-    translated_content = []
+    grouped_chunks = [chunk for chunk in grouped_chunks if chunk]
     total_tokens = 0
     total_characters = 0
+    cached_tokens = 0
     need_cache_objs: dict = {}
-    for chunk in grouped_chunks:
-        if not chunk:
-            continue
-        logging.info("Translate chunk: %s", chunk)
-        cached = Translated_Content.is_translated(chunk, target_language)
-        if not cached:
-            results = engine.translate(
-                chunk,
-                target_language=target_language,
-                translate_title=translate_title,
-                text_type="content",
-            )
-            results_content = re.sub(r"^##\s+", "", results["text"])
-            translated_content.append(results_content if results else chunk)
+
+    def translate_chunk(chunk: str) -> Optional[dict]:
+        return call_with_failover(
+            [engine, *(fallback_engines or [])],
+            "translate_segments",
+            chunk,
+            target_language=target_language,
+            translate_title=translate_title,
+            text_type="content",
+            source_language=source_language,
+        )
+
+    segment_translations = {}
+    misaligned_chunks = []
+
+    def cache(chunk: str, translation: str, results: dict):
+        logging.info("Save to cache:%s", translation)
+        obj = Translated_Content.for_cache(
+            chunk,
+            target_language,
+            translation,
+            tokens=results.get("tokens", 0),
+            characters=results.get("characters", 0),
+        )
+        need_cache_objs[obj.hash] = obj
+
+    def translate_chunks(chunks: list) -> dict:
+        """Translations of `chunks` keyed by chunk, from the cache or the engines."""
+        nonlocal total_tokens, total_characters, cached_tokens
+        translations = {
+            chunk: cached["text"]
+            for chunk, cached in Translated_Content.get_translations(
+                chunks, target_language
+            ).items()
+        }
+        # the engine calls are network-bound, translate the missing chunks concurrently
+        missing_chunks = list(
+            dict.fromkeys(chunk for chunk in chunks if chunk not in translations)
+        )
+        for chunk, results in zip(
+            missing_chunks, map_io(translate_chunk, missing_chunks)
+        ):
+            if not results:
+                continue
             total_tokens += results.get("tokens", 0)
+            cached_tokens += results.get("cached_tokens", 0)
             total_characters += len(chunk)
-
-            if chunk and results["text"]:
-                logging.info("Save to cache:%s", results_content)
-                hash128 = cityhash.CityHash128(f"{chunk}{target_language}")
-                need_cache_objs[hash128] = Translated_Content(
-                    hash=str(hash128),
-                    original_content=chunk,
-                    translated_language=target_language,
-                    translated_content=results_content,
-                    tokens=results.get("tokens", 0),
-                    characters=results.get("characters", 0),
-                )
-        else:
-            translated_content.append(cached["text"])
+            # a group must come back with one line per segment
+            pairs = text_handler.align_segments(chunk, results["text"])
+            if pairs is None:
+                logging.warning("Translated lines don't match the segments:%s", chunk)
+                misaligned_chunks.append(chunk)
+                continue
+            cache(chunk, results["text"], results)
+            translations[chunk] = results["text"]
+        return translations
+
+    for chunk, translation in translate_chunks(grouped_chunks).items():
+        segment_translations.update(
+            text_handler.align_segments(chunk, translation) or []
+        )
+    # groups the engine merged or split lines of are translated segment by segment
+    segments = [
+        segment
+        for chunk in misaligned_chunks
+        for segment in text_handler.split_segments(chunk)
+    ]
+    for segment, translation in translate_chunks(segments).items():
+        segment_translations.update(text_handler.align_segments(segment, translation))
+    for chunk in misaligned_chunks:
+        # cache the reassembled group, the next run needs a single lookup
+        segments = text_handler.split_segments(chunk)
+        if all(segment in segment_translations for segment in segments):
+            translation = "\n\n".join(map(segment_translations.get, segments))
+            cache(chunk, translation, {})
+
+    # untranslated segments keep the original text, the others are still translated
+    translated_content = run_cpu(
+        text_handler.restore_content, original_content, segment_translations
+    )
     return (
-        str("\n\n".join(translated_content)),
+        translated_content,
         total_tokens,
         total_characters,
         need_cache_objs,
+        cached_tokens,
     )
 
 
@@ -537,35 +1177,41 @@ def content_summarize(
     minimum_chunk_size: Optional[int] = 500,
     chunk_delimiter: str = ".",
     summarize_recursively=True,
+    map_reduce: bool = False,
 ):
     # check detail is set correctly
     assert 0 <= detail <= 1
 
-    total_tokens = 0
+    # tokens of every engine response, also when the summary fails partway
+    usage = {"tokens": 0}
     need_cache_objs = {}
     final_summary = ""
+    started = monotonic()
     try:
-        text = text_handler.clean_content(original_content)
+        text = run_cpu(text_handler.clean_content, original_content)
         logging.info("[Summarize]: %s...", text)
-        cached = Translated_Content.is_translated(
-            f"Summary_{original_content}", target_language
-        )
+        # keyed on the text, changes of links, images and the like don't matter
+        summary_key = f"Summary_{text}"
+        cached = Translated_Content.is_translated(summary_key, target_language)
 
         if not cached:
             # interpolate the number of chunks based to get specified level of detail
             max_chunks = len(
-                text_handler.chunk_on_delimiter(
-                    text, minimum_chunk_size, chunk_delimiter
+                run_cpu(
+                    text_handler.chunk_on_delimiter,
+                    text,
+                    minimum_chunk_size,
+                    chunk_delimiter,
                 )
             )
             min_chunks = 1
             num_chunks = int(min_chunks + detail * (max_chunks - min_chunks))
 
             # adjust chunk_size based on interpolated number of chunks
-            document_length = len(text_handler.tokenize(text))
+            document_length = run_cpu(text_handler.count_tokens, text)
             chunk_size = max(minimum_chunk_size, document_length // num_chunks)
-            text_chunks = text_handler.chunk_on_delimiter(
-                text, chunk_size, chunk_delimiter
+            text_chunks = run_cpu(
+                text_handler.chunk_on_delimiter, text, chunk_size, chunk_delimiter
             )
 
             logging.info(
@@ -573,40 +1219,131 @@ def content_summarize(
             )
             # logging.info(f"Chunk lengths are {[len(text_handler.tokenize(x)) for x in text_chunks]}")
 
-            accumulated_summaries = []
-            for chunk in text_chunks:
-                if summarize_recursively and accumulated_summaries:
-                    # Creating a structured prompt for recursive summarization
-                    accumulated_summaries_string = "\n\n".join(accumulated_summaries)
-                    user_message_content = f"Previous summaries:\n\n{accumulated_summaries_string}\n\nText to summarize next:\n\n{chunk}"
-                else:
-                    # Directly passing the chunk for summarization without recursive context
-                    user_message_content = chunk
+            def summarize_all(texts: list) -> list:
+                return cached_summarize(
+                    texts, target_language, engine, need_cache_objs, usage
+                )
+
+            if map_reduce:
+                final_summary = map_reduce_summarize(
+                    text_chunks, chunk_size, summarize_all
+                )
+            else:
+                accumulated_summaries = []
+                for chunk in text_chunks:
+                    if summarize_recursively and accumulated_summaries:
+                        # Creating a structured prompt for recursive summarization
+                        accumulated_summaries_string = "\n\n".join(
+                            accumulated_summaries
+                        )
+                        user_message_content = f"Previous summaries:\n\n{accumulated_summaries_string}\n\nText to summarize next:\n\n{chunk}"
+                    else:
+                        # Directly passing the chunk for summarization without recursive context
+                        user_message_content = chunk
 
-                # Assuming this function gets the completion and works as expected
-                response = engine.summarize(user_message_content, target_language)
-                accumulated_summaries.append(response.get("text"))
-                total_tokens += response.get("tokens", 0)
+                    # unchanged leading chunks come from the cache, so does their context
+                    response = summarize_all([user_message_content])[0]
+                    accumulated_summaries.append(response.get("text"))
 
-            # Compile final summary from partial summaries
-            final_summary = "<br/>".join(accumulated_summaries)
+                # Compile final summary from partial summaries
+                final_summary = "<br/>".join(accumulated_summaries)
 
-            hash128 = cityhash.CityHash128(
-                f"Summary_{original_content}{target_language}"
+            logging.info(
+                "[Summary] %s: %d chunks, %d tokens, %.2fs",
+                "map-reduce" if map_reduce else "sequential",
+                len(text_chunks),
+                usage["tokens"],
+                monotonic() - started,
             )
             logging.info("[Summary] Will cache:%s", final_summary)
-            need_cache_objs[hash128] = Translated_Content(
-                hash=str(hash128),
-                original_content=f"Summary_{original_content}",
-                translated_language=target_language,
-                translated_content=final_summary,
-                tokens=total_tokens,
-                characters=0,
+            obj = Translated_Content.for_cache(
+                summary_key, target_language, final_summary, tokens=usage["tokens"]
             )
+            need_cache_objs[obj.hash] = obj
         else:
             final_summary = cached.get("text")
             logging.info("[Summary] Use db cache:%s", final_summary)
+    except ConfigurationError:
+        raise
     except Exception as e:
         logging.error(f"content_summarize: {str(e)}")
 
-    return final_summary, total_tokens, need_cache_objs
+    return final_summary, usage["tokens"], need_cache_objs
+
+
+def cached_summarize(
+    texts: list,
+    target_language: str,
+    engine: TranslatorEngine,
+    need_cache_objs: dict,
+    usage: dict,
+) -> list:
+    """
+    Summaries of `texts` from the cache, the missing ones are summarized
+    concurrently and added to `need_cache_objs`. Cached summaries cost 0 tokens.
+    The tokens of the responses are added to usage["tokens"], also those of
+    the chunks that succeeded when another one failed.
+    """
+    keys = {text: f"Summary_{text}" for text in texts}
+    cached = Translated_Content.get_translations(set(keys.values()), target_language)
+    missing_texts = list(dict.fromkeys(t for t in texts if keys[t] not in cached))
+
+    def summarize(text: str) -> Optional[dict]:
+        try:
+            return call_with_retry(engine.summarize, text, target_language)
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            logging.warning("Summarize chunk failed: %s", e)
+            return None
+
+    responses = {}
+    for text, response in zip(missing_texts, map_io(summarize, missing_texts)):
+        if not response:
+            continue
+        usage["tokens"] += response.get("tokens", 0)
+        obj = Translated_Content.for_cache(
+            keys[text],
+            target_language,
+            response["text"],
+            tokens=response.get("tokens", 0),
+        )
+        need_cache_objs[obj.hash] = obj
+        responses[text] = response
+    if len(responses) < len(missing_texts):
+        raise Exception("Summarize chunk failed")
+    return [
+        responses.get(text) or {"text": cached[keys[text]]["text"], "tokens": 0}
+        for text in texts
+    ]
+
+
+def map_reduce_summarize(text_chunks: list, max_tokens: int, summarize_all) -> str:
+    """
+    Summarize the chunks concurrently (map), then summarize groups of partial
+    summaries that fit in `max_tokens` until a single summary is left (reduce).
+    `summarize_all(texts)` returns the engine responses.
+    """
+
+    def summarize(texts: list) -> list:
+        return [response.get("text") for response in summarize_all(texts)]
+
+    summaries = summarize(text_chunks)
+    for _ in range(MAX_REDUCE_PASSES):
+        if len(summaries) <= 1:
+            break
+        groups = [[]]
+        group_tokens = 0
+        for summary in summaries:
+            tokens = text_handler.count_tokens(summary)
+            if groups[-1] and group_tokens + tokens > max_tokens:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(summary)
+            group_tokens += tokens
+        if len(groups) == len(summaries):
+            break  # every partial summary alone fills the context
+        summaries = summarize(
+            ["Partial summaries:\n\n" + "\n\n".join(group) for group in groups]
+        )
+    return "<br/>".join(summaries)
@@ -1,3 +1,1337 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import runpy
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from importlib.util import find_spec
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+import feedparser
+import httpx
+from django.apps import apps
+from django.db import IntegrityError, connection
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils.module_loading import import_string
+from huey import MemoryHuey
+
+from translator.exceptions import ConfigurationError, PermanentError
+from translator.models import Translated_Content
+from utils import executors, feed_action, metrics, sqlite, text_handler
+
+from . import tasks
+from .forms import O_FeedForm
+from .models import Article, O_Feed, T_Feed, TaskLease
+
+
+class FakeEncoding:
+    """Whitespace tokenizer, tiktoken downloads its encodings on first use."""
+
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeEngine:
+    """Prefixes every line with [T], `fail(text)` returns the exception to raise."""
+
+    circuit_breaker = None
+
+    def __init__(self, fail=None, name: str = "fake", max_tokens: int = 1000):
+        self.fail = fail
+        self.name = name
+        self.max_tokens = max_tokens
+        self.calls = []
+
+    def __str__(self):
+        return self.name
+
+    def max_size(self) -> int:
+        return self.max_tokens
+
+    def translate(self, text: str, target_language: str, **kwargs) -> dict:
+        self.calls.append(text)
+        error = self.fail(text) if self.fail else None
+        if error:
+            raise error
+        translation = "\n".join(
+            f"[T]{line}" if line else line for line in text.split("\n")
+        )
+        return {"text": translation, "tokens": len(text.split())}
+
+    def translate_segments(self, text: str, target_language: str, **kwargs) -> dict:
+        return self.translate(text, target_language, **kwargs)
+
+    def summarize(self, text: str, target_language: str) -> dict:
+        return self.translate(text, target_language)
+
+
+def feed_xml(entries: list) -> str:
+    items = "".join(
+        f"<item><title>{title}</title><link>https://example.com/{i}</link>"
+        f"<description><![CDATA[{content}]]></description></item>"
+        for i, (title, content) in enumerate(entries)
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+        f"<link>https://example.com</link>{items}</channel></rss>"
+    )
+
+
+def make_feed(entries: list) -> feedparser.FeedParserDict:
+    return feedparser.parse(feed_xml(entries))
+
+
+@override_settings(CPU_WORKERS=0, ENGINE_WORKERS=1)
+class OfflineTestCase(TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "utils.text_handler.tiktoken.encoding_for_model",
+            return_value=FakeEncoding(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+ENTRIES = [
+    ("The first story", "<p>First paragraph of the first story.</p>"),
+    ("The second story", "<p>Too long to translate.</p><p>A short one.</p>"),
+    ("The third story", "<p>First paragraph of the third story.</p>"),
+]
+
+
+class PermanentErrorTest(OfflineTestCase):
+    def translate(self, engine, **kwargs):
+        return tasks.translate_feed(
+            feed=make_feed(ENTRIES),
+            target_language="Chinese Simplified",
+            translate_engine=engine,
+            translate_title=True,
+            translate_content=True,
+            summary=False,
+            summary_detail=0,
+            summary_engine=None,
+            **kwargs,
+        )
+
+    def test_rejected_title_keeps_original(self):
+        engine = FakeEngine(
+            fail=lambda text: HTTPError(400) if text == "The second story" else None
+        )
+        titles = [entry.title for entry in self.translate(engine)["feed"].entries]
+        self.assertEqual(
+            titles, ["[T]The first story", "The second story", "[T]The third story"]
+        )
+
+    def test_rejected_chunk_keeps_original(self):
+        def fail(text):
+            if "Too long" in text:
+                return HTTPError(400, "maximum context length exceeded")
+
+        # one segment per chunk
+        engine = FakeEngine(fail=fail, max_tokens=5)
+        content = self.translate(engine)["feed"].entries[1].summary
+        self.assertIn("Too long to translate.", content)
+        self.assertNotIn("[T]Too long", content)
+        self.assertIn("[T]A short one.", content)
+
+    def test_fallback_engine_serves_rejected_request(self):
+        engine = FakeEngine(fail=lambda text: HTTPError(400, "content filter"))
+        fallback = FakeEngine(name="fallback")
+        feed = self.translate(engine, fallback_engines=[fallback])["feed"]
+        self.assertEqual(feed.entries[0].title, "[T]The first story")
+
+    def test_configuration_errors_abort_the_feed(self):
+        for error in (
+            HTTPError(401, "Incorrect API key provided"),
+            HTTPError(403, "Forbidden"),
+            HTTPError(404, "The model `gpt-9` does not exist"),
+            HTTPError(400, "Unsupported target language: Klingon"),
+            ConfigurationError("Not support target language:Klingon"),
+        ):
+            with self.subTest(error=str(error)):
+                with self.assertRaises(ConfigurationError):
+                    self.translate(FakeEngine(fail=lambda text: error))
+
+    def test_permanent_error_is_not_a_configuration_error(self):
+        engine = FakeEngine(fail=lambda text: PermanentError("content filter"))
+        feed = self.translate(engine)["feed"]
+        self.assertEqual(feed.entries[0].title, "The first story")
+
+
+ENGLISH = "A long enough English sentence about the weather in the mountains."
+CHINESE = "这是一篇关于山区天气的中文文章，内容足够长，可以可靠地检测语言。"
+
+
+class FeedLanguageTest(SimpleTestCase):
+    def detect(self, *texts) -> list:
+        feed_language = text_handler.FeedLanguage()
+        return [feed_language.detect({"title": "", "summary": text}) for text in texts]
+
+    def test_monolingual_feed(self):
+        self.assertEqual(self.detect(*[ENGLISH] * 5), ["en"] * 5)
+
+    def test_mixed_feed(self):
+        self.assertEqual(
+            self.detect(ENGLISH, ENGLISH, ENGLISH, CHINESE, ENGLISH),
+            ["en", "en", "en", "zh-cn", "en"],
+        )
+
+    def test_prior_only_checked_on_a_short_sample(self):
+        feed_language = text_handler.FeedLanguage()
+        for _ in range(text_handler.FEED_LANGUAGE_SAMPLES):
+            feed_language.detect({"summary": ENGLISH})
+        with mock.patch.object(
+            text_handler, "detect_language", wraps=text_handler.detect_language
+        ) as detect_language:
+            self.assertEqual(feed_language.detect({"summary": ENGLISH * 20}), "en")
+        detect_language.assert_called_once_with(
+            {"summary": ENGLISH * 20}, text_handler.QUICK_SAMPLE_SIZE
+        )
+
+    def test_undetectable_entry_keeps_the_prior(self):
+        self.assertEqual(self.detect(CHINESE, CHINESE, CHINESE, ""), ["zh-cn"] * 4)
+
+
+CONTENT = (
+    '<p>Read <a href="/docs">the docs</a> now.<img src="x.png"></p>'
+    "<ul><li>One</li><li>Two &amp; three</li></ul><pre>code()</pre>"
+    "<div>Intro<p>Inner</p>tail</div>"
+)
+
+
+class SkipTargetLanguageTest(OfflineTestCase):
+    def test_is_target_language(self):
+        self.assertTrue(text_handler.is_target_language("en", "English"))
+        self.assertTrue(text_handler.is_target_language("zh-cn", "Chinese Simplified"))
+        self.assertFalse(text_handler.is_target_language("zh-tw", "Chinese Simplified"))
+        self.assertFalse(
+            text_handler.is_target_language("zh-cn", "Chinese Traditional")
+        )
+        # Chinese of an unknown script
+        self.assertFalse(text_handler.is_target_language("zh", "Chinese Traditional"))
+
+    def test_chinese_script(self):
+        self.assertEqual(text_handler.chinese_script("这是关于软件开发的文章"), "zh-cn")
+        self.assertEqual(text_handler.chinese_script("這是關於軟體開發的文章"), "zh-tw")
+        self.assertIsNone(text_handler.chinese_script("English only"))
+
+    def test_entries_in_the_target_language_are_skipped(self):
+        entries = [
+            ("An English story", "<p>Some English content.</p>"),
+            ("简体标题", "<p>简体内容</p>"),
+            ("繁體標題", "<p>繁體內容</p>"),
+        ]
+        engine = FakeEngine()
+        results = tasks.translate_feed(
+            feed=make_feed(entries),
+            target_language="Chinese Simplified",
+            translate_title=True,
+            translate_content=True,
+            translate_engine=engine,
+            summary=False,
+            summary_detail=0,
+            summary_engine=None,
+            prepared=[
+                {"language": language, "article": None, "segments": None}
+                for language in ("en", "zh-cn", "zh-tw")
+            ],
+        )
+        titles = [entry.title for entry in results["feed"].entries]
+        self.assertEqual(titles, ["[T]An English story", "简体标题", "[T]繁體標題"])
+        self.assertEqual(
+            text_handler.entry_content(results["feed"].entries[1]), "<p>简体内容</p>"
+        )
+        self.assertFalse(any("简体" in text for text in engine.calls))
+        self.assertEqual(
+            results["skipped_characters"], len("简体标题") + len("<p>简体内容</p>")
+        )
+
+
+class SegmentationTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "utils.text_handler.tiktoken.encoding_for_model",
+            return_value=FakeEncoding(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_segments(self):
+        self.assertEqual(
+            text_handler.content_split(CONTENT)["chunks"],
+            [
+                "Read <t1>the docs</t1> now.<t2/>",
+                "One",
+                "Two &amp; three",
+                "Intro",
+                "Inner",
+                "tail",
+            ],
+        )
+
+    def test_round_trip(self):
+        chunks = text_handler.content_split(CONTENT)["chunks"]
+        self.assertEqual(text_handler.restore_content(CONTENT, {}), CONTENT)
+        self.assertEqual(
+            text_handler.restore_content(
+                CONTENT, {chunk: f"[T]{chunk}" for chunk in chunks}
+            ),
+            '<p>[T]Read <a href="/docs">the docs</a> now.<img src="x.png"></p>'
+            "<ul><li>[T]One</li><li>[T]Two &amp; three</li></ul><pre>code()</pre>"
+            "<div>[T]Intro<p>[T]Inner</p>[T]tail</div>",
+        )
+
+    def test_reordered_and_dropped_placeholders(self):
+        translation = "<t1>La doc</t1> lire.<t7/>"
+        self.assertEqual(
+            text_handler.restore_content(
+                CONTENT, {"Read <t1>the docs</t1> now.<t2/>": translation}
+            ).split("<ul>")[0],
+            '<p><a href="/docs">La doc</a> lire.<img src="x.png"></p>',
+        )
+
+    def test_plain_text_paragraphs(self):
+        content = "First paragraph.\n\nSecond one\nwith a break.\n\n42"
+        chunks = text_handler.content_split(content)["chunks"]
+        self.assertEqual(chunks, ["First paragraph.", "Second one with a break."])
+        self.assertEqual(
+            text_handler.restore_content(
+                content, {chunk: f"[T]{chunk}" for chunk in chunks}
+            ),
+            "[T]First paragraph.\n\n[T]Second one with a break.\n\n42",
+        )
+
+    def test_groups_are_separated_by_blank_lines(self):
+        split_chunks = text_handler.content_split(CONTENT)
+        groups = text_handler.group_chunks(split_chunks, 1000, "tokens")
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(text_handler.split_segments(groups[0]), split_chunks["chunks"])
+
+    def test_align_segments(self):
+        chunk = "One\n\nTwo\n\nThree"
+        pairs = [("One", "Un"), ("Two", "Deux"), ("Three", "Trois")]
+        self.assertEqual(
+            text_handler.align_segments(chunk, "Un\n\nDeux\n\nTrois"), pairs
+        )
+        self.assertEqual(
+            text_handler.align_segments(chunk, "Un\nDeux\n \nTrois\n"), pairs
+        )
+        self.assertEqual(
+            text_handler.align_segments("One", "Un\ndeux"), [("One", "Un deux")]
+        )
+
+    def test_misaligned_translation(self):
+        chunk = "One\n\nTwo\n\nThree"
+        self.assertIsNone(text_handler.align_segments(chunk, "Un Deux\n\nTrois"))
+        self.assertIsNone(
+            text_handler.align_segments(chunk, "Un\n\nDeux\n\nTrois\n\nQuatre")
+        )
+
+
+class MergingEngine(FakeEngine):
+    """Translates a group of segments into a single paragraph."""
+
+    def translate(self, text: str, target_language: str, **kwargs) -> dict:
+        results = super().translate(text, target_language, **kwargs)
+        results["text"] = " ".join(text_handler.split_segments(results["text"]))
+        return results
+
+
+class ChunkTranslateTest(OfflineTestCase):
+    def test_misaligned_group_is_translated_by_segment(self):
+        engine = MergingEngine()
+        content, _, _, cache_objs, _ = tasks.chunk_translate(
+            CONTENT, "French", engine, translate_title=""
+        )
+        self.assertEqual(
+            content,
+            '<p>[T]Read <a href="/docs">the docs</a> now.<img src="x.png"></p>'
+            "<ul><li>[T]One</li><li>[T]Two &amp; three</li></ul><pre>code()</pre>"
+            "<div>[T]Intro<p>[T]Inner</p>[T]tail</div>",
+        )
+        self.assertEqual(len(engine.calls), 1 + 6)
+        # the reassembled group is cached, the next run needs no engine call
+        tasks.bulk_save_cache(cache_objs)
+        again, *_ = tasks.chunk_translate(CONTENT, "French", engine, translate_title="")
+        self.assertEqual(again, content)
+        self.assertEqual(len(engine.calls), 1 + 6)
+
+
+class PreparedFeedTest(OfflineTestCase):
+    def setUp(self):
+        super().setUp()
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        patcher = override_settings(FEEDS_FOLDER=folder.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.o_feed = O_Feed.objects.create(
+            feed_url="https://example.com/feed.xml", digest="digest"
+        )
+        self.t_feed = T_Feed.objects.create(
+            o_feed=self.o_feed, language="French", translate_content=True
+        )
+        self.xml = feed_xml(ENTRIES)
+        with open(f"{folder.name}/{self.o_feed.sid}.xml", "w") as f:
+            f.write(self.xml)
+
+    def test_stored_as_json(self):
+        tasks.store_prepared_feed(self.o_feed)
+        with open(tasks.prepared_feed_path(self.o_feed.sid)) as f:
+            data = json.load(f)
+        self.assertEqual(len(data["entries"]), len(ENTRIES))
+        self.assertEqual(data["entries"][0]["language"], "en")
+        prepared = tasks.load_prepared_feed(self.o_feed, segment=True)
+        self.assertEqual(prepared["entries"], data["entries"])
+        self.o_feed.digest = "changed"
+        self.assertIsNone(tasks.load_prepared_feed(self.o_feed, segment=True))
+
+    @override_settings(CPU_WORKERS=1)
+    def test_bozo_feed_is_stored(self):
+        self.addCleanup(setattr, executors, "_process_pool", None)
+        self.addCleanup(executors.get_process_pool().shutdown)
+        self.t_feed.translate_content = False  # no tokenizer in the worker
+        self.t_feed.save()
+        with open(f"{settings.FEEDS_FOLDER}/{self.o_feed.sid}.xml", "w") as f:
+            f.write(feed_xml([("Caf&nbsp;story", "<p>Content</p>")]))
+        tasks.store_prepared_feed(self.o_feed)
+        with open(tasks.prepared_feed_path(self.o_feed.sid)) as f:
+            self.assertEqual(len(json.load(f)["entries"]), 1)
+
+    @mock.patch.object(tasks, "schedule_task")
+    def test_fetch_only_schedules_the_preparation(self, schedule_task):
+        with mock.patch.object(
+            tasks,
+            "fetch_feed",
+            return_value={
+                "error": None,
+                "update": True,
+                "xml": self.xml,
+                "feed": feedparser.parse(self.xml),
+            },
+        ):
+            self.assertTrue(tasks._update_original_feed(self.o_feed.sid))
+        schedule_task.assert_called_once_with(
+            tasks.prepare_original_feed, self.o_feed.sid, priority=None
+        )
+        self.assertFalse(os.path.exists(tasks.prepared_feed_path(self.o_feed.sid)))
+
+    @mock.patch.object(tasks, "schedule_task")
+    def test_preparation_schedules_the_translations(self, schedule_task):
+        tasks.prepare_original_feed.call_local(self.o_feed.sid)
+        self.assertTrue(os.path.exists(tasks.prepared_feed_path(self.o_feed.sid)))
+        schedule_task.assert_called_once_with(
+            tasks.update_translated_feed, self.t_feed.sid, priority=None
+        )
+
+    def test_prepared_article_replaces_the_content(self):
+        feed = make_feed(ENTRIES[:1])
+        prepared = [
+            {"language": "en", "article": "<p>Full text.</p>", "segments": None}
+        ]
+        translated = tasks.translate_feed(
+            feed=feed,
+            target_language="French",
+            translate_title=False,
+            translate_content=True,
+            translate_engine=FakeEngine(),
+            summary=False,
+            summary_detail=0,
+            summary_engine=None,
+            prepared=prepared,
+        )["feed"]
+        self.assertIn("[T]Full text.", translated.entries[0].content[0]["value"])
+
+
+class SimplifiedEngine(FakeEngine):
+    def translate(self, text: str, target_language: str, **kwargs) -> dict:
+        self.calls.append(text)
+        return {"text": "发展的故事", "tokens": 1}
+
+
+@skipIf(text_handler.opencc is None, "opencc is not installed")
+class PivotTest(OfflineTestCase):
+    def setUp(self):
+        super().setUp()
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        patcher = override_settings(FEEDS_FOLDER=folder.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.o_feed = O_Feed.objects.create(
+            feed_url="https://example.com/feed.xml", pivot=True, translation_display=2
+        )
+        self.source = T_Feed.objects.create(
+            o_feed=self.o_feed, language="Chinese Simplified", translate_title=True
+        )
+        self.t_feed = T_Feed.objects.create(
+            o_feed=self.o_feed, language="Chinese Traditional", translate_title=True
+        )
+        entries = [("A story about 发展", ""), ("软件", "")]
+        with open(f"{folder.name}/{self.o_feed.sid}.xml", "w") as f:
+            f.write(feed_xml(entries))
+        results = tasks.translate_feed(
+            feed=make_feed(entries),
+            target_language=self.source.language,
+            translate_title=True,
+            translate_content=False,
+            translate_engine=SimplifiedEngine(),
+            summary=False,
+            summary_detail=0,
+            summary_engine=None,
+            prepared=[
+                {"language": "en", "article": None, "segments": None},
+                {"language": "zh-cn", "article": None, "segments": None},
+            ],
+        )
+        with open(tasks.translations_path(self.source.sid), "w") as f:
+            json.dump(results["translations"], f)
+        self.path = f"{folder.name}/{self.t_feed.sid}"
+
+    def test_only_translations_are_converted(self):
+        self.assertTrue(
+            tasks.derive_translated_feed(self.source, self.t_feed, self.path)
+        )
+        feed = feedparser.parse(f"{self.path}.xml")
+        titles = [entry.title for entry in feed.entries]
+        self.assertEqual(titles, ["A story about 发展 || 發展的故事", "软件 || 軟體"])
+
+    @override_settings(CPU_WORKERS=1)
+    def test_bozo_original_feed(self):
+        self.addCleanup(setattr, executors, "_process_pool", None)
+        self.addCleanup(executors.get_process_pool().shutdown)
+        path = f"{settings.FEEDS_FOLDER}/{self.o_feed.sid}.xml"
+        with open(path) as f:
+            xml = f.read().replace("<title>Feed</title>", "<title>Feed&nbsp;</title>")
+        with open(path, "w") as f:
+            f.write(xml)
+        self.assertTrue(
+            tasks.derive_translated_feed(self.source, self.t_feed, self.path)
+        )
+        feed = feedparser.parse(f"{self.path}.xml")
+        self.assertEqual(feed.entries[0].title, "A story about 发展 || 發展的故事")
+
+    @mock.patch.object(tasks, "schedule_task")
+    def test_up_to_date_source_does_not_schedule(self, schedule_task):
+        self.assertTrue(tasks._update_translated_feed(self.source.sid))
+        schedule_task.assert_not_called()
+
+    @mock.patch.object(tasks, "schedule_task")
+    @mock.patch.object(tasks, "translate_feed", return_value=None)
+    def test_failed_source_schedules(self, translate_feed, schedule_task):
+        self.o_feed.last_pull = datetime.now(timezone.utc)
+        self.o_feed.save()
+        self.assertFalse(tasks._update_translated_feed(self.source.sid))
+        schedule_task.assert_called_once_with(
+            tasks.update_translated_feed, self.t_feed.sid, False
+        )
+
+    def test_missing_translations_are_not_derived(self):
+        os.remove(tasks.translations_path(self.source.sid))
+        self.assertFalse(
+            tasks.derive_translated_feed(self.source, self.t_feed, self.path)
+        )
+
+
+class PivotFormTest(TestCase):
+    def test_pivot_requires_opencc(self):
+        data = {
+            "feed_url": "https://example.com/feed.xml",
+            "update_frequency": 30,
+            "min_update_frequency": 5,
+            "max_update_frequency": 1440,
+            "max_posts": 20,
+            "translation_display": 0,
+            "summary_detail": 0,
+            "summary_mode": O_Feed.SUMMARY_SEQUENTIAL,
+            "pivot": True,
+        }
+        with mock.patch.object(text_handler, "opencc", None):
+            form = O_FeedForm(data=data)
+            self.assertFalse(form.is_valid())
+        self.assertIn("pivot", form.errors)
+        with mock.patch.object(text_handler, "opencc", object()):
+            self.assertTrue(O_FeedForm(data=data).is_valid())
+
+
+class ArticleTest(OfflineTestCase):
+    URL = "https://example.com/article"
+
+    def download(self, handler, **validators) -> dict:
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        with mock.patch.object(feed_action.httpx, "Client", return_value=client):
+            return feed_action.download_article(self.URL, **validators)
+
+    def test_conditional_download(self):
+        def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            headers = {"ETag": '"v1"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"}
+            return httpx.Response(200, text="<html>Article</html>", headers=headers)
+
+        results = self.download(handler)
+        self.assertTrue(results["update"])
+        self.assertEqual(results["html"], "<html>Article</html>")
+        self.assertEqual(results["etag"], '"v1"')
+        self.assertEqual(results["last_modified"], "Mon, 19 Oct 2026 10:00:00 GMT")
+        results = self.download(handler, etag='"v1"')
+        self.assertFalse(results["update"])
+        self.assertIsNone(results["html"])
+        self.assertIsNone(results["error"])
+
+    def test_download_error(self):
+        results = self.download(lambda request: httpx.Response(500))
+        self.assertIsNone(results["html"])
+        self.assertIn("500", results["error"])
+
+    def fetch(self, results: dict):
+        with mock.patch.object(
+            tasks, "download_article", return_value=results
+        ) as download, mock.patch.object(
+            tasks, "extract_article", return_value="New text"
+        ) as extract:
+            articles = tasks.fetch_articles([self.URL])
+        return articles, download, extract
+
+    def test_new_article_is_stored_with_its_validators(self):
+        etag = '"' + "x" * 300 + '"'  # longer than a CharField would take
+        articles, _, _ = self.fetch(
+            {
+                "html": "<html></html>",
+                "update": True,
+                "error": None,
+                "etag": etag,
+                "last_modified": "",
+            }
+        )
+        self.assertEqual(articles, {self.URL: "New text"})
+        self.assertEqual(Article.objects.get(url=self.URL).etag, etag)
+
+    def test_stale_article_is_revalidated(self):
+        fetched_at = datetime.now(timezone.utc) - tasks.ARTICLE_REVALIDATE * 2
+        Article.objects.create(
+            hash=Article.url_hash(self.URL),
+            url=self.URL,
+            etag='"v1"',
+            last_modified="Mon, 19 Oct 2026 10:00:00 GMT",
+            text="Old text",
+            fetched_at=fetched_at,
+        )
+        articles, download, extract = self.fetch(
+            {
+                "html": None,
+                "update": False,
+                "error": None,
+                "etag": "",
+                "last_modified": "",
+            }
+        )
+        self.assertEqual(articles, {self.URL: "Old text"})
+        download.assert_called_once_with(
+            self.URL,
+            etag='"v1"',
+            last_modified="Mon, 19 Oct 2026 10:00:00 GMT",
+            timeout=settings.ARTICLE_TIMEOUT,
+        )
+        extract.assert_not_called()
+        article = Article.objects.get(url=self.URL)
+        self.assertEqual(article.etag, '"v1"')
+        self.assertGreater(article.fetched_at, fetched_at)
+
+    def test_fresh_article_is_used_as_is(self):
+        Article.objects.create(
+            hash=Article.url_hash(self.URL),
+            url=self.URL,
+            text="Cached text",
+            fetched_at=datetime.now(timezone.utc),
+        )
+        articles, download, _ = self.fetch({})
+        self.assertEqual(articles, {self.URL: "Cached text"})
+        download.assert_not_called()
+
+
+class BulkSaveCacheTest(TestCase):
+    def cache(self, text: str, translation: str) -> Translated_Content:
+        return Translated_Content.for_cache(text, "French", translation)
+
+    def translations(self) -> dict:
+        return dict(
+            Translated_Content.objects.values_list(
+                "original_content", "translated_content"
+            )
+        )
+
+    def test_duplicate_keys_are_ignored(self):
+        self.cache("Hello", "Bonjour").save()
+        tasks.bulk_save_cache(
+            {
+                "hello": self.cache("Hello", "Salut"),  # cached meanwhile
+                "world": self.cache("World", "Monde"),
+            }
+        )
+        self.assertEqual(self.translations(), {"Hello": "Bonjour", "World": "Monde"})
+
+    def test_rows_are_saved_one_by_one_after_an_error(self):
+        bulk_create = Translated_Content.objects.bulk_create
+
+        def failing_bulk_create(objs, **kwargs):
+            objs = list(objs)
+            if len(objs) > 1 or objs[0].original_content == "Broken":
+                raise IntegrityError("constraint failed")
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(
+            Translated_Content.objects, "bulk_create", side_effect=failing_bulk_create
+        ):
+            tasks.bulk_save_cache(
+                {
+                    "hello": self.cache("Hello", "Bonjour"),
+                    "broken": self.cache("Broken", "Cassé"),
+                    "world": self.cache("World", "Monde"),
+                }
+            )
+        self.assertEqual(self.translations(), {"Hello": "Bonjour", "World": "Monde"})
+
+
+class SummaryTest(OfflineTestCase):
+    def summarize(self, texts: list, engine: FakeEngine, usage: dict):
+        need_cache_objs = {}
+        try:
+            return tasks.cached_summarize(
+                texts, "French", engine, need_cache_objs, usage
+            )
+        finally:
+            tasks.bulk_save_cache(need_cache_objs)
+
+    def test_chunk_cache_hit_and_miss(self):
+        engine = FakeEngine()
+        usage = {"tokens": 0}
+        self.summarize(["One two", "Three"], engine, usage)
+        self.assertEqual(usage["tokens"], 3)
+        responses = self.summarize(["One two", "Four five six"], engine, usage)
+        self.assertEqual(engine.calls, ["One two", "Three", "Four five six"])
+        self.assertEqual(
+            responses,
+            [
+                {"text": "[T]One two", "tokens": 0},
+                {"text": "[T]Four five six", "tokens": 3},
+            ],
+        )
+        self.assertEqual(usage["tokens"], 6)
+
+    def test_partial_failure_keeps_the_tokens(self):
+        engine = FakeEngine(
+            fail=lambda text: PermanentError("filtered") if "fail" in text else None
+        )
+        usage = {"tokens": 0}
+        with self.assertRaises(Exception):
+            self.summarize(["One two", "fail", "Three"], engine, usage)
+        self.assertEqual(usage["tokens"], 3)
+        # the chunks that succeeded are cached for the next run
+        engine.fail = None
+        self.summarize(["One two", "fail", "Three"], engine, usage)
+        self.assertEqual(engine.calls[3:], ["fail"])
+
+    def test_failed_summary_is_still_billed(self):
+        class ShortSummaries(FakeEngine):
+            def summarize(self, text: str, target_language: str) -> dict:
+                self.calls.append(text)
+                if text.startswith("Partial summaries"):
+                    raise PermanentError("filtered")
+                return {"text": "Short.", "tokens": len(text.split())}
+
+        engine = ShortSummaries()
+        summary, tokens, need_cache_objs = tasks.content_summarize(
+            "<p>First part here. Second part here. Third part here.</p>",
+            "French",
+            engine,
+            detail=1,
+            minimum_chunk_size=4,
+            map_reduce=True,
+        )
+        self.assertEqual(summary, "")
+        # the tokens of the map pass, the reduce pass failed
+        self.assertTrue(engine.calls[-1].startswith("Partial summaries"))
+        self.assertEqual(tokens, sum(len(text.split()) for text in engine.calls[:-1]))
+        self.assertEqual(len(need_cache_objs), len(engine.calls) - 1)
+
+
+class ScheduleRegistryTest(TestCase):
+    def setUp(self):
+        self.huey = MemoryHuey(utc=True)
+        for patcher in (
+            mock.patch.object(tasks, "huey", self.huey),
+            mock.patch.object(tasks.update_original_feed, "schedule"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.schedule = tasks.update_original_feed.schedule
+        self.o_feed = O_Feed.objects.create(feed_url="https://example.com/feed.xml")
+        self.key = tasks._schedule_key("update_original_feed", self.o_feed.sid)
+
+    def dispatch(self):
+        O_Feed.objects.filter(pk=self.o_feed.pk).update(
+            next_poll_at=datetime.now(timezone.utc) - timedelta(minutes=1)
+        )
+        tasks.dispatch_due_feeds.call_local()
+
+    def test_scheduled_task_is_not_queued_twice(self):
+        tasks.schedule_task(tasks.update_original_feed, self.o_feed.sid, delay=10)
+        self.assertTrue(tasks.is_scheduled(tasks.update_original_feed, self.o_feed.sid))
+        self.schedule.reset_mock()
+        self.dispatch()
+        self.schedule.assert_not_called()
+
+    def test_entry_expires_after_eta(self):
+        tasks.schedule_task(tasks.update_original_feed, self.o_feed.sid, delay=10)
+        _, expires_at = self.huey.get(self.key, peek=True)
+        self.assertAlmostEqual(
+            expires_at,
+            datetime.now(timezone.utc).timestamp() + 10 + tasks.SCHEDULE_GRACE,
+            delta=5,
+        )
+
+    def test_lost_task_is_scheduled_again(self):
+        # queued long ago, the worker died before running it
+        expired = datetime.now(timezone.utc).timestamp() - 1
+        self.huey.put(self.key, ("lost-task-id", expired))
+        self.assertFalse(
+            tasks.is_scheduled(tasks.update_original_feed, self.o_feed.sid)
+        )
+        self.dispatch()
+        self.schedule.assert_called_once()
+        task_id, _ = self.huey.get(self.key, peek=True)
+        self.assertNotEqual(task_id, "lost-task-id")
+
+    def test_entry_without_expiry_is_stale(self):
+        self.huey.put(self.key, "legacy-task-id")
+        self.dispatch()
+        self.schedule.assert_called_once()
+
+    def test_running_task_drops_its_entry(self):
+        tasks.schedule_task(tasks.update_original_feed, self.o_feed.sid)
+        task_id, _ = self.huey.get(self.key, peek=True)
+        tasks._unregister(
+            "update_original_feed", self.o_feed.sid, mock.Mock(id=task_id)
+        )
+        self.assertIsNone(self.huey.get(self.key, peek=True))
+
+
+class DispatchTest(TestCase):
+    def setUp(self):
+        self.huey = MemoryHuey(utc=True)
+        for patcher in (
+            mock.patch.object(tasks, "huey", self.huey),
+            mock.patch.object(tasks.update_original_feed, "schedule"),
+            # the upper end of every random range: no jitter, no spread
+            mock.patch.object(tasks.random, "uniform", side_effect=lambda a, b: b),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.schedule = tasks.update_original_feed.schedule
+        self.now = datetime.now(timezone.utc)
+
+    def create(self, url: str, minutes_ago=None, **fields) -> O_Feed:
+        next_poll_at = (
+            None if minutes_ago is None else self.now - timedelta(minutes=minutes_ago)
+        )
+        return O_Feed.objects.create(
+            feed_url=url, update_frequency=30, next_poll_at=next_poll_at, **fields
+        )
+
+    def dispatched(self) -> list:
+        return [call.kwargs["args"][0] for call in self.schedule.call_args_list]
+
+    def test_only_due_feeds_are_dispatched(self):
+        due = self.create("https://example.com/due.xml", minutes_ago=1)
+        later = self.create("https://example.com/later.xml", minutes_ago=-10)
+        new = self.create("https://example.com/new.xml")
+        tasks.dispatch_due_feeds.call_local()
+        self.assertEqual(self.dispatched(), [due.sid])
+        due.refresh_from_db()
+        new.refresh_from_db()
+        later.refresh_from_db()
+        # the next poll is one interval away, the first one within an interval
+        jitter = 1 + tasks.POLL_JITTER
+        self.assertAlmostEqual(
+            (due.next_poll_at - self.now).total_seconds(), 30 * 60 * jitter, delta=5
+        )
+        self.assertAlmostEqual(
+            (new.next_poll_at - self.now).total_seconds(), 30 * 60, delta=5
+        )
+        self.assertEqual(later.next_poll_at, self.now + timedelta(minutes=10))
+
+    @mock.patch.object(tasks, "DISPATCH_BATCH_SIZE", 1)
+    def test_most_overdue_feed_first(self):
+        self.create("https://example.com/late.xml", minutes_ago=1)
+        overdue = self.create("https://example.com/overdue.xml", minutes_ago=60)
+        tasks.dispatch_due_feeds.call_local()
+        self.assertEqual(self.dispatched(), [overdue.sid])
+
+    def test_learned_interval_is_clamped(self):
+        fast = self.create(
+            "https://example.com/fast.xml",
+            minutes_ago=1,
+            poll_interval=5,
+            min_update_frequency=20,
+        )
+        slow = self.create(
+            "https://example.com/slow.xml",
+            minutes_ago=1,
+            poll_interval=600,
+            max_update_frequency=60,
+        )
+        tasks.dispatch_due_feeds.call_local()
+        for o_feed, minutes in ((fast, 20), (slow, 60)):
+            o_feed.refresh_from_db()
+            self.assertAlmostEqual(
+                (o_feed.next_poll_at - self.now).total_seconds(),
+                minutes * 60 * (1 + tasks.POLL_JITTER),
+                delta=5,
+            )
+
+    def test_rescheduling_revokes_the_queued_copy(self):
+        o_feed = self.create("https://example.com/feed.xml")
+        tasks.schedule_task(tasks.update_original_feed, o_feed.sid)
+        first_id = tasks._scheduled_id("update_original_feed", o_feed.sid)
+        tasks.schedule_task(tasks.update_original_feed, o_feed.sid)
+        second_id = tasks._scheduled_id("update_original_feed", o_feed.sid)
+        self.assertNotEqual(first_id, second_id)
+        self.assertTrue(self.huey.is_revoked(first_id))
+        self.assertFalse(self.huey.is_revoked(second_id))
+
+    def test_queued_within_the_grace_period(self):
+        o_feed = self.create("https://example.com/feed.xml", minutes_ago=1)
+        key = tasks._schedule_key("update_original_feed", o_feed.sid)
+        # its ETA passed, but it is still within SCHEDULE_GRACE
+        expires_at = self.now.timestamp() + tasks.SCHEDULE_GRACE / 2
+        self.huey.put(key, ("queued-task-id", expires_at))
+        self.assertEqual(
+            tasks._scheduled_id("update_original_feed", o_feed.sid), "queued-task-id"
+        )
+        tasks.dispatch_due_feeds.call_local()
+        self.schedule.assert_not_called()
+        o_feed.refresh_from_db()
+        self.assertGreater(o_feed.next_poll_at, self.now)
+
+
+def load_settings(**environ) -> dict:
+    """Evaluate config/settings.py again with the given environment variables."""
+    with mock.patch.dict(os.environ, environ):
+        return runpy.run_path(str(settings.BASE_DIR / "config" / "settings.py"))
+
+
+class MultiNodeTest(TestCase):
+    def build_huey(self, **environ):
+        """The configured Huey, as djhuey builds it, with a stand-in connection."""
+        config = dict(load_settings(**environ)["HUEY"])
+        config.pop("consumer")
+        huey_class = import_string(config.pop("huey_class"))
+        if config.pop("url", None):
+            import fakeredis
+
+            config.update(connection_pool=fakeredis.FakeRedis().connection_pool)
+        return huey_class("test", **config)
+
+    def assertPriorityOrder(self, huey):
+        run = []
+        for name, priority in (
+            ("translate", tasks.PRIORITY_TRANSLATE),
+            ("fetch", tasks.PRIORITY_FETCH),
+            ("admin", tasks.PRIORITY_ADMIN),
+        ):
+            task = huey.task(priority=priority, name=name)(
+                lambda name=name: run.append(name)
+            )
+            task()
+        while huey.pending_count():
+            huey.execute(huey.dequeue())
+        self.assertEqual(run, ["admin", "fetch", "translate"])
+
+    @skipUnless(find_spec("fakeredis"), "fakeredis is not installed")
+    def test_redis_backend(self):
+        huey = self.build_huey(
+            HUEY_REDIS_URL="redis://redis:6379/0",
+            DATABASE_URL="postgresql://rss:secret@db/rss",
+        )
+        self.assertEqual(type(huey.storage).__name__, "PriorityRedisStorage")
+        self.assertPriorityOrder(huey)
+
+    @skipUnless(find_spec("peewee"), "peewee is not installed")
+    def test_sql_backend(self):
+        with tempfile.TemporaryDirectory() as folder:
+            huey = self.build_huey(
+                HUEY_DATABASE_URL=f"sqlite:///{folder}/tasks.sqlite3",
+                DATABASE_URL="postgresql://rss:secret@db/rss",
+            )
+            self.assertEqual(type(huey.storage).__name__, "SqlStorage")
+            self.assertPriorityOrder(huey)
+            huey.storage.database.close()
+
+    def test_shared_database_is_required(self):
+        for environ in (
+            {"HUEY_REDIS_URL": "redis://redis:6379/0"},
+            {"HUEY_DATABASE_URL": "postgresql://rss:secret@db/tasks"},
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                load_settings(DATABASE_URL="", **environ)
+        self.assertIn("filename", load_settings(DATABASE_URL="")["HUEY"])
+
+    def test_lease_is_held_by_one_node(self):
+        lease = TaskLease.acquire("update_original_feed:sid", ttl=60)
+        self.assertIsNotNone(lease)
+        self.assertIsNone(TaskLease.acquire("update_original_feed:sid", ttl=60))
+        self.assertTrue(lease.renew(60))
+        lease.release()
+        self.assertIsNotNone(TaskLease.acquire("update_original_feed:sid", ttl=60))
+
+    def test_expired_lease_is_taken_over(self):
+        crashed = TaskLease.acquire("update_original_feed:sid", ttl=60)
+        TaskLease.objects.filter(key=crashed.key).update(
+            expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+        )
+        lease = TaskLease.acquire("update_original_feed:sid", ttl=60)
+        self.assertIsNotNone(lease)
+        # the crashed holder can neither renew nor release the new lease
+        self.assertFalse(crashed.renew(60))
+        crashed.release()
+        self.assertTrue(TaskLease.objects.filter(owner=lease.owner).exists())
+
+
+def dated_feed(minutes_apart: list) -> feedparser.FeedParserDict:
+    """Entries published `minutes_apart` before each other, newest first."""
+    published = datetime(2024, 1, 31, tzinfo=timezone.utc)
+    items = ""
+    for minutes in [0, *minutes_apart]:
+        published -= timedelta(minutes=minutes)
+        date = published.strftime("%a, %d %b %Y %H:%M:%S +0000")
+        items += f"<item><title>{minutes}</title><pubDate>{date}</pubDate></item>"
+    return feedparser.parse(f'<rss version="2.0"><channel>{items}</channel></rss>')
+
+
+class AdaptivePollingTest(SimpleTestCase):
+    def test_publish_cadence_is_the_median_gap(self):
+        self.assertEqual(feed_action.publish_cadence(dated_feed([60, 60, 600])), 60)
+        self.assertEqual(feed_action.publish_cadence(dated_feed([])), 0)
+
+    def test_publisher_interval(self):
+        feed = feedparser.parse(
+            '<rss version="2.0" xmlns:sy="http://purl.org/rss/1.0/modules/syndication/">'
+            "<channel><ttl>90</ttl><sy:updatePeriod>daily</sy:updatePeriod>"
+            "<sy:updateFrequency>2</sy:updateFrequency></channel></rss>"
+        )
+        self.assertEqual(feed_action.publisher_interval(feed), 720)
+        self.assertEqual(feed_action.publisher_interval(max_age=3600), 60)
+        self.assertEqual(feed_action.publisher_interval(), 0)
+
+    def test_changed_feed_polls_twice_per_cadence(self):
+        interval = feed_action.next_poll_interval(60, changed=True, cadence=40)
+        self.assertEqual(interval, 20)
+
+    def test_unchanged_feed_backs_off(self):
+        interval = feed_action.next_poll_interval(60, changed=False)
+        self.assertEqual(interval, 60 * feed_action.BACKOFF_FACTOR)
+
+    def test_bounds_and_publisher_hint(self):
+        next_poll_interval = feed_action.next_poll_interval
+        self.assertEqual(next_poll_interval(10, True, cadence=2, lower=5), 5)
+        self.assertEqual(next_poll_interval(1000, False, upper=1440), 1440)
+        self.assertEqual(next_poll_interval(10, True, cadence=2, hint=60), 60)
+        # a weekly feed isn't clamped when its bound allows it
+        self.assertEqual(next_poll_interval(10080, False, upper=10080), 10080)
+
+
+class UpdateFrequencyBoundsTest(TestCase):
+    def test_migration_widens_bounds(self):
+        migration = importlib.import_module(
+            "core.migrations.0027_o_feed_update_frequency_bounds"
+        )
+        weekly = O_Feed.objects.create(
+            feed_url="https://example.com/weekly.xml",
+            update_frequency=10080,
+            poll_interval=1440,
+        )
+        frequent = O_Feed.objects.create(
+            feed_url="https://example.com/frequent.xml", update_frequency=2
+        )
+        usual = O_Feed.objects.create(feed_url="https://example.com/usual.xml")
+        migration.bounds_from_update_frequency(apps, None)
+
+        weekly.refresh_from_db()
+        self.assertEqual(
+            (weekly.min_update_frequency, weekly.max_update_frequency), (5, 10080)
+        )
+        self.assertIsNone(weekly.poll_interval)
+        frequent.refresh_from_db()
+        self.assertEqual(frequent.min_update_frequency, 2)
+        usual.refresh_from_db()
+        self.assertEqual(
+            (usual.min_update_frequency, usual.max_update_frequency), (5, 1440)
+        )
+
+    def test_model_validation(self):
+        for bounds, field in (
+            ((0, 30, 1440), "min_update_frequency"),
+            ((60, 30, 10), "max_update_frequency"),
+            ((5, 10080, 1440), "update_frequency"),
+        ):
+            o_feed = O_Feed(feed_url="https://example.com/feed.xml")
+            (
+                o_feed.min_update_frequency,
+                o_feed.update_frequency,
+                o_feed.max_update_frequency,
+            ) = bounds
+            with self.subTest(bounds=bounds):
+                with self.assertRaises(ValidationError) as context:
+                    o_feed.clean()
+                self.assertIn(field, context.exception.message_dict)
+
+    def test_form_validation(self):
+        data = {
+            "feed_url": "https://example.com/feed.xml",
+            "update_frequency": 30,
+            "min_update_frequency": 60,
+            "max_update_frequency": 10,
+            "max_posts": 20,
+            "translation_display": 0,
+            "summary_detail": 0,
+            "summary_mode": O_Feed.SUMMARY_SEQUENTIAL,
+        }
+        form = O_FeedForm(data=data)
+        self.assertFalse(form.is_valid())
+        self.assertIn("max_update_frequency", form.errors)
+        data.update(min_update_frequency=5, max_update_frequency=1440)
+        self.assertTrue(O_FeedForm(data=data).is_valid(), O_FeedForm(data=data).errors)
+
+
+GEVENT_SCRIPT = """
+from gevent import monkey
+
+monkey.patch_all()
+
+import os
+import time
+
+import django
+
+os.environ["CPU_WORKERS"] = "2"
+os.environ["ENGINE_WORKERS"] = "4"
+django.setup()
+
+import gevent
+from utils import executors
+
+assert executors.gevent_active()
+started = time.monotonic()
+results = executors.map_io(
+    lambda item: (time.sleep(0.3), type(gevent.getcurrent()).__name__, item)[1:],
+    range(4),
+)
+elapsed = time.monotonic() - started
+assert elapsed < 0.9, elapsed
+assert results == [("Greenlet", item) for item in range(4)], results
+assert executors.run_cpu(pow, 2, 10) == 1024
+print("ok")
+"""
+
+
+class SqliteTest(TransactionTestCase):
+    """The WAL checkpoint can't run inside the transaction of a TestCase."""
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def pragma(self, conn, name: str):
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+    def huey(self) -> sqlite.TunedSqliteHuey:
+        huey = sqlite.TunedSqliteHuey("test", filename=f"{self.folder}/tasks.sqlite3")
+        self.addCleanup(huey.storage.conn.close)
+        return huey
+
+    def test_django_connection_is_tuned(self):
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 10000)
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)  # normal
+
+    def test_database_file_uses_wal(self):
+        conn = sqlite3.connect(f"{self.folder}/db.sqlite3")
+        self.addCleanup(conn.close)
+        sqlite.apply_pragmas(conn)
+        self.assertEqual(self.pragma(conn, "journal_mode"), "wal")
+
+    def test_task_storage_is_tuned(self):
+        conn = self.huey().storage.conn
+        self.assertEqual(self.pragma(conn, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(conn, "busy_timeout"), 10000)
+        self.assertEqual(self.pragma(conn, "synchronous"), 1)
+
+    def test_maintenance_truncates_the_wal(self):
+        huey = self.huey()
+        for i in range(20):
+            huey.put(f"key{i}", "x" * 1000)
+        wal = f"{self.folder}/tasks.sqlite3-wal"
+        self.assertGreater(os.path.getsize(wal), 0)
+        with mock.patch.object(tasks, "huey", huey), mock.patch.object(
+            sqlite, "maintain", wraps=sqlite.maintain
+        ) as maintain:
+            tasks.sqlite_maintenance.call_local()
+        # the Django database and the task storage
+        self.assertEqual(
+            maintain.call_args_list,
+            [mock.call(connection), mock.call(huey.storage.conn)],
+        )
+        self.assertEqual(os.path.getsize(wal), 0)
+
+
+class ExecutorsTest(SimpleTestCase):
+    @override_settings(ENGINE_WORKERS=4)
+    def test_map_io_runs_concurrently(self):
+        started = time.monotonic()
+        results = executors.map_io(lambda item: time.sleep(0.3) or item, range(4))
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(results, [0, 1, 2, 3])
+
+    @override_settings(ENGINE_WORKERS=4)
+    def test_map_io_keeps_context(self):
+        with metrics.observe_task("test"):
+            metrics.set_labels(feed="https://example.com/feed.xml")
+            labels = executors.map_io(lambda item: metrics._label("feed"), range(3))
+        self.assertEqual(labels, ["https://example.com/feed.xml"] * 3)
+
+    @override_settings(CPU_WORKERS=1)
+    def test_bozo_feed_in_process_pool(self):
+        self.addCleanup(setattr, executors, "_process_pool", None)
+        self.addCleanup(executors.get_process_pool().shutdown)
+        xml = feed_xml([("Caf&nbsp;story", "<p>Content</p>")])
+        feed = executors.run_cpu(feed_action.parse_feed, xml)
+        self.assertTrue(feed.bozo)
+        self.assertIsInstance(feed.bozo_exception, str)
+        self.assertEqual(len(feed.entries), 1)
+
+    def test_under_gevent(self):
+        # monkey-patching can't be undone, run like the huey consumer in a child
+        result = subprocess.run(
+            [sys.executable, "-c", GEVENT_SCRIPT],
+            capture_output=True,
+            text=True,
+            timeout=120,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings"},
+            cwd=settings.BASE_DIR,
+        )
+        self.assertEqual(result.stdout.strip(), "ok", result.stderr[-2000:])
+
+
+@skipIf(not metrics.enabled(), "prometheus-client is not installed")
+class MetricsTest(TestCase):
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"rsstranslator_queue_depth", response.content)
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get("/metrics/").status_code, 401)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_login_without_token(self):
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 302)
+        user = get_user_model().objects.create_user("admin", password="password")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/metrics/").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_disabled(self):
+        with mock.patch.object(metrics, "enabled", return_value=False):
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch.object(metrics, "TASK_FAILURES")
+    @mock.patch.object(metrics, "TASK_SECONDS")
+    def test_task_failures(self, seconds, failures):
+        with metrics.observe_task("update") as observation:
+            metrics.set_labels(feed="feed", language="French")
+        with metrics.observe_task("update") as observation:
+            observation.failed = True
+        with self.assertRaises(ValueError):
+            with metrics.observe_task("update"):
+                raise ValueError
+        self.assertEqual(seconds.labels.call_count, 3)
+        seconds.labels.assert_any_call("update", "feed", "French")
+        self.assertEqual(
+            failures.labels.call_args_list, [mock.call("update", "", "")] * 2
+        )
+        self.assertEqual(failures.labels.return_value.inc.call_count, 2)
+        self.assertEqual(metrics._labels.get(), {})  # labels don't leak
+
+    @mock.patch.object(metrics, "ENGINE_FAILURES")
+    @mock.patch.object(metrics, "ENGINE_TOKENS")
+    def test_request_tokens(self, tokens, failures):
+        with metrics.observe_task("update"):
+            metrics.set_labels(feed="feed", language="French")
+            metrics.observe_request(
+                "engine",
+                "translate",
+                1,
+                {"text": "t", "tokens": 10, "output_tokens": 4},
+            )
+            metrics.observe_request(
+                "engine", "translate", 1, {"text": "t", "tokens": 7}
+            )
+            metrics.observe_request(
+                "engine", "translate", 1, {"text": "t", "characters": 5}
+            )
+            metrics.observe_request("engine", "translate", 1, None)
+        labels = ("engine", "feed", "French")
+        self.assertEqual(
+            tokens.labels.call_args_list,
+            [
+                mock.call(*labels, "input"),
+                mock.call(*labels, "output"),
+                mock.call(*labels, "total"),
+                mock.call(*labels, "total"),
+            ],
+        )
+        self.assertEqual(
+            tokens.labels.return_value.inc.call_args_list,
+            [mock.call(6), mock.call(4), mock.call(7), mock.call(5)],
+        )
+        failures.labels.assert_called_once_with("engine", "translate", "feed", "French")
+
+    @mock.patch.object(metrics, "CACHE_LOOKUPS")
+    def test_cache(self, lookups):
+        metrics.observe_cache(hits=2, misses=0)
+        lookups.labels.assert_called_once_with("", "", "hit")
+        lookups.labels.return_value.inc.assert_called_once_with(2)
+
+    def test_queue_depth(self):
+        from huey.contrib.djhuey import HUEY
+
+        with mock.patch.object(
+            HUEY, "pending_count", return_value=3
+        ), mock.patch.object(HUEY, "scheduled_count", return_value=1):
+            (depth,) = metrics.QueueCollector().collect()
+        samples = {sample.labels["state"]: sample.value for sample in depth.samples}
+        self.assertEqual(samples, {"pending": 3, "scheduled": 1})
@@ -50,7 +50,9 @@ def import_opml(request):
 
 def get_modified(request, feed_sid):
     try:
-        modified = T_Feed.objects.get(sid=feed_sid).modified
+        modified = T_Feed.objects.values_list("modified", flat=True).get(
+            sid=feed_sid
+        )
     except T_Feed.DoesNotExist:
         logging.warning(
             "Translated feed not found, Maybe still in progress, Please confirm it's exist: %s",
@@ -62,7 +64,9 @@ def get_modified(request, feed_sid):
 
 def get_etag(request, feed_sid):
     try:
-        modified = T_Feed.objects.get(sid=feed_sid).modified
+        modified = T_Feed.objects.values_list("modified", flat=True).get(
+            sid=feed_sid
+        )
     except T_Feed.DoesNotExist:
         logging.warning(
             "Translated feed not found, Maybe still in progress, Please confirm it's exist: %s",
@@ -79,7 +83,7 @@ def rss(request, feed_sid):
     feed_sid = smart_str(feed_sid)
 
     # feed_file_path = os.path.join(settings.DATA_FOLDER, "feeds", f"{feed_sid}.xml")
-    base_path = os.path.join(settings.DATA_FOLDER, "feeds")
+    base_path = settings.FEEDS_FOLDER
     feed_file_path = check_file_path(base_path=base_path, filename=f"{feed_sid}.xml")
     # Check if the file exists and if not, raise a 404 error
     if not os.path.exists(feed_file_path):
@@ -119,7 +123,7 @@ def rss(request, feed_sid):
 def rss_json(request, feed_sid):
     # Sanitize the feed_sid to prevent path traversal attacks
     feed_sid = smart_str(feed_sid)
-    base_path = os.path.join(settings.DATA_FOLDER, "feeds")
+    base_path = settings.FEEDS_FOLDER
     feed_file_path = check_file_path(base_path, f"{feed_sid}.json")
     content_type = "application/json; charset=utf-8"
 
@@ -156,7 +160,7 @@ def all(request, name):
         # get all feed file path from feeds.sid
         feed_file_paths = get_feed_file_paths(feeds)
         merge_all_atom(feed_file_paths, "all_t")
-        base_path = os.path.join(settings.DATA_FOLDER, "feeds")
+        base_path = settings.FEEDS_FOLDER
         # merge_file_path = os.path.join(settings.DATA_FOLDER, "feeds", "all_t.xml")
         merge_file_path = check_file_path(base_path, "all_t.xml")
         response = StreamingHttpResponse(
@@ -187,7 +191,7 @@ def category(request, category: str):
         # feed_file_paths = [os.path.join(settings.DATA_FOLDER, 'feeds', f'{feed.sid}.xml') for feed in feeds]
         feed_file_paths = get_feed_file_paths(feeds)
         merge_all_atom(feed_file_paths, category)
-        base_path = os.path.join(settings.DATA_FOLDER, "feeds")
+        base_path = settings.FEEDS_FOLDER
         # merge_file_path = os.path.join(settings.DATA_FOLDER, "feeds", f"{category}.xml")
         merge_file_path = check_file_path(base_path, f"{category}.xml")
         response = StreamingHttpResponse(
@@ -205,7 +209,7 @@ def category(request, category: str):
 
 
 def get_feed_file_paths(feeds: list) -> list:
-    feed_file_dir = os.path.abspath(os.path.join(settings.DATA_FOLDER, "feeds"))
+    feed_file_dir = os.path.abspath(settings.FEEDS_FOLDER)
     feed_file_paths = []
 
     for feed in feeds:
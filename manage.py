@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 """Django's command-line utility for administrative tasks."""
 
+import atexit
 import os
+import shutil
 import sys
+import tempfile
 
 # Apply monkey-patch if we are running the huey consumer.
 if "run_huey" in sys.argv:
@@ -10,6 +13,12 @@ if "run_huey" in sys.argv:
 
     monkey.patch_all()
 
+# Keep the metric samples of the test run out of the data folder.
+if "test" in sys.argv:
+    metrics_dir = tempfile.mkdtemp(prefix="rsstranslator-metrics-")
+    atexit.register(shutil.rmtree, metrics_dir, ignore_errors=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
 
 def main():
     """Run administrative tasks."""
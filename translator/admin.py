@@ -60,6 +60,9 @@ class OpenAITranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -89,6 +92,9 @@ class AzureAITranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -105,7 +111,7 @@ class AzureAITranslatorAdmin(BaseTranslatorAdmin):
 
 
 class DeepLTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "api_key", "server_url", "proxy", "max_characters"]
+    fields = ["name", "api_key", "server_url", "proxy", "max_characters", "rpm", "tpm"]
     list_display = [
         "name",
         "is_valid",
@@ -117,18 +123,18 @@ class DeepLTranslatorAdmin(BaseTranslatorAdmin):
 
 
 class DeepLXTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "deeplx_api", "interval", "max_characters"]
-    list_display = ["name", "is_valid", "deeplx_api", "interval", "max_characters"]
+    fields = ["name", "deeplx_api", "max_characters", "rpm", "tpm"]
+    list_display = ["name", "is_valid", "deeplx_api", "rpm", "max_characters"]
 
 
 # @admin.register(DeepLWebTranslator)
 class DeepLWebTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "interval", "proxy", "max_characters"]
-    list_display = ["name", "is_valid", "interval", "proxy", "max_characters"]
+    fields = ["name", "proxy", "max_characters", "rpm", "tpm"]
+    list_display = ["name", "is_valid", "rpm", "proxy", "max_characters"]
 
 
 class MicrosoftTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "api_key", "location", "endpoint", "max_characters"]
+    fields = ["name", "api_key", "location", "endpoint", "max_characters", "rpm", "tpm"]
     list_display = [
         "name",
         "is_valid",
@@ -140,7 +146,7 @@ class MicrosoftTranslatorAdmin(BaseTranslatorAdmin):
 
 
 class CaiYunTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "token", "url", "max_characters"]
+    fields = ["name", "token", "url", "max_characters", "rpm", "tpm"]
     list_display = ["name", "is_valid", "masked_api_key", "url", "max_characters"]
 
 
@@ -156,7 +162,8 @@ class GeminiTranslatorAdmin(BaseTranslatorAdmin):
         "top_p",
         "top_k",
         "max_tokens",
-        "interval",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -167,18 +174,18 @@ class GeminiTranslatorAdmin(BaseTranslatorAdmin):
         "content_translate_prompt",
         "summary_prompt",
         "max_tokens",
-        "interval",
+        "rpm",
     ]
 
 
 class GoogleTranslateWebTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "base_url", "interval", "proxy", "max_characters"]
+    fields = ["name", "base_url", "proxy", "max_characters", "rpm", "tpm"]
     list_display = [
         "name",
         "is_valid",
         "base_url",
         "proxy",
-        "interval",
+        "rpm",
         "max_characters",
     ]
 
@@ -196,7 +203,10 @@ class ClaudeTranslatorAdmin(BaseTranslatorAdmin):
         "top_p",
         "top_k",
         "max_tokens",
+        "stream",
         "proxy",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -225,6 +235,9 @@ class MoonshotAITranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -253,6 +266,9 @@ class TogetherAITranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -281,6 +297,9 @@ class OpenRouterAITranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -309,6 +328,9 @@ class GroqTranslatorAdmin(BaseTranslatorAdmin):
         "frequency_penalty",
         "presence_penalty",
         "max_tokens",
+        "stream",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -327,6 +349,8 @@ class FreeTranslatorsAdmin(BaseTranslatorAdmin):
         "name",
         "proxies",
         "max_characters",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -344,6 +368,8 @@ class DoubaoTranslatorAdmin(BaseTranslatorAdmin):
         "content_translate_prompt",
         "summary_prompt",
         "max_tokens",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -363,6 +389,8 @@ class OpenlTranslatorAdmin(BaseTranslatorAdmin):
         "url",
         "service_name",
         "max_characters",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -380,6 +408,8 @@ class KagiTranslatorAdmin(BaseTranslatorAdmin):
         "summary_type",
         "translate_prompt",
         "content_translate_prompt",
+        "rpm",
+        "tpm",
     ]
     list_display = [
         "name",
@@ -415,8 +445,8 @@ class Translated_ContentAdmin(admin.ModelAdmin):
 
 
 class TestTranslatorAdmin(BaseTranslatorAdmin):
-    fields = ["name", "translated_text", "max_characters", "interval"]
-    list_display = ["name", "is_valid", "translated_text", "max_characters", "interval"]
+    fields = ["name", "translated_text", "max_characters", "rpm", "tpm"]
+    list_display = ["name", "is_valid", "translated_text", "max_characters", "rpm"]
 
 
 core_admin_site.register(OpenAITranslator, OpenAITranslatorAdmin)
@@ -0,0 +1,93 @@
+import re
+from typing import Optional
+
+import deepl
+
+from utils.rate_limiter import parse_retry_after
+
+
+class TranslatorError(Exception):
+    """Base class for errors raised by translator engines."""
+
+
+class TransientError(TranslatorError):
+    """Temporary failure (timeout, connection error, 5xx), safe to retry."""
+
+
+class RateLimitedError(TransientError):
+    """The provider rejected the request because of rate limits (429)."""
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(TransientError):
+    """The engine's circuit breaker is open, the call was not attempted."""
+
+
+class PermanentError(TranslatorError):
+    """
+    The request will fail again if retried (oversized chunk, content filter...),
+    the text keeps its original.
+    """
+
+
+class ConfigurationError(PermanentError):
+    """Every request will fail: bad API key, unsupported language, invalid model..."""
+
+
+# a 400/422 naming one of these is about the engine settings, not the request
+CONFIGURATION_PATTERN = re.compile(
+    r"model_not_found"
+    r"|\b(invalid|unknown|unsupported) model\b"
+    r"|\bmodel\b[^.]*\b(not found|does not exist|not supported|unsupported)\b"
+    r"|\b(invalid|unsupported) (source |target )?language\b"
+    r"|\blanguage\b[^.]*\b(not supported|unsupported)\b",
+    re.IGNORECASE,
+)
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    # openai / anthropic APIStatusError
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    # httpx.HTTPStatusError
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    # google.api_core GoogleAPICallError
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    return parse_retry_after(headers.get("retry-after")) if headers else None
+
+
+def classify_error(exc: Exception) -> TranslatorError:
+    """Map an exception raised by a provider SDK or HTTP client to a typed error."""
+    if isinstance(exc, TranslatorError):
+        return exc
+    message = str(exc) or exc.__class__.__name__
+
+    if isinstance(exc, deepl.TooManyRequestsException):
+        return RateLimitedError(message)
+    if isinstance(exc, (deepl.AuthorizationException, deepl.QuotaExceededException)):
+        return ConfigurationError(message)
+
+    status_code = _status_code(exc)
+    if status_code == 429:
+        return RateLimitedError(message, retry_after=_retry_after(exc))
+    if status_code in (401, 402, 403, 404):  # key, billing, permission, model/endpoint
+        return ConfigurationError(message)
+    if status_code is not None and 400 <= status_code < 500:
+        if status_code not in (408, 409, 425):
+            if CONFIGURATION_PATTERN.search(message):
+                return ConfigurationError(message)
+            return PermanentError(message)
+    # timeouts, connection errors, 5xx and anything unexpected
+    return TransientError(message)
@@ -0,0 +1,239 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:30
+
+from django.db import migrations, models
+
+
+def interval_to_rpm(apps, schema_editor):
+    # Request Interval(s) -> Requests Per Minute
+    for model_name in [
+        "deeplwebtranslator",
+        "deeplxtranslator",
+        "geminitranslator",
+        "googletranslatewebtranslator",
+        "testtranslator",
+    ]:
+        model = apps.get_model("translator", model_name)
+        for engine in model.objects.all():
+            engine.rpm = 60 // engine.interval if engine.interval > 0 else 0
+            engine.save(update_fields=["rpm"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translator', '0040_alter_kagitranslator_summarization_engine_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='azureaitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='azureaitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='caiyuntranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='caiyuntranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='claudetranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='claudetranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deepltranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deepltranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deeplwebtranslator',
+            name='rpm',
+            field=models.IntegerField(default=12, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deeplwebtranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deeplxtranslator',
+            name='rpm',
+            field=models.IntegerField(default=20, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='deeplxtranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='doubaotranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='doubaotranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='freetranslators',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='freetranslators',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='geminitranslator',
+            name='rpm',
+            field=models.IntegerField(default=20, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='geminitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='googletranslatewebtranslator',
+            name='rpm',
+            field=models.IntegerField(default=60, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='googletranslatewebtranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='groqtranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='groqtranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='kagitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='kagitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='microsofttranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='microsofttranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='moonshotaitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='moonshotaitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openaitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openaitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openltranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openltranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openrouteraitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='openrouteraitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='testtranslator',
+            name='rpm',
+            field=models.IntegerField(default=20, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='testtranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='togetheraitranslator',
+            name='rpm',
+            field=models.IntegerField(default=0, help_text='0 means unlimited', verbose_name='Requests Per Minute'),
+        ),
+        migrations.AddField(
+            model_name='togetheraitranslator',
+            name='tpm',
+            field=models.IntegerField(default=0, help_text='Tokens (characters for non-AI engines), 0 means unlimited', verbose_name='Tokens Per Minute'),
+        ),
+        migrations.RunPython(interval_to_rpm, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='deeplwebtranslator',
+            name='interval',
+        ),
+        migrations.RemoveField(
+            model_name='deeplxtranslator',
+            name='interval',
+        ),
+        migrations.RemoveField(
+            model_name='geminitranslator',
+            name='interval',
+        ),
+        migrations.RemoveField(
+            model_name='googletranslatewebtranslator',
+            name='interval',
+        ),
+        migrations.RemoveField(
+            model_name='testtranslator',
+            name='interval',
+        ),
+    ]
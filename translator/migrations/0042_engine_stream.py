@@ -0,0 +1,48 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translator', '0041_engine_rate_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='azureaitranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='claudetranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='groqtranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='moonshotaitranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='openaitranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='openrouteraitranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+        migrations.AddField(
+            model_name='togetheraitranslator',
+            name='stream',
+            field=models.BooleanField(default=False, help_text='Stream responses, output received before a timeout is kept and only the missing tail is translated again', verbose_name='Streaming'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.8 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translator', '0042_engine_stream'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='azureaitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='claudetranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='doubaotranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='geminitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='groqtranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='kagitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='moonshotaitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='openaitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='openrouteraitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+        migrations.AlterField(
+            model_name='togetheraitranslator',
+            name='content_translate_prompt',
+            field=models.TextField(default='You are a professional, authentic translation engine. Translate only the text into {target_language}, keep every line on its own line and the <t1>, </t1>, <t2/> style tags where they belong, return only the translations, do not explain the original text.', verbose_name='Content Translate Prompt'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import html
 import logging
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -5,12 +6,54 @@ import cityhash
 from config import settings
 from openai import OpenAI
 from encrypted_model_fields.fields import EncryptedCharField
+from utils import metrics, text_handler
+from utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from utils.rate_limiter import RateLimiter, get_rate_limiter
+from ..exceptions import (
+    RateLimitedError,
+    TransientError,
+    TranslatorError,
+    classify_error,
+)
+
+MAX_CONTINUATIONS = 5  # follow-up requests for the tail of a truncated response
+# a streamed response this many times longer than its source is a runaway generation
+STREAM_CUTOFF_RATIO = 5
 
 
 class TranslatorEngine(models.Model):
     name = models.CharField(_("Name"), max_length=100, unique=True)
     valid = models.BooleanField(_("Valid"), null=True)
     is_ai = models.BooleanField(default=False, editable=False)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=0, help_text=_("0 means unlimited")
+    )
+    tpm = models.IntegerField(
+        _("Tokens Per Minute"),
+        default=0,
+        help_text=_("Tokens (characters for non-AI engines), 0 means unlimited"),
+    )
+    # how the <tN> placeholders of content segments reach the engine: "tags" as
+    # they are, "xml" with the engine's XML tag handling, "text" stripped
+    segment_markup = "text"
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        # shared by every task in this process that uses the same engine
+        return get_rate_limiter(
+            f"{self._meta.label_lower}:{self.pk}", self.rpm, self.tpm
+        )
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return get_circuit_breaker(f"{self._meta.label_lower}:{self.pk}")
+
+    def handle_error(self, exc: Exception) -> TranslatorError:
+        """Classify a provider exception and slow the rate limiter down on 429."""
+        error = classify_error(exc)
+        if isinstance(error, RateLimitedError):
+            self.rate_limiter.on_rate_limited(error.retry_after)
+        return error
 
     def translate(
         self,
@@ -24,6 +67,91 @@ class TranslatorEngine(models.Model):
             "subclasses of TranslatorEngine must provide a translate() method"
         )
 
+    def translate_segments(self, text: str, target_language: str, **kwargs) -> dict:
+        """
+        Translate a group of content_split segments. The translation is in the
+        format of the segments, with placeholders when the engine kept them.
+        """
+        if self.segment_markup == "xml":
+            kwargs["tag_handling"] = "xml"
+        elif self.segment_markup == "tags":
+            if "<t1>" not in self.content_translate_prompt:
+                kwargs.setdefault("user_prompt", text_handler.SEGMENT_PROMPT)
+        else:
+            results = self.translate(
+                text_handler.segments_to_text(text), target_language, **kwargs
+            )
+            if results and results.get("text"):
+                results["text"] = html.escape(results["text"], quote=False)
+            return results
+        return self.translate(text, target_language, **kwargs)
+
+    @staticmethod
+    def estimate_usage(prompt: str, output: str) -> tuple:
+        """
+        (tokens, output_tokens) of a request the provider reported no usage for,
+        e.g. an interrupted stream, so that it is still billed and rate limited.
+        """
+        output_tokens = text_handler.count_tokens(output)
+        return text_handler.count_tokens(prompt) + output_tokens, output_tokens
+
+    def _translate_with_continuation(self, text: str, complete) -> dict:
+        """
+        Translate `text` with
+        `complete(source) -> (text, truncated, tokens, cached_tokens, output_tokens)`.
+
+        When a response is truncated (max tokens, interrupted stream) its complete
+        paragraphs are kept and only the missing tail is sent again. A tail
+        truncated before its first paragraph ends is translated in two halves.
+        """
+        parts = []
+        tokens = 0
+        cached_tokens = 0
+        output_tokens = 0
+        source = text
+        for _ in range(MAX_CONTINUATIONS + 1):
+            translated_text, truncated, used_tokens, used_cached_tokens, used_output = (
+                complete(source)
+            )
+            tokens += used_tokens
+            cached_tokens += used_cached_tokens
+            output_tokens += used_output
+            if not truncated:
+                parts.append(translated_text)
+                break
+            done, source = text_handler.split_truncated(source, translated_text)
+            if not done:
+                halves = text_handler.bisect_text(source)
+                if not halves:
+                    raise TransientError("Truncated response of a single sentence")
+                first, second, separator = halves
+                results = [
+                    self._translate_with_continuation(half, complete)
+                    for half in (first, second)
+                ]
+                parts.append(separator.join(result["text"] for result in results))
+                tokens += sum(result["tokens"] for result in results)
+                cached_tokens += sum(result["cached_tokens"] for result in results)
+                output_tokens += sum(result["output_tokens"] for result in results)
+                break
+            parts.append(done)
+            logging.warning(
+                "%s: truncated response, continue with the remaining %d characters",
+                self,
+                len(source),
+            )
+        else:
+            raise TransientError(
+                f"Response still truncated after {MAX_CONTINUATIONS} continuations"
+            )
+
+        return {
+            "text": "\n\n".join(parts),
+            "tokens": tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+        }
+
     def min_size(self) -> int:
         if hasattr(self, "max_characters"):
             return self.max_characters
@@ -64,20 +192,79 @@ class Translated_Content(models.Model):
     def __str__(self):
         return self.original_content
 
+    @staticmethod
+    def cache_hash(key: str, target_language: str) -> str:
+        return str(cityhash.CityHash128(f"{key}{target_language}"))
+
     @classmethod
     def is_translated(cls, text, target_language):
-        text_hash = str(cityhash.CityHash128(f"{text}{target_language}"))
-        try:
-            content = Translated_Content.objects.get(hash=text_hash)
-            # logging.info("Using cached translations:%s", text)
-            return {
-                "text": content.translated_content,
-                "tokens": content.tokens,
-                "characters": content.characters,
-            }
-        except Translated_Content.DoesNotExist:
+        translation = cls.get_translations([text], target_language).get(text)
+        if not translation:
             logging.info("Does not exist in cache:%s", text)
-            return None
+        return translation
+
+    @classmethod
+    def get_translations(cls, texts, target_language) -> dict:
+        """
+        Cached translations of `texts` with a single query, keyed by text.
+        A text matches by its canonical form (see text_handler.cache_template),
+        with its own URLs and numbers put back, or else by its normalized form.
+        """
+        lookups = {}  # hash -> [(text, values of the canonical form or None)]
+        for text in texts:
+            key, values = text_handler.cache_template(text)
+            lookups.setdefault(cls.cache_hash(key, target_language), []).append(
+                (text, values)
+            )
+            lookups.setdefault(
+                cls.cache_hash(text_handler.normalize_text(text), target_language), []
+            ).append((text, None))
+
+        translations = {}
+        for content in cls.objects.filter(hash__in=lookups).only(
+            "hash", "translated_content", "tokens", "characters"
+        ):
+            for text, values in lookups[content.hash]:
+                translation = {
+                    "text": content.translated_content,
+                    "tokens": content.tokens,
+                    "characters": content.characters,
+                }
+                if values is None:
+                    translations.setdefault(text, translation)
+                else:
+                    translation["text"] = text_handler.fill_template(
+                        translation["text"], values
+                    )
+                    translations[text] = translation
+        metrics.observe_cache(len(translations), len(set(texts)) - len(translations))
+        return translations
+
+    @classmethod
+    def for_cache(
+        cls,
+        text: str,
+        target_language: str,
+        translation: str,
+        tokens: int = 0,
+        characters: int = 0,
+    ) -> "Translated_Content":
+        """
+        Cache entry of a translation, in canonical form when the translation
+        kept the URLs and numbers of the text, so it serves every variant of them.
+        """
+        key, values = text_handler.cache_template(text)
+        template = text_handler.templatize(translation, values)
+        if template is None:
+            key, template = text_handler.normalize_text(text), translation
+        return cls(
+            hash=cls.cache_hash(key, target_language),
+            original_content=key,
+            translated_language=target_language,
+            translated_content=template,
+            tokens=tokens,
+            characters=characters,
+        )
 
     def save(self, *args, **kwargs):
         if not self.hash:
@@ -92,6 +279,7 @@ class Translated_Content(models.Model):
 
 class OpenAIInterface(TranslatorEngine):
     is_ai = models.BooleanField(default=True, editable=False)
+    segment_markup = "tags"
     api_key = EncryptedCharField(_("API Key"), max_length=255)
     base_url = models.URLField(_("API URL"), default="https://api.openai.com/v1")
     model = models.CharField(
@@ -111,9 +299,21 @@ class OpenAIInterface(TranslatorEngine):
     frequency_penalty = models.FloatField(default=0)
     presence_penalty = models.FloatField(default=0)
     max_tokens = models.IntegerField(default=2000)
+    stream = models.BooleanField(
+        _("Streaming"),
+        default=False,
+        help_text=_(
+            "Stream responses, output received before a timeout is kept and only the missing tail is translated again"
+        ),
+    )
 
     summary_prompt = models.TextField(default=settings.default_summary_prompt)
 
+    extra_headers = {
+        "HTTP-Referer": "https://www.rsstranslator.com",
+        "X-Title": "RSS Translator",
+    }
+
     class Meta:
         abstract = True
 
@@ -124,6 +324,33 @@ class OpenAIInterface(TranslatorEngine):
             timeout=120.0,
         )
 
+    def _build_messages(
+        self,
+        system_prompt: str,
+        text: str,
+        translate_title: str = "",
+        text_type: str = "content",
+    ) -> list:
+        # Stable parts first: the system prompt and the article title are the same
+        # for every chunk of an article, so provider-side prompt caching can reuse them.
+        # OpenAI only caches prefixes of 1024 tokens or more, i.e. long custom prompts.
+        messages = [{"role": "system", "content": system_prompt}]
+        if translate_title:
+            messages.append(
+                {"role": "user", "content": "文章的标题：" + translate_title}
+            )
+        messages.append({"role": "user", "content": "段落的内容：" + text})
+        return messages
+
+    @staticmethod
+    def _cached_tokens(usage) -> int:
+        details = getattr(usage, "prompt_tokens_details", None)
+        return getattr(details, "cached_tokens", 0) or 0
+
+    @staticmethod
+    def _output_tokens(usage) -> int:
+        return getattr(usage, "completion_tokens", 0) or 0
+
     def validate(self) -> bool:
         if self.api_key:
             try:
@@ -146,15 +373,14 @@ class OpenAIInterface(TranslatorEngine):
         self,
         text: str,
         target_language: str,
-        translate_title: str,
+        translate_title: str = "",
         system_prompt: str = None,
         user_prompt: str = None,
         text_type: str = "title",
+        **kwargs,
     ) -> dict:
         logging.info(">>> Translate [%s]: %s", target_language, text)
         client = self._init()
-        tokens = 0
-        translated_text = ""
         system_prompt = (
             system_prompt or self.translate_prompt
             if text_type == "title"
@@ -165,43 +391,114 @@ class OpenAIInterface(TranslatorEngine):
             if user_prompt:
                 system_prompt += f"\n\n{user_prompt}"
 
-            prompt_title = "文章的标题：" + translate_title
-            prompt_text = "段落的内容：" + text
-
-            res = client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": "https://www.rsstranslator.com",
-                    "X-Title": "RSS Translator",
-                },
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt_title},
-                    {"role": "user", "content": prompt_text},
-                ],
-                temperature=self.temperature,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-            )
-            if res.choices[0].finish_reason == "stop" or res.choices[0].message.content:
-                logging.info(
-                    "OpenAITranslator->%s: %s", res.choices[0].finish_reason, text
+            def complete(source: str) -> tuple:
+                messages = self._build_messages(
+                    system_prompt, source, translate_title, text_type
                 )
-                translated_text = res.choices[0].message.content
-                logging.info(
-                    "OpenAITranslator->%s: %s",
-                    res.choices[0].finish_reason,
-                    translated_text,
-                )
-            # else:
-            #     translated_text = ''
-            #     logging.warning("Translator->%s: %s", res.choices[0].finish_reason, text)
-            tokens = res.usage.total_tokens if res.usage else 0
+                return self._complete(client, messages, source)
+
+            if text_type == "content":
+                return self._translate_with_continuation(text, complete)
+
+            # titles and summaries don't map paragraph by paragraph to the source
+            translated_text, truncated, tokens, cached_tokens, output_tokens = (
+                complete(text)
+            )
+            if truncated:
+                logging.warning("OpenAITranslator->truncated response: %s", text)
         except Exception as e:
             logging.error("ErrorTranslator->%s: %s", e, text)
+            raise self.handle_error(e) from e
+
+        return {
+            "text": translated_text,
+            "tokens": tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+        }
+
+    def _complete(self, client, messages: list, source: str) -> tuple:
+        """
+        Run one chat completion.
+        Returns (text, truncated, tokens, cached_tokens, output_tokens).
+        """
+        limiter = self.rate_limiter
+        params = dict(
+            extra_headers=self.extra_headers,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            frequency_penalty=self.frequency_penalty,
+            presence_penalty=self.presence_penalty,
+        )
+        limiter.acquire()
+        if not self.stream:
+            res = client.chat.completions.create(**params)
+            finish_reason = res.choices[0].finish_reason
+            translated_text = res.choices[0].message.content or ""
+            logging.info("OpenAITranslator->%s: %s", finish_reason, translated_text)
+            tokens = res.usage.total_tokens if res.usage else 0
+            limiter.on_success(tokens)
+            return (
+                translated_text,
+                finish_reason == "length",
+                tokens,
+                self._cached_tokens(res.usage),
+                self._output_tokens(res.usage),
+            )
 
-        return {"text": translated_text, "tokens": tokens}
+        contents = []
+        length = 0
+        finish_reason = None
+        usage = None
+        try:
+            stream = client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **params
+            )
+            for chunk in stream:
+                usage = chunk.usage or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta and delta.content:
+                    contents.append(delta.content)
+                    length += len(delta.content)
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                if length > len(source) * STREAM_CUTOFF_RATIO:
+                    logging.warning("OpenAITranslator->runaway output cut off")
+                    stream.close()
+                    finish_reason = "length"
+                    break
+        except Exception as e:
+            if not contents:
+                raise
+            # keep what was received, the caller continues with the missing tail
+            logging.warning(
+                "OpenAITranslator->stream interrupted after %d characters: %s",
+                length,
+                e,
+            )
+            finish_reason = "length"
+
+        translated_text = "".join(contents)
+        logging.info("OpenAITranslator->%s: %s", finish_reason, translated_text)
+        if usage:
+            tokens = usage.total_tokens
+            output_tokens = self._output_tokens(usage)
+        else:  # cut off or interrupted before the usage chunk
+            tokens, output_tokens = self.estimate_usage(
+                "\n".join(message["content"] for message in messages),
+                translated_text,
+            )
+        limiter.on_success(tokens)
+        return (
+            translated_text,
+            finish_reason in ("length", None),
+            tokens,
+            self._cached_tokens(usage),
+            output_tokens,
+        )
 
     def summarize(self, text: str, target_language: str) -> dict:
         logging.info(">>> Summarize [%s]: %s", target_language, text)
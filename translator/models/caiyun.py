@@ -2,6 +2,7 @@ import uuid
 import json
 import httpx
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 import logging
 from django.db import models
 from encrypted_model_fields.fields import EncryptedCharField
@@ -38,8 +39,8 @@ class CaiYunTranslator(TranslatorEngine):
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "CaiYunTranslator->Not support target language:%s", target_language
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
 
             payload = {
@@ -54,12 +55,15 @@ class CaiYunTranslator(TranslatorEngine):
                 "x-authorization": f"token {self.token}",
             }
 
+            self.rate_limiter.acquire(len(text))
             resp = httpx.post(
                 url=self.url, headers=headers, data=json.dumps(payload), timeout=10
             )
             resp.raise_for_status()
             translated_text = resp.json()["target"]
+            self.rate_limiter.on_success()
         except Exception as e:
             logging.error("CaiYunTranslator->%s: %s", e, text)
-        finally:
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
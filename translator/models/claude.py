@@ -10,6 +10,7 @@ from django.utils.translation import gettext_lazy as _
 class ClaudeTranslator(TranslatorEngine):
     # https://docs.anthropic.com/claude/reference/getting-started-with-the-api
     is_ai = models.BooleanField(default=True, editable=False)
+    segment_markup = "tags"
     model = models.CharField(
         max_length=50,
         default="claude-3-haiku-20240307",
@@ -29,6 +30,13 @@ class ClaudeTranslator(TranslatorEngine):
     temperature = models.FloatField(default=0.7)
     top_p = models.FloatField(null=True, blank=True, default=0.7)
     top_k = models.IntegerField(default=1)
+    stream = models.BooleanField(
+        _("Streaming"),
+        default=False,
+        help_text=_(
+            "Stream responses, output received before a timeout is kept and only the missing tail is translated again"
+        ),
+    )
 
     summary_prompt = models.TextField(default=settings.default_summary_prompt)
 
@@ -52,6 +60,7 @@ class ClaudeTranslator(TranslatorEngine):
         self,
         text: str,
         target_language: str,
+        translate_title: str = "",
         system_prompt: str = None,
         user_prompt: str = None,
         text_type: str = "title",
@@ -59,8 +68,6 @@ class ClaudeTranslator(TranslatorEngine):
     ) -> dict:
         logging.info(">>> Claude Translate [%s]:", target_language)
         client = self._init()
-        tokens = client.count_tokens(text)
-        translated_text = ""
         system_prompt = (
             system_prompt or self.translate_prompt
             if text_type == "title"
@@ -71,25 +78,103 @@ class ClaudeTranslator(TranslatorEngine):
             if user_prompt is not None:
                 system_prompt += f"\n\n{user_prompt}"
 
-            res = client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": text}],
-                temperature=self.temperature,
-                top_p=self.top_p,
-                top_k=self.top_k,
+            # The system prompt (and the article title, identical for every chunk)
+            # form a stable prefix, mark its end as cacheable. Anthropic ignores
+            # the mark below 1024 tokens (2048 for Haiku), the default prompts
+            # are far shorter, only long custom prompts get cached.
+            system = [{"type": "text", "text": system_prompt}]
+            if translate_title and text_type != "title":
+                system.append({"type": "text", "text": "文章的标题：" + translate_title})
+            system[-1]["cache_control"] = {"type": "ephemeral"}
+
+            def complete(source: str) -> tuple:
+                return self._complete(client, system, source)
+
+            if text_type == "content":
+                return self._translate_with_continuation(text, complete)
+
+            # titles and summaries don't map paragraph by paragraph to the source
+            translated_text, truncated, tokens, cached_tokens, output_tokens = (
+                complete(text)
             )
-            result = res.content
-            if result and result[0].type == "text":
-                translated_text = result[0].text
-            else:
-                logging.warning("ClaudeTranslator-> %s", res.stop_reason)
-            tokens = res.usage.output_tokens + res.usage.input_tokens
+            if truncated:
+                logging.warning("ClaudeTranslator->truncated response: %s", text)
         except Exception as e:
             logging.error("ClaudeTranslator->%s: %s", e, text)
-        finally:
-            return {"text": translated_text, "tokens": tokens}
+            raise self.handle_error(e) from e
+
+        return {
+            "text": translated_text,
+            "tokens": tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+        }
+
+    def _complete(self, client, system: list, source: str) -> tuple:
+        """
+        Run one message request.
+        Returns (text, truncated, tokens, cached_tokens, output_tokens).
+        """
+        limiter = self.rate_limiter
+        params = dict(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            system=system,
+            messages=[{"role": "user", "content": source}],
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+        )
+        limiter.acquire()
+        if self.stream:
+            contents = []
+            res = None
+            try:
+                with client.messages.stream(**params) as stream:
+                    for text in stream.text_stream:
+                        contents.append(text)
+                    res = stream.get_final_message()
+            except Exception as e:
+                if not contents:
+                    raise
+                # keep what was received, the caller continues with the missing tail
+                logging.warning(
+                    "ClaudeTranslator->stream interrupted after %d characters: %s",
+                    sum(len(text) for text in contents),
+                    e,
+                )
+                translated_text = "".join(contents)
+                tokens, output_tokens = self.estimate_usage(
+                    "\n".join([*(block["text"] for block in system), source]),
+                    translated_text,
+                )
+                limiter.on_success(tokens)
+                return translated_text, True, tokens, 0, output_tokens
+            translated_text = "".join(contents)
+        else:
+            res = client.messages.create(**params)
+            result = res.content
+            translated_text = (
+                result[0].text if result and result[0].type == "text" else ""
+            )
+
+        if not translated_text:
+            logging.warning("ClaudeTranslator-> %s", res.stop_reason)
+        cached_tokens = res.usage.cache_read_input_tokens or 0
+        tokens = (
+            res.usage.output_tokens
+            + res.usage.input_tokens
+            + cached_tokens
+            + (res.usage.cache_creation_input_tokens or 0)
+        )
+        limiter.on_success(tokens)
+        return (
+            translated_text,
+            res.stop_reason == "max_tokens",
+            tokens,
+            cached_tokens,
+            res.usage.output_tokens,
+        )
 
     def summarize(self, text: str, target_language: str) -> dict:
         logging.info(">>> Claude Summarize [%s]:", target_language)
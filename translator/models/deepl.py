@@ -1,5 +1,6 @@
 import deepl
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 import logging
 from django.db import models
 from encrypted_model_fields.fields import EncryptedCharField
@@ -12,6 +13,7 @@ class DeepLTranslator(TranslatorEngine):
     max_characters = models.IntegerField(default=5000)
     server_url = models.URLField(_("API URL(optional)"), null=True, blank=True)
     proxy = models.URLField(_("Proxy(optional)"), null=True, blank=True)
+    segment_markup = "xml"
     language_code_map = {
         "English": "EN-US",
         "Chinese Simplified": "ZH",
@@ -52,23 +54,29 @@ class DeepLTranslator(TranslatorEngine):
             logging.error("DeepLTranslator validate ->%s", e)
             return False
 
-    def translate(self, text: str, target_language: str, **kwargs) -> dict:
+    def translate(
+        self, text: str, target_language: str, tag_handling: str = None, **kwargs
+    ) -> dict:
         logging.info(">>> DeepL Translate [%s]: %s", target_language, text)
         target_code = self.language_code_map.get(target_language, None)
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "DeepLTranslator->Not support target language:%s", target_language
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
             translator = self._init()
+            self.rate_limiter.acquire(len(text))
             resp = translator.translate_text(
                 text,
                 target_lang=target_code,
                 preserve_formatting=True,
                 split_sentences="nonewlines",
+                tag_handling=tag_handling,
             )
             translated_text = resp.text
+            self.rate_limiter.on_success()
         except Exception as e:
             logging.error("DeepLTranslator->%s: %s", e, text)
+            raise self.handle_error(e) from e
         return {"text": translated_text, "characters": len(text)}
@@ -1,7 +1,7 @@
 from PyDeepLX import PyDeepLX
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 import logging
-from time import sleep
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -9,7 +9,9 @@ from django.utils.translation import gettext_lazy as _
 class DeepLWebTranslator(TranslatorEngine):
     # https://github.com/OwO-Network/PyDeepLX
     max_characters = models.IntegerField(default=5000)
-    interval = models.IntegerField(_("Request Interval(s)"), default=5)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=12, help_text=_("0 means unlimited")
+    )
     proxy = models.URLField(_("Proxy(optional)"), null=True, blank=True, default=None)
     language_code_map = {
         "English": "EN",
@@ -51,17 +53,18 @@ class DeepLWebTranslator(TranslatorEngine):
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "DeepLWebTranslator->Not support target language:%s",
-                    target_language,
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
 
+            if not validate:
+                self.rate_limiter.acquire(len(text))
             translated_text = PyDeepLX.translate(
                 text=text, targetLang=target_code, sourceLang="auto", proxies=self.proxy
             )
+            self.rate_limiter.on_success()
         except Exception as e:
             logging.error("DeepLWebTranslator->%s: %s", e, text)
-        finally:
-            if not validate:
-                sleep(self.interval)
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
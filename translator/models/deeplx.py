@@ -1,8 +1,9 @@
 import json
 import httpx
+from utils.rate_limiter import parse_retry_after
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError, RateLimitedError
 import logging
-from time import sleep
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -13,7 +14,9 @@ class DeepLXTranslator(TranslatorEngine):
         max_length=255, default="http://127.0.0.1:1188/translate"
     )
     max_characters = models.IntegerField(default=5000)
-    interval = models.IntegerField(_("Request Interval(s)"), default=3)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=20, help_text=_("0 means unlimited")
+    )
     language_code_map = {
         "English": "EN",
         "Chinese Simplified": "ZH",
@@ -50,11 +53,12 @@ class DeepLXTranslator(TranslatorEngine):
     def translate(self, text: str, target_language: str, validate:bool=False, **kwargs) -> dict:
         logging.info(">>> DeepLX Translate [%s]: %s", target_language, text)
         target_code = self.language_code_map.get(target_language, None)
+        limiter = self.rate_limiter
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "DeepLXTranslator->Not support target language:%s", target_language
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
 
             data = {
@@ -64,15 +68,21 @@ class DeepLXTranslator(TranslatorEngine):
             }
             headers = {"Content-Type": "application/json"}
             post_data = json.dumps(data)
+            if not validate:
+                limiter.acquire(len(text))
             resp = httpx.post(
                 url=self.deeplx_api, headers=headers, data=post_data, timeout=10
             )
             if resp.status_code == 429:
-                raise ("DeepLXTranslator-> IP has been blocked by DeepL temporarily")
+                raise RateLimitedError(
+                    "IP has been blocked by DeepL temporarily",
+                    retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+                )
+            resp.raise_for_status()
             translated_text = resp.json()["data"]
+            limiter.on_success()
         except Exception as e:
             logging.error("DeepLXTranslator->%s: %s", e, text)
-        finally:
-            if not validate:
-                sleep(self.interval)
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
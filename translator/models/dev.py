@@ -1,14 +1,15 @@
 from .base import TranslatorEngine
 import logging
 from django.db import models
-from time import sleep
 from django.utils.translation import gettext_lazy as _
 
 
 class TestTranslator(TranslatorEngine):
     translated_text = models.TextField(default="@@Translated Text@@")
     max_characters = models.IntegerField(default=50000)
-    interval = models.IntegerField(_("Request Interval(s)"), default=3)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=20, help_text=_("0 means unlimited")
+    )
     is_ai = models.BooleanField(default=True, editable=False)
 
     class Meta:
@@ -20,7 +21,7 @@ class TestTranslator(TranslatorEngine):
 
     def translate(self, text: str, target_language: str, **kwargs) -> dict:
         logging.info(">>> Test Translate [%s]: %s", target_language, text)
-        sleep(self.interval)
+        self.rate_limiter.acquire(len(text))
         return {"text": self.translated_text, "tokens": 0, "characters": len(text)}
 
     def summarize(self, text: str, target_language: str) -> dict:
@@ -10,6 +10,7 @@ from volcenginesdkarkruntime import Ark
 class DoubaoTranslator(TranslatorEngine):
     # https://www.volcengine.com/docs/82379/1263482
     is_ai = models.BooleanField(default=True, editable=False)
+    segment_markup = "tags"
     api_key = EncryptedCharField(_("API Key"), max_length=255)
     endpoint_id = models.CharField(max_length=255)
     region = models.CharField(max_length=50, default="cn-beijing")
@@ -60,6 +61,7 @@ class DoubaoTranslator(TranslatorEngine):
             if user_prompt:
                 system_prompt += f"\n\n{user_prompt}"
 
+            self.rate_limiter.acquire()
             res = client.chat.completions.create(
                 model=self.endpoint_id,
                 messages=[
@@ -74,8 +76,10 @@ class DoubaoTranslator(TranslatorEngine):
                 logging.info("DoubaoTranslator->%s: %s", res.choices[0].finish_reason, translated_text)
             
             tokens = res.usage.total_tokens if res.usage else 0
+            self.rate_limiter.on_success(tokens)
         except Exception as e:
             logging.error("DoubaoTranslator->%s: %s", e, text)
+            raise self.handle_error(e) from e
 
         return {"text": translated_text, "tokens": tokens}
 
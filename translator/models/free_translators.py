@@ -1,8 +1,9 @@
 from .base import TranslatorEngine
+from ..exceptions import TransientError
 import logging
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from langdetect import detect
+from utils import text_handler
 
 class FreeTranslators(TranslatorEngine):
     translators = models.TextField(null=True, blank=True, default="")  # list[dict]
@@ -30,20 +31,19 @@ class FreeTranslators(TranslatorEngine):
 
     def translate(self, text: str, target_language: str, source_language:str="auto", **kwargs) -> dict:
         et = self._init()
-        try:
-            source_language = detect(text) if source_language == "auto" else source_language
-        except:
-            source_language = "auto"
-            logging.warning("Cannot detect source language:%s", text)
-            
+        if source_language == "auto":
+            # called directly, translate_feed passes the language of the entry
+            source_language = text_handler.detect_text_language(text)
+
+        self.rate_limiter.acquire(len(text))
         results = et.translate(
             text=text, dest_lang=target_language, src_lang=source_language, proxies=self.proxies
         )
         
-        translated_text = (
-            results.get("translated_text") if results.get("status") == "success" else ""
-        )
-        return {"text": translated_text, "characters": len(text)}
+        if results.get("status") != "success":
+            raise TransientError(results.get("error_info") or "Translate failed")
+        self.rate_limiter.on_success()
+        return {"text": results.get("translated_text"), "characters": len(text)}
 
     def translate_batch(self, text_list: list, target_language: str, **kwargs) -> dict:
         et = self._init()
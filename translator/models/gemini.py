@@ -3,7 +3,6 @@ import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from .base import TranslatorEngine
 import logging
-from time import sleep
 from django.db import models
 from encrypted_model_fields.fields import EncryptedCharField
 from django.utils.translation import gettext_lazy as _
@@ -12,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 class GeminiTranslator(TranslatorEngine):
     # https://ai.google.dev/tutorials/python_quickstart
     is_ai = models.BooleanField(default=True, editable=False)
+    segment_markup = "tags"
     # base_url = models.URLField(_("API URL"), default="https://generativelanguage.googleapis.com/v1beta/")
     api_key = EncryptedCharField(_("API Key"), max_length=255)
     model = models.CharField(
@@ -30,7 +30,9 @@ class GeminiTranslator(TranslatorEngine):
     top_p = models.FloatField(default=1)
     top_k = models.IntegerField(default=1)
     max_tokens = models.IntegerField(default=1000)
-    interval = models.IntegerField(_("Request Interval(s)"), default=3)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=20, help_text=_("0 means unlimited")
+    )
 
     summary_prompt = models.TextField(default=settings.default_summary_prompt)
 
@@ -39,7 +41,9 @@ class GeminiTranslator(TranslatorEngine):
         verbose_name_plural = "Google Gemini"
 
     def _init(self, system_prompt: str = None):
-        genai.configure(api_key=self.api_key)
+        # REST goes through the (gevent-patched) sockets, gRPC would block the
+        # consumer's hub for the duration of every request
+        genai.configure(api_key=self.api_key, transport="rest")
         return genai.GenerativeModel(
             model_name=self.model,
             # system_instruction=system_prompt or self.translate_prompt
@@ -66,6 +70,7 @@ class GeminiTranslator(TranslatorEngine):
     ) -> dict:
         logging.info(">>> Gemini Translate [%s]:", target_language)
 
+        limiter = self.rate_limiter
         tokens = 0
         translated_text = ""
         system_prompt = (
@@ -89,6 +94,7 @@ class GeminiTranslator(TranslatorEngine):
                 HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
                 HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
             }
+            limiter.acquire()
             res = model.generate_content(prompt, generation_config=generation_config, safety_settings=safety_settings)
             finish_reason = res.candidates[0].finish_reason if res.candidates else None
             if finish_reason == 1:
@@ -99,10 +105,10 @@ class GeminiTranslator(TranslatorEngine):
                     "GeminiTranslator finish_reason->%s: %s", finish_reason.name, text
                 )
             tokens = model.count_tokens(prompt).total_tokens
+            limiter.on_success(tokens)
         except Exception as e:
             logging.error("GeminiTranslator->%s: %s", e, text)
-        finally:
-            sleep(self.interval)
+            raise self.handle_error(e) from e
 
         return {"text": translated_text, "tokens": tokens}
 
@@ -1,5 +1,5 @@
-from time import sleep
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 import logging
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -9,7 +9,9 @@ class GoogleTranslateWebTranslator(TranslatorEngine):
         _("URL"), null=True, blank=True, help_text=_("It is recommended to leave this blank in order to automatically select the best server")
     ) # https://translate.googleapis.com/translate_a/single
     proxy = models.URLField(_("Proxy(optional)"), null=True, blank=True, default=None)
-    interval = models.IntegerField(_("Request Interval(s)"), default=1)
+    rpm = models.IntegerField(
+        _("Requests Per Minute"), default=60, help_text=_("0 means unlimited")
+    )
     max_characters = models.IntegerField(default=1000)
     language_code_map = {
         "English": "en",
@@ -52,11 +54,7 @@ class GoogleTranslateWebTranslator(TranslatorEngine):
         target_language = self.language_code_map.get(target_language)
         translated_text = ""
         if target_language is None:
-            logging.error(
-                "GoogleTranslateWebTranslator->Not support target language:%s",
-                target_language,
-            )
-            return {"text": translated_text, "characters": len(text)}
+            raise ConfigurationError("Not support target language")
         try:
             # params = {
             #     "client": "gtx",
@@ -68,12 +66,14 @@ class GoogleTranslateWebTranslator(TranslatorEngine):
             # resp = httpx.get(self.base_url, params=params, timeout=10, proxy=self.proxy)
             # resp.raise_for_status()
             # resp_json = resp.json()
+            if not validate:
+                self.rate_limiter.acquire(len(text))
             results = self.ts.translate_text(text, to_language=target_language, translator="google", reset_host_url=self.base_url, proxies=self.proxy)
             if results:
                 translated_text = results
+                self.rate_limiter.on_success()
         except Exception as e:
             logging.error("GoogleTranslateWebTranslator->%s: %s", e, text)
-        finally:
-            if not validate:
-                sleep(self.interval)
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
@@ -2,6 +2,7 @@ import logging
 import json
 import httpx
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 from config import settings
@@ -15,6 +16,7 @@ class KagiTranslator(TranslatorEngine):
         max_length=255, default="https://kagi.com/api/v0",help_text=_("We'll use fastgpt for the translation and summarise for the summary")
     )
     is_ai = models.BooleanField(default=True)
+    segment_markup = "tags"
     summarization_engine = models.CharField(max_length=20,default="cecil",help_text="Please check https://help.kagi.com/kagi/api/summarizer.html#summarization-engines")
     summary_type = models.CharField(max_length=20,default="summary",help_text="Please check https://help.kagi.com/kagi/api/summarizer.html#summary-types")
     translate_prompt = models.TextField(
@@ -90,6 +92,7 @@ class KagiTranslator(TranslatorEngine):
                 system_prompt += f"\n\n{user_prompt}"
 
             headers = {"content-type": "application/json",'Authorization': f'Bot {self.api_key}'}
+            self.rate_limiter.acquire()
             resp = httpx.post(
                 url=self.url + "/fastgpt",
                 headers=headers,
@@ -102,10 +105,12 @@ class KagiTranslator(TranslatorEngine):
             if data:
                  translated_text = data.get("output")
             tokens = data.get("tokens",0)
+            self.rate_limiter.on_success(tokens)
         except Exception as e:
             logging.error("KagiTranslator->%s: %s", e, text)
-        finally:
-            return {"text": translated_text, "tokens": tokens}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "tokens": tokens}
 
     def summarize(self, text: str, target_language: str) -> dict:
         logging.info(">>> Kagi Universal Summarizer [%s]:", target_language)
@@ -115,10 +120,11 @@ class KagiTranslator(TranslatorEngine):
         target_code = self.language_code_map.get(target_language, None)
         try:
             if target_code is None:
-                logging.error(
-                    "Kagi Universal Summarizer->Not support target language:%s", target_language
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
             headers = {"content-type": "application/json",'Authorization': f'Bot {self.api_key}'}
+            self.rate_limiter.acquire()
             resp = httpx.post(
                 url=self.url + "/summarize",
                 headers=headers,
@@ -131,8 +137,10 @@ class KagiTranslator(TranslatorEngine):
             if data:
                  summarized_text = data.get("output")
             tokens = data.get("tokens",0)
+            self.rate_limiter.on_success(tokens)
         except Exception as e:
             logging.error("KagiTranslator->%s: %s", e, text)
-        finally:
-            return {"text": summarized_text, "tokens": tokens}
+            raise self.handle_error(e) from e
+
+        return {"text": summarized_text, "tokens": tokens}
 
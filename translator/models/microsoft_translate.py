@@ -1,5 +1,6 @@
 import httpx
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 import logging
 from django.db import models
 from encrypted_model_fields.fields import EncryptedCharField
@@ -52,9 +53,8 @@ class MicrosoftTranslator(TranslatorEngine):
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "MicrosoftTranslator->Not support target language:%s",
-                    target_language,
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
 
             constructed_url = f"{self.endpoint}/translate"
@@ -67,6 +67,7 @@ class MicrosoftTranslator(TranslatorEngine):
             }
             body = [{"text": text}]
 
+            self.rate_limiter.acquire(len(text))
             with httpx.Client() as client:
                 resp = client.post(
                     constructed_url,
@@ -77,8 +78,10 @@ class MicrosoftTranslator(TranslatorEngine):
                 )
                 resp.raise_for_status()
                 translated_text = resp.json()[0]["translations"][0]["text"]
+                self.rate_limiter.on_success()
             # [{'detectedLanguage': {'language': 'en', 'score': 1.0}, 'translations': [{'text': '你好，我叫约翰。', 'to': 'zh-Hans'}]}]
         except Exception as e:
             logging.error("MicrosoftTranslator->%s: %s", e, text)
-        finally:
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
@@ -3,6 +3,7 @@ import logging
 import json
 import httpx
 from .base import TranslatorEngine
+from ..exceptions import ConfigurationError
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 from encrypted_model_fields.fields import EncryptedCharField
@@ -54,10 +55,11 @@ class OpenlTranslator(TranslatorEngine):
         translated_text = ""
         try:
             if target_code is None:
-                logging.error(
-                    "OpenlTranslator->Not support target language:%s", target_language
+                raise ConfigurationError(
+                    f"Not support target language:{target_language}"
                 )
 
+            self.rate_limiter.acquire(len(text))
             resp = httpx.post(
                 url=self.url + f"/services/{self.service_name}/translate",
                 headers={"content-type": "application/json"},
@@ -67,7 +69,9 @@ class OpenlTranslator(TranslatorEngine):
             resp.raise_for_status()
             results = resp.json()
             translated_text = results.get("result") if results.get("status") is True else ""
+            self.rate_limiter.on_success()
         except Exception as e:
             logging.error("OpenlTranslator->%s: %s", e, text)
-        finally:
-            return {"text": translated_text, "characters": len(text)}
+            raise self.handle_error(e) from e
+
+        return {"text": translated_text, "characters": len(text)}
@@ -15,6 +15,11 @@ class OpenRouterAITranslator(OpenAIInterface):
         help_text="More models can be found at https://openrouter.ai/docs#models",
     )
 
+    extra_headers = {
+        "HTTP-Referer": "https://news.10k.xyz",
+        "X-Title": "RSS-Translator",
+    }
+
     class Meta:
         verbose_name = "OpenRouter AI"
         verbose_name_plural = "OpenRouter AI"
@@ -40,68 +45,17 @@ class OpenRouterAITranslator(OpenAIInterface):
                 logging.error("OpenAIInterface validate ->%s", e)
                 return False
 
-    def translate(
+    def _build_messages(
         self,
+        system_prompt: str,
         text: str,
-        target_language: str,
-        translate_title: str,
-        text_type: str = "title",
-        system_prompt: str = None,
-        user_prompt: str = None,
-    ) -> dict:
-        logging.info(">>> Translate [%s]: %s", target_language, text)
-        client = self._init()
-        tokens = 0
-        translated_text = ""
-        system_prompt = (
-            system_prompt or self.translate_prompt
-            if text_type == "title"
-            else self.content_translate_prompt
-        )
-        try:
-            system_prompt = system_prompt.replace("{target_language}", target_language)
-            if user_prompt:
-                system_prompt += f"\n\n{user_prompt}"
-
-            # 根据 text_type 构建不同的 messages
-            if text_type == "title":
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text},
-                ]
-            else:
-                prompt_title = "文章的标题：" + translate_title
-                prompt_text = "段落的内容：" + text
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt_title},
-                    {"role": "user", "content": prompt_text},
-                ]
-
-            res = client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": "https://news.10k.xyz",
-                    "X-Title": "RSS-Translator",
-                },
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                top_p=self.top_p,
-                frequency_penalty=self.frequency_penalty,
-                presence_penalty=self.presence_penalty,
-            )
-            if res.choices[0].finish_reason == "stop" or res.choices[0].message.content:
-                translated_text = res.choices[0].message.content
-                logging.info(
-                    "OpenAITranslator->%s: %s",
-                    res.choices[0].finish_reason,
-                    translated_text,
-                )
-            # else:
-            #     translated_text = ''
-            #     logging.warning("Translator->%s: %s", res.choices[0].finish_reason, text)
-            tokens = res.usage.total_tokens
-        except Exception as e:
-            logging.error("ErrorTranslator->%s: %s", e, text)
-
-        return {"text": translated_text, "tokens": tokens}
+        translate_title: str = "",
+        text_type: str = "content",
+    ) -> list:
+        # 根据 text_type 构建不同的 messages
+        if text_type == "title":
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
+            ]
+        return super()._build_messages(system_prompt, text, translate_title)
@@ -0,0 +1,122 @@
+import logging
+import random
+import time
+from typing import Callable, Optional
+
+from utils import metrics
+
+from .exceptions import (
+    CircuitOpenError,
+    ConfigurationError,
+    PermanentError,
+    RateLimitedError,
+    TransientError,
+    classify_error,
+)
+
+MAX_RETRIES = 3
+BASE_DELAY = 1.0  # seconds
+MAX_DELAY = 30.0  # seconds
+
+
+def backoff_delay(
+    attempt: int, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY
+) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def call_with_retry(
+    func: Callable[..., dict],
+    *args,
+    max_retries: int = MAX_RETRIES,
+    base_delay: float = BASE_DELAY,
+    max_delay: float = MAX_DELAY,
+    **kwargs,
+) -> Optional[dict]:
+    """
+    Call an engine method (translate/summarize) and retry transient failures.
+
+    Empty results count as transient failures. Rate limited errors wait at least
+    for Retry-After. PermanentError is raised immediately without retrying.
+    Every transient failure is recorded in the engine's circuit breaker, retrying
+    stops as soon as the circuit is open. Permanent errors don't count, a bad
+    chunk or a misconfigured feed must not block the engine for every feed.
+    Returns None when every attempt failed, so the caller can fall back.
+    """
+    engine = getattr(func, "__self__", None)
+    breaker = getattr(engine, "circuit_breaker", None)
+    method = getattr(func, "__name__", "")
+
+    for attempt in range(max_retries + 1):
+        if breaker and not breaker.allow_request():
+            error = CircuitOpenError(f"Circuit open for {engine}")
+            break
+        started = time.monotonic()
+        try:
+            results = func(*args, **kwargs)
+            elapsed = time.monotonic() - started
+            if breaker:
+                breaker.record_success(elapsed)
+            metrics.observe_request(engine, method, elapsed, results)
+            if results and results.get("text"):
+                return results
+            error = TransientError("Empty result")
+        except Exception as e:
+            metrics.observe_request(engine, method, time.monotonic() - started)
+            error = classify_error(e)
+            if isinstance(error, PermanentError):
+                # the engine works, this request or its settings don't
+                if breaker:
+                    breaker.record_ignored()
+                raise error from e
+            if breaker:
+                breaker.record_failure()
+
+        if attempt == max_retries:
+            break
+        delay = backoff_delay(attempt, base_delay, max_delay)
+        if isinstance(error, RateLimitedError) and error.retry_after:
+            delay = max(delay, error.retry_after)
+        logging.warning(
+            "%s: %s, retrying in %.2fs (attempt %d/%d)",
+            error.__class__.__name__,
+            error,
+            delay,
+            attempt + 1,
+            max_retries,
+        )
+        time.sleep(delay)
+
+    logging.error("Giving up after %d attempts: %s", attempt + 1, error)
+    return None
+
+
+def call_with_failover(engines: list, method: str, *args, **kwargs) -> Optional[dict]:
+    """
+    Call `method` on the first healthy engine, in order.
+
+    Engines whose circuit is open are skipped, an engine that keeps failing
+    hands the work over to the next one. ConfigurationError is only raised when
+    no engine could produce a result, a request that failed permanently on every
+    engine returns None like any other failure, so the caller keeps the original.
+    """
+    configuration_error = None
+    for engine in engines:
+        if not engine:
+            continue
+        try:
+            results = call_with_retry(getattr(engine, method), *args, **kwargs)
+        except ConfigurationError as e:
+            configuration_error = e
+            results = None
+        except PermanentError as e:
+            logging.warning("Engine %s rejected the request: %s", engine, e)
+            results = None
+        if results:
+            return results
+        logging.warning("Engine %s failed, try next fallback engine", engine)
+
+    if configuration_error:
+        raise configuration_error
+    return None
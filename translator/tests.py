@@ -1,3 +1,562 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from translator import retry
+from translator.exceptions import (
+    ConfigurationError,
+    PermanentError,
+    RateLimitedError,
+    TransientError,
+    classify_error,
+)
+from translator.models import (
+    ClaudeTranslator,
+    DeepLTranslator,
+    DeepLXTranslator,
+    OpenAITranslator,
+    Translated_Content,
+    TranslatorEngine,
+)
+from utils import circuit_breaker, rate_limiter, text_handler
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
+
+
+class FakeClock:
+    """Replaces time.monotonic/time.sleep, sleeping only advances the clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.multiple(
+            rate_limiter.time, monotonic=self.clock.monotonic, sleep=self.clock.sleep
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unlimited_never_blocks(self):
+        limiter = RateLimiter()
+        for _ in range(100):
+            limiter.acquire(10_000)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_requests_per_minute(self):
+        limiter = RateLimiter(rpm=60)
+        for _ in range(60):  # the bucket starts full
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        limiter.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 1.0)
+
+    def test_tokens_per_minute(self):
+        limiter = RateLimiter(tpm=600)
+        limiter.acquire(600)
+        limiter.acquire(300)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 30.0)
+
+    def test_request_larger_than_bucket_passes(self):
+        limiter = RateLimiter(tpm=100)
+        limiter.acquire(1000)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_on_success_charges_actual_tokens(self):
+        limiter = RateLimiter(tpm=600)
+        limiter.acquire(0)
+        limiter.on_success(600)
+        limiter.acquire(60)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 6.0)
+
+    def test_rate_limited_pauses_and_halves_rate(self):
+        limiter = RateLimiter(rpm=60)
+        limiter.on_rate_limited(retry_after=5)
+        self.assertEqual(limiter.rate_factor, 0.5)
+        limiter.acquire()
+        # paused for Retry-After, then refilled at half the rate
+        self.assertGreaterEqual(sum(self.clock.sleeps), 5.0)
+
+    def test_rate_factor_bounds(self):
+        limiter = RateLimiter(rpm=60)
+        for _ in range(20):
+            limiter.on_rate_limited(retry_after=0)
+        self.assertEqual(limiter.rate_factor, rate_limiter.MIN_RATE_FACTOR)
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.rate_factor, 1.0)
+
+    def test_get_rate_limiter_shared_and_reconfigured(self):
+        limiter = get_rate_limiter("test:shared", rpm=10)
+        self.assertIs(get_rate_limiter("test:shared", rpm=10), limiter)
+        limiter.on_rate_limited(retry_after=0)
+        self.assertIs(get_rate_limiter("test:shared", rpm=20), limiter)
+        self.assertEqual(limiter.rpm, 20)
+        self.assertEqual(limiter.rate_factor, 1.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("12"), 12.0)
+        self.assertEqual(parse_retry_after("-1"), 0.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, message: str = "", headers: dict = None):
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = mock.Mock(headers=headers or {})
+
+
+class ClassifyErrorTest(SimpleTestCase):
+    def assertClassified(self, exc, error_class):
+        error = classify_error(exc)
+        self.assertIs(type(error), error_class, f"{exc}: {error!r}")
+
+    def test_transient(self):
+        self.assertClassified(TimeoutError("read timeout"), TransientError)
+        for status_code in (408, 409, 425, 500, 502, 503):
+            self.assertClassified(HTTPError(status_code), TransientError)
+
+    def test_rate_limited(self):
+        error = classify_error(HTTPError(429, headers={"retry-after": "7"}))
+        self.assertIsInstance(error, RateLimitedError)
+        self.assertEqual(error.retry_after, 7.0)
+
+    def test_request_errors_are_permanent(self):
+        for message in (
+            "This model's maximum context length is 8192 tokens. "
+            "{'type': 'invalid_request_error', 'code': 'context_length_exceeded'}",
+            "The response was filtered due to the content management policy",
+            "Malformed request body",
+        ):
+            self.assertClassified(HTTPError(400, message), PermanentError)
+        self.assertClassified(HTTPError(413), PermanentError)
+
+    def test_configuration_errors(self):
+        for status_code in (401, 402, 403, 404):
+            self.assertClassified(HTTPError(status_code), ConfigurationError)
+        for message in (
+            "Invalid model: gpt-9",
+            "The model `gpt-9` does not exist or you do not have access to it",
+            "{'code': 'model_not_found'}",
+            "Unsupported target language: Klingon",
+            "Target language KL is not supported",
+        ):
+            self.assertClassified(HTTPError(400, message), ConfigurationError)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(
+            circuit_breaker.time, "monotonic", self.clock.monotonic
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test")
+
+    def fail(self, times: int):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_on_failure_rate(self):
+        self.fail(circuit_breaker.MIN_CALLS - 1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_stays_closed_below_threshold(self):
+        for _ in range(10):
+            self.breaker.record_success()
+            self.breaker.record_success()
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        for _ in range(circuit_breaker.MIN_CALLS):
+            self.breaker.record_success(circuit_breaker.SLOW_CALL_THRESHOLD + 1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_trial(self):
+        self.fail(circuit_breaker.MIN_CALLS)
+        self.clock.now += circuit_breaker.COOLDOWN
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())  # one trial at a time
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_doubles_cooldown(self):
+        self.fail(circuit_breaker.MIN_CALLS)
+        self.clock.now += circuit_breaker.COOLDOWN
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.cooldown, circuit_breaker.COOLDOWN * 2)
+        self.clock.now += circuit_breaker.COOLDOWN
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_ignored_call_releases_the_trial(self):
+        self.fail(circuit_breaker.MIN_CALLS)
+        self.clock.now += circuit_breaker.COOLDOWN
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_ignored()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+
+class FailingEngine:
+    def __init__(self, error: Exception):
+        self.error = error
+        self.circuit_breaker = CircuitBreaker("failing")
+        self.calls = 0
+
+    def __str__(self):
+        return "failing"
+
+    def translate(self, text: str, target_language: str) -> dict:
+        self.calls += 1
+        raise self.error
+
+
+class CallWithRetryTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(retry.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, engine):
+        return retry.call_with_retry(engine.translate, "text", "French")
+
+    def test_permanent_errors_do_not_trip_the_breaker(self):
+        for error in (
+            HTTPError(400, "maximum context length exceeded"),
+            HTTPError(401, "Incorrect API key provided"),
+        ):
+            engine = FailingEngine(error)
+            for _ in range(circuit_breaker.MIN_CALLS * 2):
+                with self.assertRaises(PermanentError):
+                    self.call(engine)
+            self.assertEqual(engine.calls, circuit_breaker.MIN_CALLS * 2)
+            self.assertEqual(engine.circuit_breaker.state, CircuitBreaker.CLOSED)
+            self.assertNotIn(False, engine.circuit_breaker.calls)
+
+    def test_transient_errors_trip_the_breaker(self):
+        engine = FailingEngine(HTTPError(503))
+        self.assertIsNone(self.call(engine))
+        self.assertEqual(engine.calls, retry.MAX_RETRIES + 1)
+        self.assertIsNone(self.call(engine))
+        self.assertEqual(engine.circuit_breaker.state, CircuitBreaker.OPEN)
+        # stopped retrying once the circuit opened
+        self.assertEqual(engine.calls, circuit_breaker.MIN_CALLS)
+
+    def test_open_circuit_fails_over(self):
+        engine = FailingEngine(HTTPError(503))
+        engine.circuit_breaker._open()
+        fallback = mock.Mock(circuit_breaker=None)
+        fallback.translate.return_value = {"text": "texte"}
+        results = retry.call_with_failover(
+            [engine, fallback], "translate", "text", "French"
+        )
+        self.assertEqual(results, {"text": "texte"})
+        self.assertEqual(engine.calls, 0)
+
+
+GROUP = "Read <t1>the docs</t1> &amp; more.<t2/>\n\nSecond paragraph"
+
+
+class TranslateSegmentsTest(SimpleTestCase):
+    def translate(self, engine: TranslatorEngine, translation: str):
+        with mock.patch.object(
+            type(engine), "translate", return_value={"text": translation}
+        ) as translate:
+            results = engine.translate_segments(GROUP, "French", text_type="content")
+        return results, translate
+
+    def test_llm_engines_keep_placeholders(self):
+        engine = OpenAITranslator(name="openai")
+        _, translate = self.translate(engine, GROUP)
+        translate.assert_called_once_with(GROUP, "French", text_type="content")
+
+    def test_custom_prompt_gets_the_segment_instructions(self):
+        engine = OpenAITranslator(
+            name="openai", content_translate_prompt="Translate into {target_language}."
+        )
+        _, translate = self.translate(engine, GROUP)
+        translate.assert_called_once_with(
+            GROUP,
+            "French",
+            text_type="content",
+            user_prompt=text_handler.SEGMENT_PROMPT,
+        )
+
+    def test_deepl_uses_xml_tag_handling(self):
+        _, translate = self.translate(DeepLTranslator(name="deepl"), GROUP)
+        translate.assert_called_once_with(
+            GROUP, "French", text_type="content", tag_handling="xml"
+        )
+
+    def test_other_engines_get_plain_text(self):
+        results, translate = self.translate(
+            DeepLXTranslator(name="deeplx"), "Lisez la doc & plus.\n\nDeuxième"
+        )
+        translate.assert_called_once_with(
+            "Read the docs & more.\n\nSecond paragraph",
+            "French",
+            text_type="content",
+        )
+        # back in the format of the segments
+        self.assertEqual(results["text"], "Lisez la doc &amp; plus.\n\nDeuxième")
+
+
+class TruncationTest(SimpleTestCase):
+    def test_split_truncated(self):
+        self.assertEqual(
+            text_handler.split_truncated("A\n\nB\n\nC", "tA\n\ntB\n\nt"),
+            ("tA\n\ntB", "C"),
+        )
+        self.assertEqual(text_handler.split_truncated("A\n\nB", "t"), ("", "A\n\nB"))
+
+    def test_bisect_text(self):
+        self.assertEqual(
+            text_handler.bisect_text("A\n\nB\n\nC"), ("A", "B\n\nC", "\n\n")
+        )
+        self.assertEqual(
+            text_handler.bisect_text("One. Two! Three?"), ("One.", "Two! Three?", " ")
+        )
+        self.assertEqual(text_handler.bisect_text("一。二。"), ("一。", "二。", " "))
+        self.assertIsNone(text_handler.bisect_text("A single sentence."))
+
+
+class ContinuationTest(SimpleTestCase):
+    def translate(self, complete) -> dict:
+        engine = OpenAITranslator(name="openai")
+        return engine._translate_with_continuation(self.source, complete)
+
+    def test_missing_tail_is_continued(self):
+        self.source = "A\n\nB\n\nC"
+        sources = []
+
+        def complete(source: str) -> tuple:
+            sources.append(source)
+            if len(sources) == 1:
+                return "tA\n\ntB\n\nt", True, 10, 2, 5
+            return "tC", False, 3, 0, 1
+
+        results = self.translate(complete)
+        self.assertEqual(sources, ["A\n\nB\n\nC", "C"])
+        self.assertEqual(
+            results,
+            {
+                "text": "tA\n\ntB\n\ntC",
+                "tokens": 13,
+                "cached_tokens": 2,
+                "output_tokens": 6,
+            },
+        )
+
+    def test_single_paragraph_is_split(self):
+        self.source = "One. Two."
+        sources = []
+
+        def complete(source: str) -> tuple:
+            sources.append(source)
+            if source == self.source:
+                return "Un", True, 4, 0, 1
+            return f"t{source}", False, 2, 0, 1
+
+        results = self.translate(complete)
+        self.assertEqual(sources, ["One. Two.", "One.", "Two."])
+        self.assertEqual(results["text"], "tOne. tTwo.")
+        self.assertEqual(results["tokens"], 8)
+
+    def test_single_sentence_truncated(self):
+        self.source = "A single sentence."
+        with self.assertRaises(TransientError):
+            self.translate(lambda source: ("Une", True, 1, 0, 1))
+
+
+def chunk(content: str = None, finish_reason: str = None, usage=None):
+    choices = [
+        SimpleNamespace(
+            delta=SimpleNamespace(content=content), finish_reason=finish_reason
+        )
+    ]
+    return SimpleNamespace(
+        choices=choices if content or finish_reason else [], usage=usage
+    )
+
+
+class FakeStream:
+    """A streamed response, raises `error` after its chunks when set."""
+
+    def __init__(self, chunks: list, error: Exception = None):
+        self.chunks = chunks
+        self.error = error
+        self.closed = False
+
+    def __iter__(self):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+class StreamingTest(SimpleTestCase):
+    def setUp(self):
+        # whitespace tokens, tiktoken downloads its encodings on first use
+        patcher = mock.patch.object(
+            text_handler, "count_tokens", side_effect=lambda text: len(text.split())
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def complete_openai(self, stream: FakeStream, source: str = "one two"):
+        engine = OpenAITranslator(name="openai", stream=True)
+        client = mock.Mock()
+        client.chat.completions.create.return_value = stream
+        messages = [{"role": "user", "content": source}]
+        with mock.patch.object(RateLimiter, "on_success") as on_success:
+            result = engine._complete(client, messages, source)
+        return result, on_success
+
+    def test_openai_stream(self):
+        usage = SimpleNamespace(total_tokens=9, completion_tokens=3)
+        stream = FakeStream([chunk("un "), chunk("deux", "stop"), chunk(usage=usage)])
+        result, on_success = self.complete_openai(stream)
+        self.assertEqual(result, ("un deux", False, 9, 0, 3))
+        on_success.assert_called_once_with(9)
+
+    def test_openai_runaway_output_is_cut_off(self):
+        stream = FakeStream([chunk("la " * 3), chunk("la " * 3), chunk("la " * 3)])
+        result, on_success = self.complete_openai(stream, source="la")
+        self.assertTrue(stream.closed)
+        # cut off past 10 characters, five times the source
+        self.assertEqual(result, ("la " * 6, True, 7, 0, 6))
+        on_success.assert_called_once_with(7)
+
+    def test_openai_interrupted_stream_is_billed(self):
+        stream = FakeStream([chunk("un deux ")], error=ConnectionError("reset"))
+        result, on_success = self.complete_openai(stream, source="one two three")
+        self.assertEqual(result, ("un deux ", True, 5, 0, 2))
+        on_success.assert_called_once_with(5)
+
+    def test_openai_interrupted_before_any_output(self):
+        stream = FakeStream([], error=ConnectionError("reset"))
+        with self.assertRaises(ConnectionError):
+            self.complete_openai(stream)
+
+    def complete_claude(self, text_stream: FakeStream, final_message=None):
+        engine = ClaudeTranslator(name="claude", stream=True)
+        client = mock.MagicMock()
+        stream = client.messages.stream.return_value.__enter__.return_value
+        stream.text_stream = text_stream
+        stream.get_final_message.return_value = final_message
+        system = [{"type": "text", "text": "Translate"}]
+        with mock.patch.object(RateLimiter, "on_success") as on_success:
+            result = engine._complete(client, system, "one two three")
+        return result, on_success
+
+    def test_claude_stream(self):
+        usage = SimpleNamespace(
+            input_tokens=6,
+            output_tokens=3,
+            cache_read_input_tokens=2,
+            cache_creation_input_tokens=None,
+        )
+        message = SimpleNamespace(usage=usage, stop_reason="end_turn")
+        result, on_success = self.complete_claude(FakeStream(["un ", "deux"]), message)
+        self.assertEqual(result, ("un deux", False, 11, 2, 3))
+        on_success.assert_called_once_with(11)
+
+    def test_claude_interrupted_stream_is_billed(self):
+        text_stream = FakeStream(["un ", "deux"], error=ConnectionError("reset"))
+        result, on_success = self.complete_claude(text_stream)
+        # estimated: 4 prompt tokens (system and source) and 2 output tokens
+        self.assertEqual(result, ("un deux", True, 6, 0, 2))
+        on_success.assert_called_once_with(6)
+
+
+class CacheTemplateTest(SimpleTestCase):
+    def test_volatile_parts_are_replaced(self):
+        self.assertEqual(
+            text_handler.cache_template(
+                "Version 3.12  is out,\nsee https://example.com/a?utm_source=rss"
+            ),
+            (
+                "Version {{number}} is out, see {{url}}",
+                ["3.12", "https://example.com/a?utm_source=rss"],
+            ),
+        )
+
+    def test_words_placeholders_and_slots_are_kept(self):
+        self.assertEqual(
+            text_handler.cache_template("Python3 has <t1>1,000</t1> users {{0}}"),
+            ("Python3 has <t1>{{number}}</t1> users {{0}}", ["1,000"]),
+        )
+
+    def test_templatize(self):
+        _, values = text_handler.cache_template("Read 3 of 123 posts at https://x.io")
+        self.assertEqual(
+            text_handler.templatize("Lisez 3 des 123 billets sur https://x.io", values),
+            "Lisez {{0}} des {{1}} billets sur {{2}}",
+        )
+        # a value the translation did not keep as is
+        self.assertIsNone(
+            text_handler.templatize("Lisez trois des 123 billets", values)
+        )
+
+    def test_fill_template(self):
+        self.assertEqual(
+            text_handler.fill_template("{{1}} sur {{0}}{{5}}", ["12", "https://x.io"]),
+            "https://x.io sur 12",
+        )
+
+
+class TranslationCacheTest(TestCase):
+    def cache(self, text: str, translation: str):
+        Translated_Content.for_cache(text, "French", translation).save()
+
+    def lookup(self, *texts) -> dict:
+        return {
+            text: translation["text"]
+            for text, translation in Translated_Content.get_translations(
+                texts, "French"
+            ).items()
+        }
+
+    def test_template_serves_other_numbers_and_urls(self):
+        self.cache(
+            "Read 3 posts at https://x.io/a", "Lisez 3 billets sur https://x.io/a"
+        )
+        text = "Read  12 posts at https://x.io/b?utm=rss"
+        self.assertEqual(
+            self.lookup(text), {text: "Lisez 12 billets sur https://x.io/b?utm=rss"}
+        )
+
+    def test_rewritten_number_is_cached_verbatim(self):
+        self.cache("Read 3 posts", "Lisez trois billets")
+        self.assertEqual(
+            self.lookup("Read 3 posts", "Read 4 posts"),
+            {"Read 3 posts": "Lisez trois billets"},
+        )
+
+    def test_whitespace_does_not_matter(self):
+        self.cache("One\n\nTwo", "Un\n\nDeux")
+        text = "One  \n\n  Two"
+        self.assertEqual(self.lookup(text), {text: "Un\n\nDeux"})
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from collections import deque
+
+WINDOW_SIZE = 20  # number of recent calls used to compute the error rate
+MIN_CALLS = 5  # don't judge an engine on fewer calls than this
+FAILURE_RATE_THRESHOLD = 0.5  # open the circuit when half of the calls fail
+SLOW_CALL_THRESHOLD = 60.0  # seconds, slower calls count as failures
+COOLDOWN = 60.0  # seconds before an open circuit lets a trial call through
+MAX_COOLDOWN = 600.0
+
+
+class CircuitBreaker:
+    """
+    Per engine circuit breaker based on the error rate of the recent calls.
+
+    closed: calls go through, results are recorded in a sliding window.
+    open: calls are rejected until the cooldown expires.
+    half_open: a single trial call is let through, its result closes the circuit
+    again or re-opens it with a doubled cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.calls = deque(maxlen=WINDOW_SIZE)  # True: success, False: failure
+        self.cooldown = COOLDOWN
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return self.calls.count(False) / len(self.calls)
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            # half open: only one trial call at a time
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float = 0.0):
+        if latency > SLOW_CALL_THRESHOLD:
+            logging.warning("CircuitBreaker[%s]: slow call %.2fs", self.name, latency)
+            self.record_failure()
+            return
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                logging.warning("CircuitBreaker[%s]: closed", self.name)
+                self.state = self.CLOSED
+                self.calls.clear()
+                self.cooldown = COOLDOWN
+                self.trial_in_flight = False
+            self.calls.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                self._open()
+                return
+            self.calls.append(False)
+            if (
+                self.state == self.CLOSED
+                and len(self.calls) >= MIN_CALLS
+                and self.failure_rate >= FAILURE_RATE_THRESHOLD
+            ):
+                self._open()
+
+    def record_ignored(self):
+        """Neither a success nor a failure, e.g. a rejected request."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+        logging.warning(
+            "CircuitBreaker[%s]: open for %.0fs (failure rate %.0f%%)",
+            self.name,
+            self.cooldown,
+            self.failure_rate * 100,
+        )
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(key: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for `key`."""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(key)
+        return breaker
@@ -0,0 +1,89 @@
+import contextvars
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+import gevent.pool
+from django.conf import settings
+from gevent import monkey
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_greenlet_pool: Optional[gevent.pool.Pool] = None
+_pools_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pools_lock:
+        if _process_pool is None:
+            # spawn, forking a process that runs a gevent hub is not safe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.CPU_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _pools_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=settings.ENGINE_WORKERS, thread_name_prefix="engine"
+            )
+        return _thread_pool
+
+
+def get_greenlet_pool() -> gevent.pool.Pool:
+    global _greenlet_pool
+    with _pools_lock:
+        if _greenlet_pool is None:
+            _greenlet_pool = gevent.pool.Pool(settings.ENGINE_WORKERS)
+        return _greenlet_pool
+
+
+def gevent_active() -> bool:
+    """True in the huey consumer, manage.py monkey-patches it for greenlet workers."""
+    return monkey.is_module_patched("socket")
+
+
+def run_cpu(func: Callable, *args, **kwargs):
+    """
+    Run a CPU-bound function (parsing, segmentation, tokenization...) in the process pool.
+    `func` and its arguments must be picklable. Runs in place when CPU_WORKERS is 0
+    or the pool is broken.
+    """
+    if settings.CPU_WORKERS <= 0:
+        return func(*args, **kwargs)
+    try:
+        future = get_process_pool().submit(func, *args, **kwargs)
+    except Exception as e:
+        logging.warning("Process pool unavailable, run %s in place: %s", func, e)
+        return func(*args, **kwargs)
+    return future.result()
+
+
+def map_io(func: Callable, items: Iterable) -> list:
+    """
+    Call a network-bound function on every item concurrently, results keep the order.
+
+    Under gevent (the huey consumer) threads are greenlets sharing one OS thread,
+    a greenlet pool is used: the calls overlap while they wait on the patched
+    sockets. gevent's native threadpool is not, the engines' rate limiter and
+    circuit breaker locks are gevent locks and can't be shared with native threads.
+    """
+    items = list(items)
+    if settings.ENGINE_WORKERS <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    # the calls see the caller's context variables, e.g. the metric labels
+    context = contextvars.copy_context()
+
+    def call(item):
+        return context.copy().run(func, item)
+
+    if gevent_active():
+        return get_greenlet_pool().map(call, items)
+    return list(get_thread_pool().map(call, items))
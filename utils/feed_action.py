@@ -1,5 +1,8 @@
 import logging
 import os
+import re
+import statistics
+import uuid
 # import json
 
 # import xml.dom.minidom
@@ -9,15 +12,25 @@ from time import mktime
 # from dateutil import parser
 from django.conf import settings
 
-from typing import Dict
+from typing import Dict, Optional
 
+import cityhash
 import feedparser
 import httpx
+import newspaper
 from lxml import etree
 
 from feedgen.feed import FeedGenerator
 from fake_useragent import UserAgent
 
+SY_UPDATE_PERIODS = {  # minutes
+    "hourly": 60,
+    "daily": 1440,
+    "weekly": 10080,
+    "monthly": 43200,
+    "yearly": 525600,
+}
+BACKOFF_FACTOR = 1.5  # poll interval growth after an unchanged poll
 
 def get_first_non_none(feed, *keys):
     return next((feed.get(key) for key in keys if feed.get(key) is not None), None)
@@ -65,9 +78,163 @@ def fetch_feed(url: str, etag: str = "") -> Dict:
         "xml": response.text if response else "",
         "update": update,
         "error": error,
+        "max_age": parse_max_age(response.headers) if response else None,
     }
 
 
+def parse_feed(source) -> feedparser.FeedParserDict:
+    """
+    feedparser.parse, with a result that can be sent back from the process pool:
+    the parse error of a malformed (bozo) feed can't be pickled, keep its message.
+    """
+    feed = feedparser.parse(source)
+    if feed.get("bozo_exception") is not None:
+        feed["bozo_exception"] = str(feed["bozo_exception"])
+    return feed
+
+
+def download_article(
+    url: str, etag: str = "", last_modified: str = "", timeout: float = 30
+) -> Dict:
+    """Conditional GET of an article page, `html` is None when it is unchanged."""
+    html = None
+    error = None
+    response = None
+    headers = {"User-Agent": UserAgent().random.strip()}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        with httpx.Client() as client:
+            response = client.get(
+                url, headers=headers, timeout=timeout, follow_redirects=True
+            )
+        if response.status_code == 200:
+            html = response.text
+        elif response.status_code != 304:
+            response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        error = f"HTTP status error while requesting {url}: {exc.response.status_code} {exc.response.reason_phrase}"
+    except httpx.TimeoutException:
+        error = f"Timeout while requesting {url}"
+    except Exception as e:
+        error = f"Error while requesting {url}: {str(e)}"
+
+    return {
+        "html": html,
+        "update": html is not None,
+        "error": error,
+        "etag": response.headers.get("etag", "") if response else "",
+        "last_modified": response.headers.get("last-modified", "") if response else "",
+    }
+
+
+def extract_article(url: str, html: str) -> str:
+    """Main text of an article page."""
+    article = newspaper.Article(url)
+    article.download(input_html=html)  # 勿使用build，因为不支持跳转
+    article.parse()
+    return article.text
+
+
+def write_file_atomic(path, text):
+    """
+    Write text or bytes through a temporary file and rename it, so readers
+    (possibly on another node sharing FEEDS_FOLDER) never see a half written feed.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        if isinstance(text, bytes):
+            f = open(tmp_path, "wb")
+        else:
+            f = open(tmp_path, "w", encoding="utf-8")
+        with f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def parse_max_age(headers) -> Optional[int]:
+    """Seconds from the Cache-Control max-age directive."""
+    match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+    return int(match.group(1)) if match else None
+
+
+def feed_digest(feed) -> str:
+    """Digest of the entries, changes only when an entry is added or updated."""
+    keys = "".join(
+        f"{entry.get('id') or entry.get('link')}"
+        f"{entry.get('updated') or entry.get('published')}"
+        for entry in feed.entries
+    )
+    return str(cityhash.CityHash64(keys))
+
+
+def publisher_interval(feed=None, max_age: Optional[int] = None) -> int:
+    """
+    Minimum poll interval in minutes asked by the publisher, 0 when unknown.
+    Honors <ttl>, sy:updatePeriod/sy:updateFrequency and Cache-Control max-age.
+    """
+    intervals = [max_age // 60 if max_age else 0]
+    source_feed = feed.feed if feed else {}
+    try:
+        intervals.append(int(source_feed.get("ttl") or 0))
+    except ValueError:
+        pass
+    period = SY_UPDATE_PERIODS.get((source_feed.get("sy_updateperiod") or "").strip())
+    if period:
+        try:
+            frequency = max(int(source_feed.get("sy_updatefrequency") or 1), 1)
+        except ValueError:
+            frequency = 1
+        intervals.append(period // frequency)
+    return max(intervals)
+
+
+def publish_cadence(feed) -> int:
+    """Median minutes between two entries of the feed, 0 when unknown."""
+    timestamps = sorted(
+        (
+            mktime(parsed)
+            for entry in feed.entries
+            if (parsed := entry.get("published_parsed") or entry.get("updated_parsed"))
+        ),
+        reverse=True,
+    )
+    gaps = [newer - older for newer, older in zip(timestamps, timestamps[1:])]
+    gaps = [gap for gap in gaps if gap > 0]
+    if not gaps:
+        return 0
+    return int(statistics.median(gaps) // 60)
+
+
+def next_poll_interval(
+    current: int,
+    changed: bool,
+    cadence: int = 0,
+    hint: int = 0,
+    lower: int = 1,
+    upper: int = 1440,
+) -> int:
+    """
+    Poll interval in minutes after a poll.
+
+    A changed feed is polled twice per publish cadence (or faster, when the
+    cadence is unknown), an unchanged one backs off. Never faster than the
+    publisher asks, always within [lower, upper].
+    """
+    if changed:
+        interval = cadence / 2 if cadence else current / BACKOFF_FACTOR
+    else:
+        interval = current * BACKOFF_FACTOR
+    interval = max(interval, hint, lower)
+    return int(min(interval, upper))
+
+
 def generate_atom_feed(feed_url: str, feed_dict: dict):
     if not feed_dict:
         logging.error("generate_atom_feed: feed_dict is None")
@@ -197,7 +364,7 @@ class FeedMerger:
     def __init__(self, feed_name, feed_files):
         self.feed_name = feed_name
         self.feed_files = feed_files
-        self.output_dir = os.path.join(settings.DATA_FOLDER, "feeds")
+        self.output_dir = settings.FEEDS_FOLDER
         self.output_file = check_file_path(self.output_dir, f"{feed_name}.xml")
         self.processed_entries = set()
 
@@ -321,7 +488,7 @@ def merge_all_atom(feed_files, feed_name):
 def merge_all_atom(feed_files: list, filename: str):
     ATOM_NS = "http://www.w3.org/2005/Atom"
 
-    output_dir = os.path.join(settings.DATA_FOLDER, "feeds")
+    output_dir = settings.FEEDS_FOLDER
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, f"{filename}.xml")
     
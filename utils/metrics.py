@@ -0,0 +1,210 @@
+import contextvars
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# the web server and the task consumer are separate processes, they share their
+# samples through files; must be set before prometheus_client is imported
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", str(settings.METRICS_FOLDER))
+
+try:  # optional, without it every metric is a no-op and /metrics/ is disabled
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CONTENT_TYPE_LATEST = "text/plain; charset=utf-8"
+    Counter = Histogram = None
+
+NAMESPACE = "rsstranslator"
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 3600)
+
+# feed and language of the task running in this greenlet, see observe_task()
+_labels = contextvars.ContextVar("metric_labels", default={})
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+def _metric(cls, name: str, documentation: str, labelnames: tuple, **kwargs):
+    if cls is None:
+        return _NoopMetric()
+    return cls(name, documentation, labelnames, namespace=NAMESPACE, **kwargs)
+
+
+FEED_FETCH_SECONDS = _metric(
+    Histogram,
+    "feed_fetch_seconds",
+    "Time to fetch an original feed",
+    ("feed",),
+    buckets=LATENCY_BUCKETS,
+)
+FEED_FETCHES = _metric(
+    Counter,
+    "feed_fetches",
+    "Original feed fetches by result: modified, not_modified (HTTP 304) or error",
+    ("feed", "result"),
+)
+ENGINE_REQUEST_SECONDS = _metric(
+    Histogram,
+    "engine_request_seconds",
+    "Duration of a single engine request",
+    ("engine", "method", "feed", "language"),
+    buckets=LATENCY_BUCKETS,
+)
+ENGINE_FAILURES = _metric(
+    Counter,
+    "engine_failures",
+    "Engine requests that failed or returned nothing",
+    ("engine", "method", "feed", "language"),
+)
+ENGINE_TOKENS = _metric(
+    Counter,
+    "engine_tokens",
+    "Tokens (characters for non-AI engines) used, by direction: input, output, "
+    "or total for engines that don't report the split",
+    ("engine", "feed", "language", "direction"),
+)
+CACHE_LOOKUPS = _metric(
+    Counter,
+    "cache_lookups",
+    "Translation cache lookups by result: hit or miss",
+    ("feed", "language", "result"),
+)
+TASK_SECONDS = _metric(
+    Histogram,
+    "task_seconds",
+    "Duration of the feed update and translation tasks",
+    ("task", "feed", "language"),
+    buckets=TASK_BUCKETS,
+)
+TASK_FAILURES = _metric(
+    Counter,
+    "task_failures",
+    "Feed update and translation tasks that failed",
+    ("task", "feed", "language"),
+)
+
+
+def set_labels(**labels):
+    """Label the metrics recorded by the current task, e.g. feed=..., language=..."""
+    _labels.set({**_labels.get(), **labels})
+
+
+def _label(name: str) -> str:
+    return str(_labels.get().get(name) or "")
+
+
+class _Observation:
+    failed = False
+
+
+@contextmanager
+def observe_task(task: str):
+    """
+    Record the duration of a task, and a failure when it raises or sets
+    `failed` on the yielded object. Labels set inside don't leak to the next task.
+    """
+    observation = _Observation()
+    token = _labels.set({})
+    started = time.monotonic()
+    try:
+        yield observation
+    except BaseException:
+        observation.failed = True
+        raise
+    finally:
+        labels = (task, _label("feed"), _label("language"))
+        TASK_SECONDS.labels(*labels).observe(time.monotonic() - started)
+        if observation.failed:
+            TASK_FAILURES.labels(*labels).inc()
+        _labels.reset(token)
+
+
+def observe_fetch(seconds: float, error, update: bool):
+    result = "error" if error else "modified" if update else "not_modified"
+    feed = _label("feed")
+    FEED_FETCH_SECONDS.labels(feed).observe(seconds)
+    FEED_FETCHES.labels(feed, result).inc()
+
+
+def observe_request(engine, method: str, seconds: float, results: dict = None):
+    """Record one engine request, `results` is None or empty when it failed."""
+    feed, language = _label("feed"), _label("language")
+    engine = str(engine or "")
+    ENGINE_REQUEST_SECONDS.labels(engine, method, feed, language).observe(seconds)
+    if not results or not results.get("text"):
+        ENGINE_FAILURES.labels(engine, method, feed, language).inc()
+    if not results:
+        return
+    tokens = results.get("tokens") or results.get("characters") or 0
+    output_tokens = results.get("output_tokens", 0)
+    labels = (engine, feed, language)
+    if output_tokens:
+        ENGINE_TOKENS.labels(*labels, "input").inc(tokens - output_tokens)
+        ENGINE_TOKENS.labels(*labels, "output").inc(output_tokens)
+    elif tokens:
+        ENGINE_TOKENS.labels(*labels, "total").inc(tokens)
+
+
+def observe_cache(hits: int, misses: int):
+    feed, language = _label("feed"), _label("language")
+    if hits:
+        CACHE_LOOKUPS.labels(feed, language, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(feed, language, "miss").inc(misses)
+
+
+class QueueCollector:
+    """Tasks waiting in the Huey queue, read from the task backend on every scrape."""
+
+    def collect(self):
+        from huey.contrib.djhuey import HUEY
+
+        depth = GaugeMetricFamily(
+            f"{NAMESPACE}_queue_depth",
+            "Tasks waiting in the queue: pending (ready to run) or scheduled (delayed)",
+            labels=["state"],
+        )
+        try:
+            depth.add_metric(["pending"], HUEY.pending_count())
+            depth.add_metric(["scheduled"], HUEY.scheduled_count())
+        except Exception as e:
+            logging.warning("Cannot read the queue depth: %s", e)
+        yield depth
+
+
+def enabled() -> bool:
+    return Counter is not None
+
+
+def exposition() -> bytes:
+    """Samples of every process in the Prometheus text format."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(QueueCollector())
+    return generate_latest(registry)
+
+
+def reset():
+    """Drop the samples of previous runs, call before the processes start."""
+    shutil.rmtree(settings.METRICS_FOLDER, ignore_errors=True)
+    settings.METRICS_FOLDER.mkdir(parents=True, exist_ok=True)
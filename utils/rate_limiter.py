@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+DEFAULT_RETRY_AFTER = 10.0  # seconds to pause after a 429 without Retry-After
+MIN_RATE_FACTOR = 0.1  # never slow down below 10% of the configured rate
+RATE_FACTOR_STEP = 0.05  # additive recovery per successful request
+
+
+class RateLimiter:
+    """
+    Token bucket limiter with AIMD (additive increase, multiplicative decrease) backoff.
+
+    Two buckets are refilled continuously: one for requests per minute (rpm) and one
+    for tokens per minute (tpm). A value of 0 disables that bucket. Callers block in
+    acquire() only when a bucket is actually exhausted.
+    A 429 halves the effective rate and pauses the limiter until Retry-After,
+    every successful request recovers the rate a little until the configured limit.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self._lock = threading.Lock()
+        self.configure(rpm, tpm)
+
+    def configure(self, rpm: int = 0, tpm: int = 0):
+        with self._lock:
+            self.rpm = max(rpm or 0, 0)
+            self.tpm = max(tpm or 0, 0)
+            self.rate_factor = 1.0
+            self.request_bucket = float(self.rpm)
+            self.token_bucket = float(self.tpm)
+            self.paused_until = 0.0
+            self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        if self.rpm:
+            self.request_bucket = min(
+                self.rpm,
+                self.request_bucket + elapsed * self.rpm * self.rate_factor / 60,
+            )
+        if self.tpm:
+            self.token_bucket = min(
+                self.tpm,
+                self.token_bucket + elapsed * self.tpm * self.rate_factor / 60,
+            )
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = max(self.paused_until - now, 0)
+        if self.rpm and self.request_bucket < 1:
+            wait = max(
+                wait, (1 - self.request_bucket) * 60 / (self.rpm * self.rate_factor)
+            )
+        if self.tpm and self.token_bucket < tokens:
+            wait = max(
+                wait,
+                (tokens - self.token_bucket) * 60 / (self.tpm * self.rate_factor),
+            )
+        return wait
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request (and `tokens` tokens) fit into the quota."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                # A single request larger than the whole bucket must still pass
+                tokens = min(tokens, self.tpm)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    if self.rpm:
+                        self.request_bucket -= 1
+                    if self.tpm:
+                        self.token_bucket -= tokens
+                    return
+            logging.info("RateLimiter: quota exhausted, wait %.2fs", wait)
+            time.sleep(wait)
+
+    def on_success(self, tokens: int = 0):
+        """Charge the tokens actually used and recover the rate additively."""
+        with self._lock:
+            if self.tpm and tokens:
+                self.token_bucket = max(self.token_bucket - tokens, -self.tpm)
+            self.rate_factor = min(1.0, self.rate_factor + RATE_FACTOR_STEP)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Halve the rate and pause until the provider accepts requests again."""
+        with self._lock:
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.request_bucket = min(self.request_bucket, 0)
+            logging.warning(
+                "RateLimiter: rate limited, pause %.2fs, rate factor %.2f",
+                delay,
+                self.rate_factor,
+            )
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: str, rpm: int = 0, tpm: int = 0) -> RateLimiter:
+    """Return the process-wide limiter for `key`, reconfigured if the limits changed."""
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(rpm, tpm)
+    if (limiter.rpm, limiter.tpm) != (max(rpm or 0, 0), max(tpm or 0, 0)):
+        limiter.configure(rpm, tpm)
+    return limiter
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
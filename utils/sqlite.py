@@ -0,0 +1,36 @@
+import logging
+
+from django.conf import settings
+from huey import SqliteHuey
+from huey.storage import SqliteStorage
+
+
+def apply_pragmas(cursor):
+    """Apply settings.SQLITE_PRAGMAS through a sqlite3 connection or cursor."""
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+
+
+def maintain(conn):
+    """Checkpoint and truncate the WAL file, then let SQLite refresh its statistics."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    busy, wal_pages, checkpointed = cursor.fetchone()
+    cursor.execute("PRAGMA optimize")
+    logging.info(
+        "SQLite maintenance: checkpointed %s/%s WAL pages (busy=%s)",
+        checkpointed,
+        wal_pages,
+        busy,
+    )
+
+
+class TunedSqliteStorage(SqliteStorage):
+    def _create_connection(self):
+        conn = super()._create_connection()
+        apply_pragmas(conn)
+        return conn
+
+
+class TunedSqliteHuey(SqliteHuey):
+    storage_class = TunedSqliteStorage
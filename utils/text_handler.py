@@ -1,28 +1,195 @@
+import html
 import logging
 import re
+from functools import lru_cache
 from typing import List, Optional, Tuple
 
 import html2text
+import lxml.html
 import tiktoken
 from bs4 import Comment
-from langdetect import detect
-from markdownify import markdownify
+from langdetect import DetectorFactory, detect
 
+try:  # optional fastText based backend, an order of magnitude faster than langdetect
+    from fast_langdetect import detect as fast_detect
+except ImportError:
+    fast_detect = None
 
-def detect_language(entry):
-    title = entry.get("title")
+try:  # optional local converter between Chinese scripts, used by pivot mode
+    import opencc
+except ImportError:
+    opencc = None
+
+DetectorFactory.seed = 0  # langdetect is randomized, make its results reproducible
+DETECT_SAMPLE_SIZE = 1000  # characters of plain text, enough for a stable guess
+QUICK_SAMPLE_SIZE = 200  # characters checked against the language of the feed
+FEED_LANGUAGE_SAMPLES = 3  # agreeing entries before a feed is considered monolingual
+
+# settings.TRANSLATION_LANGUAGES -> language codes returned by the detectors
+LANGUAGE_CODES = {
+    "English": "en",
+    "Chinese Simplified": "zh-cn",
+    "Chinese Traditional": "zh-tw",
+    "Russian": "ru",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "Czech": "cs",
+    "Danish": "da",
+    "German": "de",
+    "Spanish": "es",
+    "French": "fr",
+    "Indonesian": "id",
+    "Italian": "it",
+    "Hungarian": "hu",
+    "Norwegian Bokmal": "no",
+    "Dutch": "nl",
+    "Polish": "pl",
+    "Portuguese": "pt",
+    "Swedish": "sv",
+    "Turkish": "tr",
+}
+
+
+# frequent characters written differently in Simplified and Traditional Chinese
+SIMPLIFIED_CHARS = frozenset(
+    "这为个们来时说国会对发学过还动进种样经现开见长问间关机电当没与东车书让话请"
+    "实体点应头无觉题业产网号单历报连区导边认识语读写买卖钱观亲热图层灵伤爱"
+)
+TRADITIONAL_CHARS = frozenset(
+    "這為個們來時說國會對發學過還動進種樣經現開見長問間關機電當沒與東車書讓話請"
+    "實體點應頭無覺題業產網號單歷報連區導邊認識語讀寫買賣錢觀親熱圖層靈傷愛"
+)
+
+
+def strip_markup(text: str) -> str:
+    """Plain text of an HTML fragment, good enough for language detection."""
+    text = re.sub(r"<(script|style)\b.*?</\1\s*>", " ", text, flags=re.S | re.I)
+    text = re.sub(r"<[^>]*>?", " ", text)  # also a tag cut off at the end
+    return html.unescape(text)
+
+
+def chinese_script(text: str) -> Optional[str]:
+    """"zh-cn" or "zh-tw" by the script of `text`, None when it can't tell."""
+    simplified = sum(char in SIMPLIFIED_CHARS for char in text)
+    traditional = sum(char in TRADITIONAL_CHARS for char in text)
+    if simplified > traditional:
+        return "zh-cn"
+    if traditional > simplified:
+        return "zh-tw"
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _detect(sample: str) -> str:
+    language = None
+    if fast_detect:
+        try:
+            language = fast_detect(sample)["lang"].lower()
+        except Exception as e:
+            logging.warning("fast_langdetect failed, use langdetect:%s", e)
+    if not language:
+        try:
+            language = detect(sample)
+        except Exception as e:
+            logging.warning("Cannot detect source language:%s,%s", e, sample)
+            return "auto"
+    if language.startswith("zh"):
+        # the detectors confuse both scripts or don't tell them apart at all
+        language = chinese_script(sample) or language
+    return language
+
+
+def detect_text_language(text: str, sample_size: int = DETECT_SAMPLE_SIZE) -> str:
+    """
+    Language code of `text` (HTML or plain text), "auto" when undetectable.
+    Only a bounded prefix is analyzed and results are cached by that sample.
+    """
+    # markup is usually several times longer than its text, don't strip it all
+    text = strip_markup((text or "")[: sample_size * 4])
+    sample = " ".join(text.split())[:sample_size]
+    if not sample:
+        return "auto"
+    return _detect(sample)
+
+
+def entry_content(entry) -> Optional[str]:
     original_content = entry.get("content")
-    content = (
+    return (
         original_content[0].get("value") if original_content else entry.get("summary")
     )
-    text = f"{title} {content}"
-    source_language = "auto"
+
+
+def detect_language(entry, sample_size: int = DETECT_SAMPLE_SIZE):
+    title = entry.get("title")
+    content = entry_content(entry)
+    return detect_text_language(f"{title or ''} {content or ''}", sample_size)
+
+
+class FeedLanguage:
+    """
+    Detect the language of a feed's entries. Most feeds are monolingual: once the
+    first entries agree, their language is the prior for the rest, which are only
+    checked on a short sample. An entry whose check disagrees is detected on the
+    full sample, so an entry in another language is still recognized.
+    """
+
+    def __init__(self, samples: int = FEED_LANGUAGE_SAMPLES):
+        self.samples = samples
+        self.detected = []
+
+    @property
+    def language(self) -> Optional[str]:
+        languages = set(self.detected)
+        if len(self.detected) >= self.samples and len(languages) == 1:
+            language = languages.pop()
+            return language if language != "auto" else None
+        return None
+
+    def detect(self, entry) -> str:
+        prior = self.language
+        if prior is None:
+            language = detect_language(entry)
+            self.detected.append(language)
+            return language
+        if detect_language(entry, QUICK_SAMPLE_SIZE) == prior:
+            return prior
+        language = detect_language(entry)
+        return prior if language == "auto" else language
+
+
+# pivot mode: target language -> (language it is derived from, OpenCC configuration)
+PIVOT_CONVERSIONS = {
+    "Chinese Traditional": ("Chinese Simplified", "s2twp"),
+}
+
+
+def pivot_language(target_language: str) -> Optional[str]:
+    """The language `target_language` can be derived from locally, if any."""
+    if opencc is None or target_language not in PIVOT_CONVERSIONS:
+        return None
+    return PIVOT_CONVERSIONS[target_language][0]
+
+
+@lru_cache(maxsize=None)
+def _opencc_converter(config: str):
     try:
-        source_language = detect(text)
-    except Exception as e:
-        logging.warning("Cannot detect source language:%s,%s", e, text)
+        return opencc.OpenCC(config)
+    except Exception:
+        return opencc.OpenCC(f"{config}.json")  # the official binding wants the file name
 
-    return source_language
+
+def convert_language(text: str, target_language: str) -> str:
+    """Derive `text`, in the pivot language of `target_language`, locally."""
+    _, config = PIVOT_CONVERSIONS[target_language]
+    return _opencc_converter(config).convert(text)
+
+
+def is_target_language(source_language: str, target_language: str) -> bool:
+    """
+    Whether text detected as `source_language` is already in `target_language`.
+    Chinese of an unknown script ("zh") matches neither Simplified nor Traditional.
+    """
+    return source_language == LANGUAGE_CODES.get(target_language)
 
 
 def clean_content(content: str) -> str:
@@ -47,12 +214,65 @@ def clean_content(content: str) -> str:
     return content
 
 
+def normalize_text(text: str) -> str:
+    """Cache key form of a text, differences in whitespace don't matter."""
+    return " ".join(text.split())
+
+
+# parts of a text that vary without changing its translation, kept out of cache keys
+URL_PATTERN = r"https?://[^\s<>\"']+"
+# not the digits of words, <t1> placeholders or {{0}} template slots
+NUMBER_PATTERN = r"(?<![A-Za-z0-9_.,{])\d+(?:[.,]\d+)*(?![A-Za-z0-9_}])"
+VOLATILE = re.compile(f"(?P<url>{URL_PATTERN})|(?P<number>{NUMBER_PATTERN})")
+TEMPLATE_SLOT = re.compile(r"\{\{(\d+)\}\}")
+
+
+def cache_template(text: str) -> Tuple[str, List[str]]:
+    """
+    Canonical cache key of `text`: whitespace normalized, URLs (with their
+    tracking parameters and CDN hosts) and numbers replaced by placeholders.
+    Returns the key and the replaced values, in order.
+    """
+    values = []
+
+    def replace(match) -> str:
+        values.append(match.group())
+        return "{{url}}" if match.group("url") else "{{number}}"
+
+    return normalize_text(VOLATILE.sub(replace, text)), values
+
+
+def templatize(translation: str, values: List[str]) -> Optional[str]:
+    """
+    Replace the values of cache_template in a translation by {{index}} slots,
+    None when one of them isn't kept as is (e.g. a number written in words).
+    """
+    # longest first, "12" must not take the "1" of "123"
+    for index, value in sorted(enumerate(values), key=lambda item: -len(item[1])):
+        pattern = rf"(?<![A-Za-z0-9_.,{{]){re.escape(value)}(?![A-Za-z0-9_}}])"
+        translation, found = re.subn(pattern, f"{{{{{index}}}}}", translation, 1)
+        if not found:
+            return None
+    return translation
+
+
+def fill_template(template: str, values: List[str]) -> str:
+    return TEMPLATE_SLOT.sub(
+        lambda m: values[int(m.group(1))] if int(m.group(1)) < len(values) else "",
+        template,
+    )
+
+
 # Thanks to https://github.com/openai/openai-cookbook/blob/main/examples/Summarizing_with_controllable_detail.ipynb
 def tokenize(text: str) -> List[str]:
     encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
     return encoding.encode(text)
 
 
+def count_tokens(text: str) -> int:
+    return len(tokenize(text))
+
+
 """
 This function combines text chunks into larger blocks without exceeding a specified token count. 
 It returns the combined text blocks, their original indices, and the count of chunks dropped due to overflow.
@@ -128,31 +348,252 @@ def chunk_on_delimiter(
     return combined_chunks
 
 
+BLOCK_TAGS = frozenset(
+    [
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "caption",
+        "dd",
+        "details",
+        "div",
+        "dl",
+        "dt",
+        "fieldset",
+        "figcaption",
+        "figure",
+        "footer",
+        "form",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "main",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "summary",
+        "table",
+        "tbody",
+        "td",
+        "tfoot",
+        "th",
+        "thead",
+        "tr",
+        "ul",
+    ]
+)
+# inline tags of a segment, e.g. "Read <t1>the docs</t1><t2/>"
+PLACEHOLDER = re.compile(r"<(/?)t(\d+)(/?)>")
+# segments of a group are separated by a blank line
+SEGMENT_SEPARATOR = re.compile(r"\n\s*\n")
+# appended to content prompts written before segments had placeholders
+SEGMENT_PROMPT = (
+    "Keep every paragraph on its own line and the <t1>, </t1>, <t2/> style tags "
+    "where they belong."
+)
+
+
+def _is_opaque(element) -> bool:
+    """Inline elements kept as a whole, without translating their content."""
+    return (
+        not isinstance(element.tag, str)  # comment
+        or element.tag in SKIP_TAGS
+        or not element.text_content().strip()  # e.g. <br>, <img>
+    )
+
+
+def _inline_source(element, inline: list) -> str:
+    """Text of `element`, its inline tags replaced by numbered placeholders."""
+    parts = [html.escape(element.text or "", quote=False)]
+    for child in element:
+        inline.append(child)
+        number = len(inline)
+        if _is_opaque(child):
+            parts.append(f"<t{number}/>")
+        else:
+            parts.append(f"<t{number}>{_inline_source(child, inline)}</t{number}>")
+        parts.append(html.escape(child.tail or "", quote=False))
+    return "".join(parts)
+
+
+def _walk_segments(element, containers: set):
+    if not isinstance(element.tag, str) or element.tag in SKIP_TAGS:
+        return
+    if element not in containers:
+        inline = []
+        yield element, "element", _inline_source(element, inline), inline
+        return
+    # text between the blocks of a container
+    yield element, "text", html.escape(element.text or "", quote=False), []
+    for child in element:
+        yield from _walk_segments(child, containers)
+        yield child, "tail", html.escape(child.tail or "", quote=False), []
+
+
+def _segments(root) -> list:
+    """
+    Translatable segments of the tree: (element, kind, source, inline tags).
+    A segment is an element without blocks inside, or the text around the
+    blocks of a container (kind "text" or "tail").
+    """
+    containers = set()  # holding the elements keeps lxml proxies, and hashes, stable
+    for block in root.iterdescendants(*BLOCK_TAGS):
+        for ancestor in block.iterancestors():
+            if ancestor in containers:
+                break
+            containers.add(ancestor)
+    return [
+        segment
+        for segment in _walk_segments(root, containers)
+        if not should_skip_text(
+            html.unescape(PLACEHOLDER.sub("", segment[2])).strip()
+        )
+    ]
+
+
+def _normalize_segment(source: str) -> str:
+    return " ".join(source.split())
+
+
+def _is_plain_text(content: str) -> bool:
+    return not re.search(r"<[a-zA-Z!/]", content)
+
+
+def _paragraphs(content: str) -> list:
+    """Segments of plain text content: its paragraphs, separated by blank lines."""
+    return [
+        _normalize_segment(html.escape(paragraph, quote=False))
+        for paragraph in SEGMENT_SEPARATOR.split(content)
+        if not should_skip_text(paragraph.strip())
+    ]
+
+
 def content_split(content: str) -> dict:
     """
-    Split content into chunks, separated by one or more newlines.
+    Split HTML content into translatable segments in a single walk of the DOM.
+    Inline tags are kept as <tN> placeholders, see restore_content. Plain text
+    is split into its paragraphs.
     # https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
     #encoding = tiktoken.get_encoding("cl100k_base")
     """
     encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
     try:
-        markdown = markdownify(
-            content, keep_inline_images_in=["td"], heading_style="ATX"
-        )
-        chunks = re.split("\n+", markdown)
-        tokens = []
-        characters = []
-        for chunk in chunks:
-            tokens.append(len(encoding.encode(chunk)))
-            characters.append(len(chunk))
+        if _is_plain_text(content):
+            chunks = _paragraphs(content)
+        else:
+            root = lxml.html.fragment_fromstring(content, create_parent="div")
+            chunks = [
+                _normalize_segment(source) for _, _, source, _ in _segments(root)
+            ]
     except Exception as e:
         logging.error(f"content_split: {str(e)}")
         chunks = [content]
-        tokens = [len(encoding.encode(content))]
-        characters = [len(content)]
+    tokens = [len(encoding.encode(chunk)) for chunk in chunks]
+    characters = [len(chunk) for chunk in chunks]
     return {"chunks": chunks, "tokens": tokens, "characters": characters}
 
 
+def _rebuild_element(element, translation: str, inline: list):
+    """Replace the content of `element` with a translation holding placeholders."""
+    for child in list(element):
+        element.remove(child)
+    element.text = None
+    stack = [element]
+    opened = {}
+    used = set()
+
+    def add_text(text: str):
+        if not text:
+            return
+        parent = stack[-1]
+        if len(parent):
+            parent[-1].tail = (parent[-1].tail or "") + text
+        else:
+            parent.text = (parent.text or "") + text
+
+    position = 0
+    for match in PLACEHOLDER.finditer(translation):
+        add_text(html.unescape(translation[position : match.start()]))
+        position = match.end()
+        closing, number = match.group(1), int(match.group(2))
+        if not 0 < number <= len(inline):
+            continue  # made up by the engine
+        if closing:
+            node = opened.pop(number, None)
+            if node is not None and node in stack:
+                del stack[stack.index(node) :]
+            continue
+        if number in used:
+            continue
+        used.add(number)
+        original = inline[number - 1]
+        if _is_opaque(original):
+            stack[-1].append(original)  # as is, e.g. <img> or <code>
+            original.tail = None
+        else:
+            node = element.makeelement(original.tag, original.attrib)
+            stack[-1].append(node)
+            stack.append(node)
+            opened[number] = node
+    add_text(html.unescape(translation[position:]))
+
+    # don't lose images and the like when the engine dropped their placeholder
+    for number, original in enumerate(inline, 1):
+        if number not in used and isinstance(original.tag, str):
+            if _is_opaque(original):
+                element.append(original)
+                original.tail = None
+
+
+def restore_content(content: str, translations: dict) -> str:
+    """
+    Put the translations of content_split's segments, keyed by segment, back
+    into `content`. Untranslated segments and all the markup are kept as is.
+    """
+    if _is_plain_text(content):
+        paragraphs = []
+        for paragraph in SEGMENT_SEPARATOR.split(content):
+            translation = translations.get(
+                _normalize_segment(html.escape(paragraph, quote=False))
+            )
+            paragraphs.append(
+                html.unescape(PLACEHOLDER.sub("", translation)).strip()
+                if translation
+                else paragraph
+            )
+        return "\n\n".join(paragraphs)
+    try:
+        root = lxml.html.fragment_fromstring(content, create_parent="div")
+    except Exception as e:
+        logging.error(f"restore_content: {str(e)}")
+        return "\n".join(translations.values())
+
+    for element, kind, source, inline in _segments(root):
+        translation = translations.get(_normalize_segment(source))
+        if not translation:
+            continue
+        if kind == "element":
+            _rebuild_element(element, translation, inline)
+        else:
+            original = getattr(element, kind)
+            text = html.unescape(PLACEHOLDER.sub("", translation)).strip()
+            leading = original[: len(original) - len(original.lstrip())]
+            trailing = original[len(original.rstrip()) :]
+            setattr(element, kind, f"{leading}{text}{trailing}")
+
+    result = lxml.html.tostring(root, encoding="unicode")
+    return result[len("<div>") : -len("</div>")]
+
+
 def group_chunks(
     split_chunks: dict, max_size: int, group_by: str
 ) -> list:  # group_by: 'tokens' or 'characters'
@@ -173,10 +614,7 @@ def group_chunks(
                 current_value = value
             else:
                 # If adding the current chunk does not exceed 1/2 of max_size, add it to current_chunk
-                if chunk.startswith("|"):
-                    current_chunk += "\n" + chunk
-                else:
-                    current_chunk += "\n\n" + chunk
+                current_chunk += "\n\n" + chunk
                 current_value += value
 
         # Add the last current_chunk to grouped_chunks
@@ -189,45 +627,113 @@ def group_chunks(
     return grouped_chunks
 
 
+def split_segments(chunk: str) -> list:
+    """The segments of a group made by group_chunks."""
+    return [segment for segment in SEGMENT_SEPARATOR.split(chunk) if segment.strip()]
+
+
+def align_segments(chunk: str, translation: str) -> Optional[list]:
+    """
+    (segment, translation) pairs of a group, None when the paragraphs of the
+    translation don't match its segments.
+    """
+    segments = split_segments(chunk)
+    paragraphs = split_segments(translation)
+    if len(segments) == 1:
+        return [(segments[0], " ".join(" ".join(paragraphs).split()))]
+    if len(paragraphs) != len(segments):
+        # some engines drop the blank lines and keep single line breaks
+        paragraphs = [line for line in translation.split("\n") if line.strip()]
+    if len(paragraphs) == len(segments):
+        return [
+            (segment, paragraph.strip())
+            for segment, paragraph in zip(segments, paragraphs)
+        ]
+    return None
+
+
+def segments_to_text(chunk: str) -> str:
+    """A group of segments without placeholders, for engines that can't keep them."""
+    return html.unescape(PLACEHOLDER.sub("", chunk))
+
+
+def split_truncated(source: str, partial: str) -> Tuple[str, str]:
+    """
+    Split a truncated translation after its last complete paragraph.
+    Returns the complete part of the translation and the source paragraphs that
+    are still missing, so only the tail has to be translated again.
+    Returns ("", source) when no paragraph was completed.
+    """
+    source_paragraphs = [p for p in re.split("\n+", source) if p.strip()]
+    translated_paragraphs = [p for p in re.split("\n+", partial) if p.strip()]
+    # the last paragraph may have been cut in the middle
+    done = translated_paragraphs[:-1]
+    if not done or len(done) >= len(source_paragraphs):
+        return "", source
+    return "\n\n".join(done), "\n\n".join(source_paragraphs[len(done) :])
+
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])")
+
+
+def bisect_text(text: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split `text` in two halves at a paragraph, or a sentence when it is a single
+    paragraph, for a source whose translation is truncated before its first
+    paragraph ends. Returns (first, second, separator), None for a single sentence.
+    """
+    paragraphs = [p for p in re.split("\n+", text) if p.strip()]
+    separator = "\n\n"
+    if len(paragraphs) < 2:
+        paragraphs = [s for s in SENTENCE_END.split(text.strip()) if s.strip()]
+        separator = " "
+    if len(paragraphs) < 2:
+        return None
+    middle = len(paragraphs) // 2
+    return (
+        separator.join(paragraphs[:middle]),
+        separator.join(paragraphs[middle:]),
+        separator,
+    )
+
+
+# never translated: code, metadata and the like
+SKIP_TAGS = [
+    "pre",
+    "code",
+    "script",
+    "style",
+    "head",
+    "title",
+    "meta",
+    "abbr",
+    "address",
+    "samp",
+    "kbd",
+    "bdo",
+    "cite",
+    "dfn",
+    "iframe",
+]
+# 使用正则表达式来检查元素是否为数字、URL、电子邮件或包含特定符号
+SKIP_PATTERNS = [
+    r"^http",  # URL
+    r"^[^@]+@[^@]+\.[^@]+$",  # 电子邮件
+    r"^[\d\W]+$",  # 纯数字或者数字和符号的组合
+]
+
+
+def should_skip_text(text: str) -> bool:
+    return not text or any(re.match(pattern, text) for pattern in SKIP_PATTERNS)
+
+
 def should_skip(element):
-    skip_tags = [
-        "pre",
-        "code",
-        "script",
-        "style",
-        "head",
-        "title",
-        "meta",
-        "abbr",
-        "address",
-        "samp",
-        "kbd",
-        "bdo",
-        "cite",
-        "dfn",
-        "iframe",
-    ]
     if isinstance(element, Comment):
         return True
-    if element.find_parents(skip_tags):
-        return True
-
-    text = element.get_text(strip=True)
-    if not text:
+    if element.find_parents(SKIP_TAGS):
         return True
 
-    # 使用正则表达式来检查元素是否为数字、URL、电子邮件或包含特定符号
-    skip_patterns = [
-        r"^http",  # URL
-        r"^[^@]+@[^@]+\.[^@]+$",  # 电子邮件
-        r"^[\d\W]+$",  # 纯数字或者数字和符号的组合
-    ]
-
-    for pattern in skip_patterns:
-        if re.match(pattern, text):
-            return True
-
-    return False
+    return should_skip_text(element.get_text(strip=True))
 
 
 def unwrap_tags(soup) -> str: